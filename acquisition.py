@@ -0,0 +1,344 @@
+"""
+기상 센서 + Daly BMS 를 하나의 프로세스(asyncio)에서 수집하는 daemon
+
+    python acquisition.py [--weather [dev_XX=]/dev/ttyUSB0] [--bms [dev_XX=]/dev/ttyUSB1] [--bms-interval 240]
+
+포트마다 coroutine 하나가 읽기를 담당하고, 레코드는 기기(dev_id)별 Pipeline(저장/그래프/업로드 스레드)으로 전달.
+--weather, --bms 는 여러 번 지정 가능 ('' 이면 사용 안 함). dev_id 를 생략하면 parsing_sensor.DEV_ID.
+기기마다 저장소 / outbox / 그래프 / BMS 로그가 따로이고, 같은 dev_id 의 BMS 측정 전력이 그 기기의 그래프에 붙음
+(기기 하나에 같은 종류의 포트는 하나만)
+BMS pack 로그는 기기별 outbox 로 서버(POST /api/<dev_id>/bms)에도 올라가서 서버의 /asof 와 plot.png 측정 전력에 쓰임
+"""
+from daly_protocol import COMMAND, FRAME_LENGTH, burst, validate_checksum, split_frames, frame_count
+from daly_protocol import decode_pack_measurements, decode_min_max_cell_voltage, decode_pack_temperature
+from daly_protocol import decode_status, decode_cell_frames
+from daly_bms import DalyBMSUART, cell_columns, cell_row
+from edge_summary import WindowAggregator, encode_summaries
+from segment_store import SegmentStore
+from daily_csv import DailyCSVWriter
+from frame_decoder import FrameDecoder
+from functools import partial
+from datetime import datetime
+from live_plot import LivePlot
+from history import to_epoch
+from asof import BMS_COLUMNS
+from pipeline import Pipeline
+from outbox import Outbox
+import parsing_sensor as edge
+import argparse
+import asyncio
+import signal
+import serial
+import time
+import sys
+import os
+
+
+WEATHER_PORT, BMS_PORT, BAUDRATE = '/dev/ttyUSB0', '/dev/ttyUSB1', 9600
+BMS_INTERVAL = 240
+BMS_TIMEOUT = 0.5 # 명령어 하나당 응답 대기 (초)
+BMS_DIR = os.path.join(edge.current_dir, 'bms_data') # parsing_sensor.DEV_ID 의 로그, 다른 기기는 {BMS_DIR}/{dev_id}/
+BMS_COMPRESS = True # 지난 날짜 파일은 .csv.gz 로 압축
+BMS_UPLOAD = True # pack 로그를 서버로 ({url}/bms, 서버의 /asof 와 plot.png 측정 전력), 셀 로그는 로컬에만
+POWER_TOLERANCE = 1.5 * BMS_INTERVAL # 이보다 오래된 BMS 샘플이면 그래프 power 는 풍속 추정값
+BMS_QUERIES = [
+    ('VOUT_IOUT_SOC', decode_pack_measurements),
+    ('MIN_MAX_CELL_VOLTAGE', decode_min_max_cell_voltage),
+    ('MIN_MAX_TEMPERATURE', decode_pack_temperature),
+]
+
+
+class AsyncSerial:
+    """pyserial 포트를 event loop 에 등록(add_reader)하고 asyncio.StreamReader 로 읽음"""
+
+    def __init__(self, port, baudrate):
+        self.port = port
+        self.serial = serial.Serial(port, baudrate, timeout=0)
+        self.reader = asyncio.StreamReader()
+        self.loop = asyncio.get_running_loop()
+        self.loop.add_reader(self.serial.fileno(), self._on_readable)
+
+    def _on_readable(self):
+        try:
+            data = self.serial.read(self.serial.in_waiting or 1)
+        except (serial.SerialException, OSError) as e:
+            data, error = b'', e
+        else:
+            error = serial.SerialException(f'{self.port} disconnected')
+        if data:
+            self.reader.feed_data(data)
+        else: # readable but empty: device gone
+            self.loop.remove_reader(self.serial.fileno())
+            self.reader.set_exception(error)
+
+    def write(self, data):
+        self.serial.write(data)
+
+    async def discard(self, quiet=0.05):
+        # 늦게 도착한 응답 버리기 (quiet 초 동안 더 오는 데이터가 없을 때까지)
+        while True:
+            try:
+                await asyncio.wait_for(self.reader.read(4096), quiet)
+            except asyncio.TimeoutError:
+                return
+
+    def close(self):
+        try:
+            self.loop.remove_reader(self.serial.fileno())
+        except (ValueError, OSError):
+            pass
+        self.serial.close()
+
+
+async def weather_source(port, ip, sinks):
+    while True:
+        device = None
+        try:
+            device = AsyncSerial(port, BAUDRATE)
+            device.write(b'AT+AutoSend=60')
+            decoder = FrameDecoder(edge.FRAME_FIELDS)
+            print(f"[weather {port}] Connected")
+            while True:
+                chunk = await device.reader.read(4096)
+                if not chunk:
+                    raise serial.SerialException(f'{port} closed')
+                for frame in decoder.feed(chunk):
+                    data = {'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 'ip': ip['value']}
+                    data.update(frame)
+                    sinks['weather'].publish(data)
+                    print(data)
+        except (serial.SerialException, OSError) as e:
+            print(f"[weather {port}] Error: {e}")
+        finally:
+            if device:
+                device.close()
+        await asyncio.sleep(10)
+
+
+async def bms_query(device, queries):
+    """queries 명령어를 한 번에 전송하고, 명령어 byte 로 응답을 매칭해서 디코딩한 값 목록 반환"""
+    cmd_ids = [COMMAND[name] for name, _ in queries]
+    device.write(burst(tuple(name for name, _ in queries)))
+    responses = {}
+    while len(responses) < len(cmd_ids):
+        frame = await asyncio.wait_for(device.reader.readexactly(FRAME_LENGTH), BMS_TIMEOUT)
+        if not validate_checksum(frame):
+            raise ValueError(f'checksum failed: {frame.hex()}')
+        if frame[2] in cmd_ids:
+            responses[frame[2]] = frame
+    row = []
+    for (_, decode), cmd_id in zip(queries, cmd_ids):
+        row += decode(responses[cmd_id])
+    return row
+
+
+async def bms_frames(device, names, status=None):
+    """names 명령어를 한 번에 전송하고 전체 응답(여러 프레임)을 한 번에 읽어서 체크섬이 맞는 프레임 목록 반환"""
+    total = sum(frame_count(name, status) for name in names) if status else len(names)
+    device.write(burst(tuple(names)))
+    buf = await asyncio.wait_for(device.reader.readexactly(total * FRAME_LENGTH), BMS_TIMEOUT * len(names))
+    return split_frames(buf)
+
+
+async def bms_cells(device, status):
+    """셀 전압 / 온도 / 밸런싱 / 고장 코드 (0x95 ~ 0x98)"""
+    cells = decode_cell_frames(await bms_frames(device, DalyBMSUART.CELL_SNAPSHOT, status), status)
+    if cells is None:
+        raise ValueError('incomplete cell frames')
+    return cells
+
+
+async def bms_source(port, interval, sinks, power=None):
+    """power: 측정 전력 {'time', 'value'} (같은 기기의 그래프용), 매 주기 pack voltage x current 로 갱신"""
+    while True:
+        device = None
+        try:
+            device = AsyncSerial(port, BAUDRATE)
+            print(f"[bms {port}] Connected")
+            status = None
+            while True:
+                started = time.monotonic()
+                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                row = [timestamp]
+                try:
+                    row += await bms_query(device, BMS_QUERIES)
+                    sinks['bms'].publish(row)
+                    if power is not None:
+                        power.update(time=time.time(), value=row[1] * row[2]) # pack voltage x current
+                    print(f"[bms {port}] {row}")
+                    if status is None:
+                        frames = await bms_frames(device, ['STATUS_INFO'])
+                        if not frames:
+                            raise ValueError('no status frame')
+                        status = decode_status(frames[0])
+                        print(f"[bms {port}] Status: {status}")
+                    cells = cell_row(timestamp, await bms_cells(device, status))
+                    sinks['bms'].publish((cell_columns(status), cells))
+                    print(f"[bms {port}] {cells}")
+                except (asyncio.TimeoutError, ValueError) as e:
+                    print(f"[bms {port}] No complete data received. {e or 'timeout'}")
+                    await device.discard()
+                await asyncio.sleep(max(0, interval - (time.monotonic() - started)))
+        except (serial.SerialException, OSError, asyncio.IncompleteReadError) as e:
+            print(f"[bms {port}] Error: {e}")
+        finally:
+            if device:
+                device.close()
+        await asyncio.sleep(10)
+
+
+class EdgeDevice:
+    """
+    기기(dev_id) 하나의 기상 저장소 / 그래프 / 업로드와 BMS 로그 (parsing_sensor 의 설정을 기기마다).
+    parsing_sensor.DEV_ID 는 parsing_sensor 의 객체와 기존 경로(bms_data/ 포함)를 그대로 사용
+    """
+
+    def __init__(self, dev_id):
+        self.dev_id = dev_id
+        self.power = {'time': None, 'value': None} # 마지막 BMS 측정 전력 (time.time(), W)
+        if dev_id == edge.DEV_ID:
+            self.store, self.plot, self.summary, self.uplink = edge.store, edge.plot, edge.summary, edge.uplink
+            self.bms_dir = BMS_DIR
+            return
+        data_dir = os.path.join(edge.current_dir, 'sensor_data')
+        self.store = SegmentStore(data_dir, dev_id, edge.COLUMNS, edge.RETENTION_DAYS)
+        self.plot = LivePlot(os.path.join(edge.current_dir, f'{dev_id}.png'), window=180, render_every=edge.RENDER_EVERY)
+        self.summary = WindowAggregator(edge.COLUMNS[2:], edge.SUMMARY_WINDOW)
+        url = f'http://{edge.SERVER}:{edge.PORT}/api/{dev_id}'
+        if edge.UPLOAD_MODE == 'summary':
+            encode = partial(encode_summaries, window=edge.SUMMARY_WINDOW, columns=self.summary.columns,
+                             fmt=edge.SUMMARY_FORMAT, compress=edge.SUMMARY_GZIP)
+            self.uplink = Outbox(os.path.join(data_dir, f'{dev_id}.summary.outbox'), f'{url}/summary',
+                                 headers=edge.headers, encode=encode, interval=edge.SUMMARY_UPLOAD_INTERVAL)
+        else:
+            self.uplink = Outbox(os.path.join(data_dir, f'{dev_id}.outbox'), f'{url}/batch', headers=edge.headers)
+        self.bms_dir = os.path.join(BMS_DIR, dev_id)
+
+    def write(self, data):
+        self.store.append(data)
+
+    def plot_weather(self, data):
+        if self.power['time'] is not None and time.time() - self.power['time'] <= POWER_TOLERANCE:
+            data = {**data, 'power': self.power['value']}
+        self.plot.update(data)
+
+    def upload(self, data):
+        if edge.UPLOAD_MODE == 'summary':
+            row = self.summary.add(to_epoch(data['timestamp']), data)
+            if row:
+                self.uplink.put({'ip': data['ip'], 'row': row})
+        else:
+            self.uplink.put(data)
+
+    def make_sinks(self, weather, bms):
+        """weather / bms 포트가 있는 종류만 Pipeline (BMS 일별 파일은 bms-sensor-data.py 와 같은 형식)"""
+        sinks = {}
+        if weather:
+            pipeline = Pipeline()
+            pipeline.add_stage('write', self.write, maxsize=edge.WRITE_QUEUE)
+            if edge.RENDER_EVERY: # 로컬 PNG 는 선택 (기본은 서버 대시보드)
+                pipeline.add_stage('plot', self.plot_weather, maxsize=edge.PLOT_QUEUE)
+            pipeline.add_stage('upload', self.upload, maxsize=edge.UPLOAD_QUEUE)
+            sinks['weather'] = pipeline
+        if bms:
+            self.bms_log = DailyCSVWriter(self.bms_dir, 'bms_data_log', BMS_COLUMNS, compress=BMS_COMPRESS)
+            self.cells_log = DailyCSVWriter(self.bms_dir, 'bms_cells_log', compress=BMS_COMPRESS)
+            pipeline = Pipeline()
+            pipeline.add_stage('bms_write', self.write_bms, maxsize=1000)
+            if BMS_UPLOAD:
+                self.bms_uplink = Outbox(os.path.join(edge.current_dir, 'sensor_data', f'{self.dev_id}.bms.outbox'),
+                                         f'http://{edge.SERVER}:{edge.PORT}/api/{self.dev_id}/bms', headers=edge.headers)
+                pipeline.add_stage('bms_upload', self.upload_bms, maxsize=edge.UPLOAD_QUEUE)
+            sinks['bms'] = pipeline
+        return sinks
+
+    def write_bms(self, row):
+        # (header, row) 는 셀 단위 wide-row
+        if isinstance(row, tuple):
+            columns, row = row
+            self.cells_log.write(row, columns)
+        else:
+            self.bms_log.write(row)
+
+    def upload_bms(self, row):
+        if not isinstance(row, tuple):
+            self.bms_uplink.put(dict(zip(BMS_COLUMNS, row)))
+
+
+def parse_ports(specs, kind):
+    """
+    --weather / --bms 값 목록 ['dev_07=/dev/ttyUSB2', '/dev/ttyUSB0', ''] -> [(dev_id, port)] ('' 는 건너뜀)
+    기기 하나에 같은 종류의 포트가 둘이면 ValueError (기록이 섞임)
+    """
+    ports = []
+    for spec in specs:
+        if not spec:
+            continue
+        dev_id, sep, port = spec.partition('=')
+        if not sep:
+            dev_id, port = edge.DEV_ID, spec
+        if not dev_id.startswith('dev_') or not port:
+            raise ValueError(f'bad {kind} port {spec!r}, expected [dev_XX=]PORT')
+        if any(dev_id == other for other, _ in ports):
+            raise ValueError(f'more than one {kind} port for {dev_id}')
+        ports.append((dev_id, port))
+    return ports
+
+
+async def report(devices):
+    while True:
+        await asyncio.sleep(edge.STATS_INTERVAL)
+        for dev_id, sinks in devices.items():
+            for kind, pipeline in sinks.items():
+                print(f"Pipeline[{dev_id} {kind}]: {pipeline.stats()}")
+
+
+async def main(args):
+    weather_ports = parse_ports(args.weather, 'weather')
+    bms_ports = parse_ports(args.bms, 'bms')
+    weather_ids = {dev_id for dev_id, _ in weather_ports}
+    bms_ids = {dev_id for dev_id, _ in bms_ports}
+    devices, sinks = {}, {}
+    for dev_id in sorted(weather_ids | bms_ids):
+        device = devices[dev_id] = EdgeDevice(dev_id)
+        sinks[dev_id] = device.make_sinks(dev_id in weather_ids, dev_id in bms_ids)
+        for pipeline in sinks[dev_id].values():
+            pipeline.start()
+        if dev_id in bms_ids and BMS_UPLOAD:
+            device.bms_uplink.start()
+        if dev_id in weather_ids:
+            device.uplink.start()
+            if dev_id == edge.DEV_ID:
+                device.store.migrate(edge.DATA_PATH)
+            if edge.RENDER_EVERY:
+                device.plot.seed(device.store.tail(180))
+
+    tasks = [asyncio.create_task(report(sinks))]
+    tasks += [asyncio.create_task(bms_source(port, args.bms_interval, sinks[dev_id], devices[dev_id].power))
+              for dev_id, port in bms_ports]
+    if weather_ports:
+        ip = edge.start_ip_discovery() # 캐시된 ip 로 바로 시작, 조회는 별도 스레드 (기기들이 같은 host)
+        tasks += [asyncio.create_task(weather_source(port, ip, sinks[dev_id])) for dev_id, port in weather_ports]
+    await asyncio.gather(*tasks)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='weather sensor + Daly BMS acquisition daemon')
+    parser.add_argument('--weather', action='append', metavar='[DEV_ID=]PORT',
+                        help=f'weather sensor port (default {WEATHER_PORT}, device {edge.DEV_ID})')
+    parser.add_argument('--bms', action='append', metavar='[DEV_ID=]PORT',
+                        help=f'Daly BMS port (default {BMS_PORT}, device {edge.DEV_ID})')
+    parser.add_argument('--bms-interval', type=float, default=BMS_INTERVAL)
+    args = parser.parse_args()
+    args.weather = args.weather if args.weather is not None else [WEATHER_PORT]
+    args.bms = args.bms if args.bms is not None else [BMS_PORT]
+    for kind in ('weather', 'bms'):
+        try:
+            parse_ports(getattr(args, kind), kind)
+        except ValueError as e:
+            parser.error(str(e))
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0)) # 종료 시 buffer 에 남은 BMS 기록 flush (atexit)
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        print("프로그램 종료.")
@@ -0,0 +1,109 @@
+"""
+샘플 주기/시계가 다른 두 stream 의 as-of join (기상 센서 60초 vs BMS 240초 등)
+
+left 의 각 시각에 대해 그 시각 이전(같은 시각 포함)의 가장 가까운 right 샘플을 붙임.
+tolerance 초보다 오래된 샘플이면 값은 NaN. 모든 연산은 정렬된 numpy 배열 단위 (행 단위 loop 없음)
+"""
+from history import last_line
+from rollup import TZ_OFFSET
+import numpy as np
+import gzip
+import csv
+import time
+import os
+
+# BMS 일별 로그(bms_data_log_YYYY-MM-DD.csv)의 컬럼: acquisition.py 가 쓰고, 서버는 POST /api/<dev_id>/bms 로 같은 형식 저장
+BMS_COLUMNS = ['Timestamp', 'Pack Voltage', 'Pack Current', 'SOC', 'Max Cell Voltage', 'Min Cell Voltage', 'Max Temp', 'Min Temp']
+
+
+def to_epochs(values):
+    """epoch(숫자/숫자 문자열)와 '%Y-%m-%d %H:%M:%S'(local time) 문자열이 섞인 배열 -> epoch int64 배열"""
+    values = np.asarray(values)
+    if values.dtype.kind in 'iuf':
+        return values.astype(np.int64)
+    values = np.char.strip(values.astype(str))
+    numeric = np.char.isdigit(values)
+    result = np.empty(len(values), dtype=np.int64)
+    result[numeric] = values[numeric].astype(np.int64)
+    result[~numeric] = values[~numeric].astype('datetime64[s]').astype(np.int64) - TZ_OFFSET
+    return result
+
+
+def columns(rows, fields):
+    """dict 레코드 목록(history.query 등) -> {field: numpy 배열}"""
+    rows = list(rows)
+    result = {'timestamp': to_epochs([row['timestamp'] for row in rows])}
+    for field in fields:
+        result[field] = np.array([row[field] for row in rows], dtype=float)
+    return result
+
+
+def asof_indices(left, right, tolerance):
+    """정렬된 epoch 배열 left, right -> left 각 시각 이하의 가장 가까운 right 위치 (없거나 tolerance 초 초과면 -1)"""
+    left = np.asarray(left, dtype=np.int64)
+    right = np.asarray(right, dtype=np.int64)
+    idx = np.searchsorted(right, left, side='right') - 1
+    found = idx >= 0
+    found[found] = left[found] - right[idx[found]] <= tolerance
+    return np.where(found, idx, -1)
+
+
+def asof_join(left, right, tolerance, prefix=''):
+    """
+    left, right: {'timestamp': 오름차순 epoch 배열, field: 값 배열, ...}
+    -> left 의 열 + right 의 열({prefix}{field}, right 의 시각은 {prefix}timestamp), 짝이 없으면 NaN
+    """
+    idx = asof_indices(left['timestamp'], right['timestamp'], tolerance)
+    found = idx >= 0
+    result = dict(left)
+    for field, values in right.items():
+        values = np.asarray(values, dtype=float)
+        joined = np.full(len(idx), np.nan)
+        joined[found] = values[idx[found]]
+        result[prefix + field] = joined
+    return result
+
+
+def read_bms_log(directory, start, end, fields):
+    """
+    {directory}/bms_data_log_YYYY-MM-DD.csv(.gz) 에서 start ~ end 구간 -> {'timestamp': ..., field: ...}
+    (bms-sensor-data.py / acquisition.py 의 일별 파일, 서버는 utils.update_bms 가 쓴 파일, 시간 순서로 기록됨)
+    """
+    days = np.arange(np.datetime64(start + TZ_OFFSET, 's').astype('datetime64[D]'),
+                     np.datetime64(end + TZ_OFFSET, 's').astype('datetime64[D]') + 1)
+    timestamps, values = [], {field: [] for field in fields}
+    for day in days:
+        path = os.path.join(directory, f'bms_data_log_{day}.csv')
+        if os.path.exists(path):
+            f = open(path, mode='r', newline='')
+        elif os.path.exists(path + '.gz'):
+            f = gzip.open(path + '.gz', mode='rt', newline='')
+        else:
+            continue
+        with f:
+            rows = [row for row in csv.DictReader(f) if row.get('Timestamp')]
+        timestamps += [row['Timestamp'] for row in rows]
+        for field in fields:
+            values[field] += [row.get(field) or 'nan' for row in rows]
+    result = {'timestamp': to_epochs(timestamps) if timestamps else np.empty(0, dtype=np.int64)}
+    for field in fields:
+        result[field] = np.array(values[field], dtype=float)
+    keep = (result['timestamp'] >= start) & (result['timestamp'] <= end)
+    return {k: v[keep] for k, v in result.items()}
+
+
+def last_bms_timestamp(directory, end):
+    """
+    end 가 속한 날과 그 전날 BMS 로그의 마지막 Timestamp (없으면 '') -> plot.png cache key
+    BMS 가 기상 레코드보다 늦게 올라와도 (edge outbox) 측정 전력이 붙은 그림을 다시 그리도록
+    """
+    latest = ''
+    for day in (end - 86400, end):
+        path = os.path.join(directory, f"bms_data_log_{time.strftime('%Y-%m-%d', time.gmtime(day + TZ_OFFSET))}.csv")
+        try:
+            timestamp = last_line(path).split(',', 1)[0]
+        except FileNotFoundError: # 없는 날 / 이미 압축된 날 (.gz 는 더 바뀌지 않음)
+            continue
+        if timestamp != BMS_COLUMNS[0]:
+            latest = max(latest, timestamp)
+    return latest
@@ -0,0 +1,71 @@
+"""
+binary record(binstore) vs CSV 벤치마크: 파일 크기, append 비용, 시간 범위 읽기
+
+    python bench/bench_binstore.py [rows]
+"""
+from datetime import datetime
+import tempfile
+import timeit
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from binstore import BinaryStore
+from history import query
+import utils
+
+
+def record(i, t0):
+    return {'timestamp': t0 + i * 60, 'ip': '58.72.215.20', 'temp': 20.0 + i % 100 / 10,
+            'humidity': 24.8, 'ws': 1.5, 'wd': i % 360, 'north_direction': 195.9,
+            'atmospheric_pressure': 1025.3, 'rainfall': 0.0, 'voltage': 12.3}
+
+
+def best(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1440 * 31
+    os.chdir(tempfile.mkdtemp())
+    utils.pool.fsync = 'none'
+    t0 = int(datetime.now().replace(day=1, hour=0, minute=0, second=0).timestamp())
+    records = [record(i, t0) for i in range(rows)]
+    yyyy_mm = datetime.now().strftime('%Y-%m')
+    csv_path = f'sensor_data/{yyyy_mm}/dev_bench.csv'
+    store = BinaryStore(utils.pool)
+
+    for i in range(0, rows, 1000):
+        chunk = records[i:i + 1000]
+        utils.update_batch('dev_bench', chunk)
+        store.append('dev_bench', chunk)
+    csv_size, bin_size = os.path.getsize(csv_path), os.path.getsize(store.path('dev_bench'))
+    print(f'rows {rows}: csv {csv_size / 2**20:.2f} MB, binary {bin_size / 2**20:.2f} MB '
+          f'({bin_size / csv_size:.0%})')
+
+    # append one record (csv line via WriterPool vs packed binary record)
+    data = record(rows, t0)
+    line = ','.join(map(str, data.values())) + '\n'
+    t_csv = best(lambda: utils.pool.append('dev_append', 'append/dev_append.csv', line, header=utils.HEADER), 2000)
+    t_bin = best(lambda: store.append('dev_append', [data]), 2000)
+    print(f'append 1 record: csv {t_csv * 1e6:.1f} us, binary {t_bin * 1e6:.1f} us')
+
+    # range read: 6 hours from the middle of the month, temp column
+    start = t0 + rows // 2 * 60
+    end = start + 6 * 3600
+    def csv_range():
+        return [row['temp'] for row in query(utils.index, 'dev_bench', start, end, ['timestamp', 'temp'])]
+    def bin_range():
+        return store.read('dev_bench', start, end)['temp']
+    assert len(csv_range()) == len(bin_range()) == 361
+    print(f'6h range read:   csv+index {best(csv_range, 50) * 1e3:.2f} ms, binary memmap {best(bin_range, 500) * 1e3:.3f} ms')
+    try:
+        import pandas as pd
+        def pandas_range():
+            frame = pd.read_csv(csv_path)
+            return frame[(frame.timestamp >= start) & (frame.timestamp <= end)]['temp'].values
+        print(f'                 pandas full read {best(pandas_range, 3) * 1e3:.1f} ms')
+    except ImportError:
+        pass
+    full = best(lambda: store.read('dev_bench')['temp'].mean(), 100)
+    print(f'full column mean: binary {full * 1e3:.2f} ms')
@@ -0,0 +1,131 @@
+"""
+Daly BMS 프레임 인코딩/디코딩 벤치마크: 기존 DalyBMSUART (list tx_buffer + sum + bytearray + print)
+와 daly_protocol (미리 만든 요청 프레임 + 미리 할당한 수신 버퍼 + struct) 의 초당 프레임 수 비교
+
+    python bench/bench_daly_protocol.py [frames]
+"""
+import contextlib
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from daly_protocol import COMMAND, REQUEST, ResponseBuffer, burst, calculate_checksum
+from daly_protocol import decode_pack_measurements, decode_min_max_cell_voltage, decode_pack_temperature
+
+SNAPSHOT = ('VOUT_IOUT_SOC', 'MIN_MAX_CELL_VOLTAGE', 'MIN_MAX_TEMPERATURE')
+
+
+def response(cmd_id, data):
+    frame = bytes([0xA5, 0x01, cmd_id, 0x08] + data)
+    return frame + bytes([calculate_checksum(frame)])
+
+
+RESPONSES = (response(0x90, [0, 132, 0, 0, 0x75, 0x30, 0x03, 0x20])
+             + response(0x91, [0x0C, 0xE4, 1, 0x0C, 0xD0, 3, 0, 0])
+             + response(0x92, [65, 1, 62, 2, 0, 0, 0, 0]))
+
+
+class FakeSerial:
+    """write 는 버리고, read/readinto 는 항상 같은 응답 (0x90 ~ 0x92)"""
+
+    def write(self, data):
+        return len(data)
+
+    def read(self, n):
+        return RESPONSES[:n]
+
+    def readinto(self, b):
+        n = min(len(b), len(RESPONSES))
+        b[:n] = RESPONSES[:n]
+        return n
+
+
+class LegacyDalyBMSUART:
+    """bms-sensor-data.py 의 원래 전송/수신 코드 (sleep 제외)"""
+    XFER_BUFFER_LENGTH = 13
+
+    def __init__(self, device):
+        self.serial = device
+        self.tx_buffer = [0] * 13
+        self.rx_buffer = [0] * 13
+        self.tx_buffer[0] = 0xA5
+        self.tx_buffer[1] = 0x40
+        self.tx_buffer[3] = 0x08
+
+    def send_command(self, cmd_id):
+        self.tx_buffer[2] = cmd_id
+        self.tx_buffer[12] = sum(self.tx_buffer[:12]) & 0xFF
+        self.serial.write(bytearray(self.tx_buffer))
+        print(f"Sent: {self.tx_buffer}")
+
+    def receive_data(self, offset):
+        self.rx_buffer = RESPONSES[offset:offset + 13]
+        print(f"Received: {self.rx_buffer}")
+        if sum(self.rx_buffer[:12]) & 0xFF == self.rx_buffer[12]:
+            return self.rx_buffer
+        return None
+
+    def snapshot(self):
+        self.send_command(0x90)
+        data = self.receive_data(0)
+        row = [((data[4] << 8) | data[5]) / 10.0, (((data[8] << 8) | data[9]) - 30000) / 10.0,
+               ((data[10] << 8) | data[11]) / 10.0]
+        self.send_command(0x91)
+        data = self.receive_data(13)
+        row += [(data[4] << 8) | data[5], (data[7] << 8) | data[8]]
+        self.send_command(0x92)
+        data = self.receive_data(26)
+        row += [data[4] - 40, data[6] - 40]
+        return row
+
+
+def bench_legacy(n):
+    bms = LegacyDalyBMSUART(FakeSerial())
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        started = time.perf_counter()
+        for _ in range(n):
+            row = bms.snapshot()
+    return time.perf_counter() - started, row
+
+
+def bench_protocol(n):
+    device = FakeSerial()
+    rx = ResponseBuffer()
+    decoders = {COMMAND['VOUT_IOUT_SOC']: decode_pack_measurements,
+                COMMAND['MIN_MAX_CELL_VOLTAGE']: decode_min_max_cell_voltage,
+                COMMAND['MIN_MAX_TEMPERATURE']: decode_pack_temperature}
+    started = time.perf_counter()
+    for _ in range(n):
+        device.write(burst(SNAPSHOT))
+        rx.read(device, 3)
+        row = []
+        for frame in rx.frames():
+            row += decoders[frame[2]](frame)
+    return time.perf_counter() - started, row
+
+
+def bench_encode(n):
+    legacy = LegacyDalyBMSUART(FakeSerial())
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        started = time.perf_counter()
+        for _ in range(n):
+            legacy.send_command(0x90)
+        legacy_time = time.perf_counter() - started
+    device = FakeSerial()
+    started = time.perf_counter()
+    for _ in range(n):
+        device.write(REQUEST[0x90])
+    return legacy_time, time.perf_counter() - started
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    legacy_encode, protocol_encode = bench_encode(n)
+    print(f"encode   legacy  : {n / legacy_encode:12,.0f} frames/s")
+    print(f"encode   protocol: {n / protocol_encode:12,.0f} frames/s")
+    legacy_time, legacy_row = bench_legacy(n)
+    protocol_time, protocol_row = bench_protocol(n)
+    assert [float(v) for v in legacy_row] == [float(v) for v in protocol_row], (legacy_row, protocol_row)
+    print(f"snapshot legacy  : {3 * n / legacy_time:12,.0f} frames/s (encode + decode, 3 commands)")
+    print(f"snapshot protocol: {3 * n / protocol_time:12,.0f} frames/s (encode + decode, 3 commands)")
@@ -0,0 +1,122 @@
+"""
+FrameDecoder 벤치마크: 잡음(임의 byte, 잘린 프레임, 떠도는 '$')이 섞인 기록 stream 에서
+기존 재귀 parse() 와 처리량/복구한 프레임 수 비교
+
+    python bench/bench_decoder.py [frames] [noise_ratio]
+"""
+from datetime import datetime
+import random
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_decoder import FrameDecoder
+
+FIELDS = [('temp', 1, 6, float), ('humidity', 6, 11, float), ('ws', 11, 15, float), ('wd', 15, 18, int),
+          ('north_direction', 18, 23, float), ('atmospheric_pressure', 23, 29, float),
+          ('rainfall', 29, 36, float), ('voltage', 36, 40, float)]
+
+
+def make_frame():
+    body = (f'${random.uniform(0, 40):05.1f}{random.uniform(0, 99):05.1f}{random.uniform(0, 20):04.1f}'
+            f'{random.randint(0, 359):03d}{random.uniform(0, 360):05.1f}{random.uniform(950, 1050):06.1f}'
+            f'{random.uniform(0, 100):07.1f}{random.uniform(11, 14):04.1f}')
+    return (body + '*\r\n').encode()
+
+
+def make_stream(frames, noise):
+    random.seed(0)
+    parts = []
+    for _ in range(frames):
+        r = random.random()
+        if r < noise / 3:
+            parts.append(bytes(random.randrange(256) for _ in range(random.randint(1, 20)))) # garbage
+        elif r < noise * 2 / 3:
+            parts.append(make_frame()[:random.randint(5, 35)]) # truncated frame
+        elif r < noise:
+            parts.append(b'$' + bytes(random.randrange(48, 58) for _ in range(3))) # stray '$'
+        parts.append(make_frame())
+    return b''.join(parts)
+
+
+class FakeDevice:
+    def __init__(self, stream, chunk):
+        self.stream = stream
+        self.pos = 0
+        self.chunk = chunk
+
+    @property
+    def in_waiting(self):
+        return min(self.chunk, len(self.stream) - self.pos)
+
+    def read(self, n):
+        data = self.stream[self.pos:self.pos + n]
+        self.pos += len(data)
+        if not data:
+            raise EOFError
+        return data
+
+
+# parsing_sensor.parse before FrameDecoder, kept here as the reference implementation
+def legacy_parse(device, ip):
+    ret = device.read(43).decode()
+    if len(ret) and ret.startswith('$'):
+        try:
+            data = {
+                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'ip': ip,
+                'temp': float(ret[1:6]),
+                'humidity': float(ret[6:11]),
+                'ws': float(ret[11:15]),
+                'wd': int(ret[15:18]),
+                'north_direction': float(ret[18:23]),
+                'atmospheric_pressure': float(ret[23:29]),
+                'rainfall': float(ret[29:36]),
+                'voltage': float(ret[36:40])
+            }
+        except IndexError:
+            data = legacy_parse(device, ip)
+    else:
+        data = legacy_parse(device, ip)
+    return data
+
+
+def run_legacy(stream):
+    device = FakeDevice(stream, 43)
+    count = errors = 0
+    while True:
+        try:
+            legacy_parse(device, '0.0.0.0')
+            count += 1
+        except EOFError:
+            return count, errors
+        except Exception: # main loop: except: time.sleep(3); continue
+            errors += 1
+
+
+def run_decoder(stream, chunk):
+    device = FakeDevice(stream, chunk)
+    decoder = FrameDecoder(FIELDS)
+    count = 0
+    while True:
+        try:
+            count += len(decoder.feed(device.read(device.in_waiting or 1)))
+        except EOFError:
+            return count, decoder.errors
+
+
+if __name__ == '__main__':
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    noise = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    stream = make_stream(frames, noise)
+    print(f'{frames} frames, noise {noise:.0%}, {len(stream) / 2**20:.1f} MB')
+    sys.setrecursionlimit(100000)
+    for name, fn in [('legacy parse', run_legacy),
+                     ('decoder 43B', lambda s: run_decoder(s, 43)),
+                     ('decoder 4KB', lambda s: run_decoder(s, 4096))]:
+        t0 = time.perf_counter()
+        count, errors = fn(stream)
+        elapsed = time.perf_counter() - t0
+        print(f'{name:13s} {count / elapsed:10.0f} frames/s  {len(stream) / elapsed / 2**20:6.1f} MB/s  '
+              f'recovered {count}/{frames}  errors {errors}')
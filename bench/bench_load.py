@@ -0,0 +1,135 @@
+"""
+서버 부하 테스트: GET(최신값) / POST(단건) / POST(batch) 를 섞어서 보내고 초당 요청 수와 p50/p99 latency 출력
+
+    python bench/bench_load.py --spawn flask      # 임시 디렉터리에서 server.py (개발 서버) 실행 후 측정
+    python bench/bench_load.py --spawn gunicorn   # gunicorn.conf.py (multi worker + ingest_writer)
+    python bench/bench_load.py --url http://127.0.0.1:4465   # 이미 떠 있는 서버
+
+--mix get,post,batch 비율 (기본 70,25,5), --devices 기기 수, --concurrency 동시 연결 수
+"""
+from urllib.parse import urlsplit
+import http.client
+import subprocess
+import threading
+import argparse
+import tempfile
+import random
+import shutil
+import orjson
+import time
+import sys
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 4465
+
+
+def record(ts):
+    return {'timestamp': ts, 'ip': '58.72.215.20', 'temp': round(random.uniform(0, 30), 1), 'humidity': 40.0,
+            'ws': round(random.uniform(0, 10), 1), 'wd': random.randint(0, 359), 'north_direction': 195.9,
+            'atmospheric_pressure': 1013.2, 'rainfall': 0.0, 'voltage': 12.3}
+
+
+def spawn(kind, workdir):
+    for name in os.listdir(ROOT):
+        if name.endswith('.py'):
+            shutil.copy(os.path.join(ROOT, name), workdir)
+    if kind == 'gunicorn':
+        cmd = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{PORT}',
+               '--log-level', 'warning', 'wsgi:application']
+    else:
+        cmd = [sys.executable, 'server.py']
+    proc = subprocess.Popen(cmd, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            http.client.HTTPConnection('127.0.0.1', PORT, timeout=1).request('GET', '/')
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f'{kind} server did not start')
+
+
+def worker(url, devices, mix, stop, results):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    kinds = random.choices(['get', 'post', 'batch'], weights=mix, k=10000)
+    i = 0
+    while not stop.is_set():
+        kind = kinds[i % len(kinds)]
+        i += 1
+        dev_id = f'dev_{random.randrange(devices):02d}'
+        path = f'/api/{dev_id}'
+        if kind == 'get':
+            body = orjson.dumps({'dev_id': dev_id}) # GET 도 JSON body 가 있어야 응답함
+        elif kind == 'post':
+            body = orjson.dumps(record(int(time.time())))
+        else:
+            path += '/batch'
+            now = int(time.time())
+            body = orjson.dumps([record(now - 60 * k) for k in range(10, 0, -1)])
+        method = 'GET' if kind == 'get' else 'POST'
+        started = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+            resp = conn.getresponse()
+            resp.read()
+            ok = resp.status in (200, 404) if kind == 'get' else resp.status == 200
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            ok = False
+        results.append((kind, time.perf_counter() - started, ok))
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else float('nan')
+
+
+def run(url, duration, concurrency, devices, mix):
+    stop = threading.Event()
+    results = []
+    threads = [threading.Thread(target=worker, args=(url, devices, mix, stop, results), daemon=True)
+               for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    print(f"{'kind':<6} {'requests':>9} {'errors':>7} {'rps':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for kind in ('get', 'post', 'batch', 'all'):
+        rows = [r for r in results if kind == 'all' or r[0] == kind]
+        latencies = [r[1] * 1000 for r in rows]
+        errors = sum(1 for r in rows if not r[2])
+        print(f"{kind:<6} {len(rows):>9} {errors:>7} {len(rows) / duration:>8.0f} "
+              f"{percentile(latencies, 50):>8.1f} {percentile(latencies, 99):>8.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='mixed GET/POST load test')
+    parser.add_argument('--url', default=f'http://127.0.0.1:{PORT}')
+    parser.add_argument('--spawn', choices=['flask', 'gunicorn'])
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--devices', type=int, default=20)
+    parser.add_argument('--mix', default='70,25,5', help='get,post,batch weights')
+    args = parser.parse_args()
+    mix = [float(w) for w in args.mix.split(',')]
+    proc = None
+    if args.spawn:
+        workdir = tempfile.mkdtemp()
+        proc = spawn(args.spawn, workdir)
+        # 최신값 GET 이 404 만 받지 않도록 기기마다 한 건씩
+        for n in range(args.devices):
+            conn = http.client.HTTPConnection('127.0.0.1', PORT)
+            conn.request('POST', f'/api/dev_{n:02d}', body=orjson.dumps(record(int(time.time()))),
+                         headers={'Content-Type': 'application/json'})
+            conn.getresponse().read()
+    try:
+        run(args.url, args.duration, args.concurrency, args.devices, mix)
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
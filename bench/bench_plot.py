@@ -0,0 +1,159 @@
+"""
+make_plot 벤치마크: 기존 방식(전체 CSV 읽기 + 매번 figure 재생성) vs LivePlot(링 버퍼 + set_ydata)
+
+    python bench/bench_plot.py [rows] [updates]
+
+각 모드는 별도 프로세스에서 실행하여 peak RSS 를 비교한다.
+"""
+from datetime import datetime, timedelta
+import subprocess
+import tracemalloc
+import resource
+import tempfile
+import random
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+COLUMNS = ['timestamp', 'ip', 'temp', 'humidity', 'ws', 'wd', 'north_direction', 'atmospheric_pressure', 'rainfall', 'voltage']
+
+
+def sample(ts):
+    return {
+        'timestamp': ts.strftime('%Y-%m-%d %H:%M:%S'), 'ip': '58.72.215.20',
+        'temp': round(random.uniform(20, 30), 1), 'humidity': round(random.uniform(20, 40), 1),
+        'ws': round(random.uniform(0, 5), 1), 'wd': random.randint(0, 359),
+        'north_direction': round(random.uniform(0, 360), 1), 'atmospheric_pressure': round(random.uniform(1010, 1020), 1),
+        'rainfall': 0.0, 'voltage': 12.3,
+    }
+
+
+def make_csv(path, rows):
+    start = datetime(2024, 1, 1)
+    with open(path, mode='w') as f:
+        f.write(','.join(COLUMNS) + '\n')
+        for i in range(rows):
+            f.write(','.join(str(v) for v in sample(start + timedelta(minutes=i)).values()) + '\n')
+
+
+from matplotlib.gridspec import GridSpec
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+
+
+# parsing_sensor.make_plot (before LivePlot), kept here as the reference implementation
+def legacy_make_plot(DATA_PATH, Save_path):
+    data = pd.read_csv(DATA_PATH)
+    if len(data) > 180:
+        data = data[-180:]
+    gs = GridSpec(3, 3)
+    plt.rcParams['figure.figsize'] = [18, 12]
+    fontdict = {'fontsize': 16, 'fontweight': 'bold'}
+    _xticks = list(range(0, 181, 20))
+    _xlim = [-10, 190]
+    time = datetime.now().strftime("%Y-%m-%d %H:%M")
+    plt.suptitle(f'Last Update: {time}', fontweight='bold', fontsize=24)
+
+    temp = data['temp'].values
+    plt.subplot(gs[0, 0])
+    plt.title("Temperature ('C)", fontdict=fontdict)
+    plt.xlim(_xlim)
+    plt.xticks(_xticks)
+    plt.plot(temp, color='C3')
+
+    humidity = data['humidity'].values
+    plt.subplot(gs[0, 1])
+    plt.title("Humidity (%)", fontdict=fontdict)
+    plt.xlim(_xlim)
+    plt.xticks(_xticks)
+    plt.plot(humidity, color='C0')
+
+    ws = data['ws'].values
+    plt.subplot(gs[0, 2])
+    plt.title("Wind Speed (m/s)", fontdict=fontdict)
+    plt.xlim(_xlim)
+    plt.xticks(_xticks)
+    plt.plot(ws, color='C1')
+
+    wd = data['wd'].values
+    plt.subplot(gs[1, 0])
+    plt.title("Wind Direction", fontdict=fontdict)
+    plt.xlim(_xlim)
+    plt.xticks(_xticks)
+    plt.plot(wd, color='C2')
+
+    hpa = data['atmospheric_pressure'].values
+    plt.subplot(gs[1, 1])
+    plt.title("Atmospheric Pressure (hPa)", fontdict=fontdict)
+    plt.xlim(_xlim)
+    plt.xticks(_xticks)
+    plt.plot(hpa, color='C4')
+
+    rainfall = data['rainfall'].values
+    plt.subplot(gs[1, 2])
+    plt.title("Rainfall (mm)", fontdict=fontdict)
+    plt.xlim(_xlim)
+    plt.xticks(_xticks)
+    rainfall_min, rainfall_max = rainfall.min(), rainfall.max()
+    space = (rainfall_max - rainfall_min + 1e-2) / 20
+    rainfall_ylim = [rainfall_min - space, rainfall_max + space]
+    plt.ylim(rainfall_ylim)
+    plt.plot(rainfall, color='C9')
+
+    power_generation = data['ws'].values * 20
+    plt.subplot(gs[2, :])
+    plt.title("Power Generation (Wh)", fontdict=fontdict)
+    plt.xlim(_xlim)
+    plt.xticks(_xticks)
+    plt.plot(power_generation, color='r')
+
+    plt.subplots_adjust(wspace=0.3, hspace=0.3)
+    plt.savefig(Save_path, dpi=150, format='png')
+    return
+
+
+def run(mode, rows, updates):
+    tmp = tempfile.mkdtemp()
+    data_path = os.path.join(tmp, 'dev_bench.csv')
+    save_path = os.path.join(tmp, 'dev_bench.png')
+    make_csv(data_path, rows)
+    ts = datetime(2025, 1, 1)
+
+    tracemalloc.start()
+    if mode == 'legacy':
+        def step(data):
+            with open(data_path, mode='a') as f:
+                f.write(','.join(str(v) for v in data.values()) + '\n')
+            legacy_make_plot(data_path, save_path)
+    else:
+        from live_plot import LivePlot
+        plot = LivePlot(save_path, render_every=int(mode.split('-')[1]))
+        step = plot.update
+
+    elapsed = []
+    for i in range(updates):
+        data = sample(ts + timedelta(minutes=i))
+        t0 = time.perf_counter()
+        step(data)
+        elapsed.append(time.perf_counter() - t0)
+    peak = tracemalloc.get_traced_memory()[1]
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss # KB on linux
+    elapsed.sort()
+    print(f'{mode:10s} mean {sum(elapsed) / updates * 1e3:8.1f} ms  '
+          f'p50 {elapsed[updates // 2] * 1e3:8.1f} ms  '
+          f'py-peak {peak / 2**20:7.1f} MB  maxrss {rss / 1024:7.1f} MB')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4: # child process: mode rows updates
+        run(sys.argv[1], int(sys.argv[2]), int(sys.argv[3]))
+        sys.exit()
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1440 * 30
+    updates = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print(f'history rows: {rows}, updates: {updates}')
+    for mode in ('legacy', 'live-1', 'live-10'):
+        subprocess.run([sys.executable, os.path.abspath(__file__), mode, str(rows), str(updates)], check=True)
@@ -0,0 +1,52 @@
+"""
+read_data 벤치마크: 기존 readlines() 방식 vs 캐시(warm) vs 파일 끝 역방향 읽기(cold, 재시작 직후)
+
+    python bench/bench_read_data.py
+"""
+from datetime import datetime
+import tempfile
+import timeit
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import orjson
+import utils
+
+ROWS = [100, 1440, 1440 * 10, 1440 * 31] # 한 달 최대 약 44k 줄
+LINE = '1700000000,58.72.215.20,22.0,24.8,0.0,139,195.9,1025.3,0.0,12.3\n'
+
+
+# utils.read_data before the latest-record cache, kept as the reference implementation
+def legacy_read_data(dev_id):
+    yyyy_mm = datetime.now().strftime('%Y-%m')
+    data_path = f'sensor_data/{yyyy_mm}/{dev_id}.csv'
+    with open(data_path, mode='r') as f:
+        lines = f.readlines()
+    values = lines[-1].strip().split(',')
+    data = {}
+    for key, value in zip(utils.KEYS, values):
+        data[key] = value
+    return orjson.dumps(data)
+
+
+def cold_read_data(dev_id):
+    utils._latest.clear()
+    return utils.read_data(dev_id)
+
+
+if __name__ == '__main__':
+    os.chdir(tempfile.mkdtemp())
+    yyyy_mm = datetime.now().strftime('%Y-%m')
+    os.makedirs(f'sensor_data/{yyyy_mm}')
+    print(f"{'rows':>8s} {'legacy':>12s} {'cold':>12s} {'cached':>12s}")
+    for rows in ROWS:
+        dev_id = f'dev_{rows}'
+        with open(f'sensor_data/{yyyy_mm}/{dev_id}.csv', mode='w') as f:
+            f.write(','.join(utils.KEYS) + '\n' + LINE * rows)
+        assert legacy_read_data(dev_id) == cold_read_data(dev_id) == utils.read_data(dev_id)
+        result = []
+        for fn in (legacy_read_data, cold_read_data, utils.read_data):
+            number = 20 if fn is legacy_read_data else 2000
+            result.append(min(timeit.repeat(lambda: fn(dev_id), number=number, repeat=3)) / number)
+        print(f'{rows:8d} ' + ' '.join(f'{t * 1e6:9.1f} us' for t in result))
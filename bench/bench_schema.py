@@ -0,0 +1,82 @@
+"""
+레코드 검증 벤치마크: 기존 check_data / check_batch (레코드마다 Python loop) vs schema.Schema
+
+    python bench/bench_schema.py
+
+기존 코드는 timestamp 로 int 만 받으므로 기존 쪽은 epoch timestamp 레코드로, Schema 는 epoch / 문자열 둘 다 측정
+"""
+from operator import itemgetter
+import timeit
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from schema import Schema
+
+KEYS = ['timestamp', 'ip', 'temp', 'humidity', 'ws', 'wd',
+        'north_direction', 'atmospheric_pressure', 'rainfall', 'voltage']
+TYPES = [int, str, float, float, float, int, float, float, float, float]
+TYPE_TUPLE = tuple(TYPES)
+KEY_SET = frozenset(KEYS)
+get_values = itemgetter(*KEYS)
+SCHEMA = Schema(KEYS, TYPES)
+
+
+def legacy_check_data(dev_id, data):
+    if list(data.keys()) != KEYS or not dev_id.startswith('dev_'):
+        return False
+    else:
+        for k, t in zip(KEYS, TYPES):
+            if type(data[k]) is not t:
+                return False
+        return True
+
+
+def legacy_check_batch(dev_id, records):
+    if not dev_id.startswith('dev_'):
+        return [], [{'index': i, 'reason': 'dev_id'} for i in range(len(records))]
+    valid, rejected = [], []
+    for i, data in enumerate(records):
+        if not isinstance(data, dict):
+            rejected.append({'index': i, 'reason': 'not a json object'})
+        elif data.keys() != KEY_SET:
+            rejected.append({'index': i, 'reason': 'keys'})
+        else:
+            types = tuple(map(type, get_values(data)))
+            if types == TYPE_TUPLE:
+                valid.append(data)
+            else:
+                fields = [k for k, t, expected in zip(KEYS, types, TYPES) if t is not expected]
+                rejected.append({'index': i, 'reason': 'type: ' + ','.join(fields)})
+    return valid, rejected
+
+
+def record(i, timestamp):
+    return {'timestamp': timestamp, 'ip': '58.72.215.20', 'temp': 22.0 + i % 10, 'humidity': 24.8, 'ws': 0.5,
+            'wd': 139, 'north_direction': 195.9, 'atmospheric_pressure': 1025.3, 'rainfall': 0.0, 'voltage': 12.3}
+
+
+def bench(label, fn, number):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"{label:<40} {seconds * 1e6:10.1f} us")
+
+
+if __name__ == '__main__':
+    epoch = [record(i, 1700000000 + 60 * i) for i in range(10000)]
+    text = [record(i, f'2023-11-{15 + i // 1440:02d} {i // 60 % 24:02d}:{i % 60:02d}:00') for i in range(10000)]
+    bad = [dict(r, ws='0.5') if i % 100 == 0 else r for i, r in enumerate(epoch)]
+    assert len(SCHEMA.validate_batch('dev_02', text)[0]) == 10000
+    assert len(SCHEMA.validate_batch('dev_02', bad)[1]) == 100
+
+    print("single record")
+    bench("  legacy check_data (epoch)", lambda: legacy_check_data('dev_02', epoch[0]), 20000)
+    bench("  Schema.validate (epoch)", lambda: SCHEMA.validate('dev_02', epoch[0]), 20000)
+    bench("  Schema.validate (string)", lambda: SCHEMA.validate('dev_02', text[0]), 20000)
+    bench("  Schema.validate_batch x1 (string)", lambda: SCHEMA.validate_batch('dev_02', text[:1]), 20000)
+    print("10k record batch")
+    bench("  legacy check_batch (epoch)", lambda: legacy_check_batch('dev_02', epoch), 10)
+    bench("  legacy check_data loop (epoch)", lambda: [legacy_check_data('dev_02', r) for r in epoch], 10)
+    bench("  Schema.validate loop (string)", lambda: [SCHEMA.validate('dev_02', r) for r in text], 10)
+    bench("  Schema.validate_batch (epoch)", lambda: SCHEMA.validate_batch('dev_02', epoch), 10)
+    bench("  Schema.validate_batch (string)", lambda: SCHEMA.validate_batch('dev_02', text), 10)
+    bench("  Schema.validate_batch (1% bad)", lambda: SCHEMA.validate_batch('dev_02', bad), 10)
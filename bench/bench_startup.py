@@ -0,0 +1,116 @@
+"""
+edge 시작 시간 벤치마크: parsing_sensor import 시간(-X importtime) + 첫 레코드까지 걸린 시간
+
+    python bench/bench_startup.py [--runs 5] [--interval 0.5]
+
+임시 디렉터리에 *.py 를 복사해서 실행하고, 기상 센서는 fake_serial.py 의 pty 를 SENSOR_PORT 로 사용.
+첫 레코드 시간은 프로세스 생성부터 측정 (interpreter 시작 + import + initialize() + 첫 parse()),
+fake 센서는 --interval 초마다 프레임을 보내므로 parse 단계에는 최대 interval 만큼의 대기가 포함됨
+"""
+import subprocess
+import statistics
+import argparse
+import tempfile
+import shutil
+import json
+import time
+import sys
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('matplotlib', 'pandas', 'requests')
+
+FIRST_RECORD = """
+import time, json, sys
+started = time.perf_counter()
+import parsing_sensor as edge
+imported = time.perf_counter()
+edge.SENSOR_PORT = sys.argv[1]
+device, ip = edge.initialize()
+initialized = time.perf_counter()
+data = edge.parse(device, ip)
+parsed = time.perf_counter()
+heavy = [m for m in %r if m in sys.modules]
+print(json.dumps({'import': imported - started, 'initialize': initialized - imported,
+                  'parse': parsed - initialized, 'heavy': heavy}), flush=True)
+""" % (HEAVY,)
+
+
+def copy_tree(workdir):
+    for name in os.listdir(ROOT):
+        if name.endswith('.py'):
+            shutil.copy(os.path.join(ROOT, name), workdir)
+
+
+def import_times(workdir):
+    # -X importtime 출력 중 parsing_sensor 아래에서 import 된 모듈 -> {module: (self us, cumulative us, depth)}
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import parsing_sensor'],
+                          cwd=workdir, capture_output=True, text=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0 and name.strip() != 'parsing_sensor': # site 등 interpreter 시작 시 import
+            times.clear()
+            continue
+        times[name.strip()] = (int(own), int(cumulative), depth)
+    return times
+
+
+def first_record(workdir, port):
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, '-c', FIRST_RECORD, port], cwd=workdir,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    for line in proc.stdout:
+        if line.startswith('{'):
+            elapsed = time.perf_counter() - started
+            break
+    else:
+        raise RuntimeError('no record')
+    proc.kill()
+    proc.wait()
+    result = json.loads(line)
+    result['total'] = elapsed
+    return result
+
+
+def start_fake_sensor(workdir, interval):
+    proc = subprocess.Popen([sys.executable, 'fake_serial.py', '--interval', str(interval)], cwd=workdir,
+                            stdout=subprocess.PIPE, text=True)
+    port = proc.stdout.readline().split(':', 1)[1].strip()
+    proc.stdout.readline()
+    return proc, port
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='parsing_sensor startup time')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--interval', type=float, default=0.5, help='fake weather frame interval (sec)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    copy_tree(workdir)
+    try:
+        times = import_times(workdir)
+        print(f"import parsing_sensor: {times['parsing_sensor'][1] / 1000:.1f} ms (-X importtime, cumulative)")
+        top = sorted(((cum, own, name) for name, (own, cum, depth) in times.items() if depth == 1), reverse=True)
+        for cum, own, name in top[:8]:
+            print(f"  {name:<28} {cum / 1000:8.1f} ms")
+        print(f"  heavy modules imported: {[m for m in HEAVY if m in times] or 'none'}")
+
+        sensor, port = start_fake_sensor(workdir, args.interval)
+        try:
+            runs = [first_record(workdir, port) for _ in range(args.runs)]
+        finally:
+            sensor.kill()
+            sensor.wait()
+        print(f"\ntime to first record ({args.runs} runs, fake sensor every {args.interval} s)")
+        print(f"{'phase':<12} {'median ms':>10} {'max ms':>10}")
+        for phase in ('import', 'initialize', 'parse', 'total'):
+            values = [r[phase] * 1000 for r in runs]
+            print(f"{phase:<12} {statistics.median(values):>10.1f} {max(values):>10.1f}")
+        print(f"heavy modules loaded before the first record (any thread): {runs[-1]['heavy'] or 'none'}")
+    finally:
+        shutil.rmtree(workdir)
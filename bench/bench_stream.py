@@ -0,0 +1,87 @@
+"""
+/api/<dev_id>/stream 지연 시간: POST 로 레코드를 보낸 시각부터 SSE 구독자가 받은 시각까지 (p50/p99)
+
+    python bench/bench_stream.py --spawn flask|gunicorn [--subscribers 4] [--rate 20] [--duration 10]
+    python bench/bench_stream.py --url http://127.0.0.1:4465
+
+레코드마다 timestamp 를 일련번호로 보내서 보낸 시각과 짝을 맞춤
+"""
+from urllib.parse import urlsplit
+import http.client
+import threading
+import argparse
+import tempfile
+import orjson
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_load import PORT, record, spawn, percentile
+
+DEV_ID = 'dev_90'
+BASE = 1700000000
+
+
+def subscriber(url, ready, stop, sent, latencies):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    conn.request('GET', f'/api/{DEV_ID}/stream')
+    resp = conn.getresponse()
+    assert resp.status == 200, resp.status
+    ready.release()
+    while not stop.is_set():
+        line = resp.fp.readline()
+        if not line:
+            break
+        if line.startswith(b'data: '):
+            received = time.perf_counter()
+            seq = orjson.loads(line[6:])['timestamp'] - BASE
+            latencies.append(received - sent[seq])
+    conn.close()
+
+
+def run(url, subscribers, rate, duration):
+    stop = threading.Event()
+    ready = threading.Semaphore(0)
+    sent, latencies = {}, []
+    threads = [threading.Thread(target=subscriber, args=(url, ready, stop, sent, latencies), daemon=True)
+               for _ in range(subscribers)]
+    for t in threads:
+        t.start()
+    for _ in threads:
+        ready.acquire()
+    time.sleep(0.5) # 구독 등록 (hub / writer 중계) 대기
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    count = int(rate * duration)
+    started = time.perf_counter()
+    for seq in range(count):
+        time.sleep(max(0, started + seq / rate - time.perf_counter()))
+        sent[seq] = time.perf_counter()
+        conn.request('POST', f'/api/{DEV_ID}', body=orjson.dumps(record(BASE + seq)),
+                     headers={'Content-Type': 'application/json'})
+        conn.getresponse().read()
+    time.sleep(1)
+    stop.set()
+    values = [v * 1000 for v in latencies]
+    print(f"{count} records x {subscribers} subscribers: received {len(values)} / {count * subscribers}")
+    print(f"latency p50 {percentile(values, 50):.1f} ms, p99 {percentile(values, 99):.1f} ms, "
+          f"max {max(values, default=float('nan')):.1f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SSE end-to-end latency')
+    parser.add_argument('--url', default=f'http://127.0.0.1:{PORT}')
+    parser.add_argument('--spawn', choices=['flask', 'gunicorn'])
+    parser.add_argument('--subscribers', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=20, help='records per second')
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+    proc = spawn(args.spawn, tempfile.mkdtemp()) if args.spawn else None
+    try:
+        run(args.url, args.subscribers, args.rate, args.duration)
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
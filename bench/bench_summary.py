@@ -0,0 +1,64 @@
+"""
+업로드 크기 비교: raw (레코드마다 POST, JSON) vs edge 집계 모드 (edge_summary, window / 형식 / gzip 별)
+
+    python bench/bench_summary.py [days]
+
+하루 1440 샘플 (AT+AutoSend=60) 기준, body bytes 와 요청 수. HTTP header 는 요청마다 약 250 bytes 가 더 붙음
+"""
+from datetime import datetime, timedelta
+import random
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from edge_summary import WindowAggregator, encode_summaries, msgpack
+from history import to_epoch
+
+FIELDS = ['temp', 'humidity', 'ws', 'wd', 'north_direction', 'atmospheric_pressure', 'rainfall', 'voltage']
+HEADER_BYTES = 250
+UPLOAD_INTERVAL = 600
+
+
+def sample(ts):
+    return {
+        'timestamp': ts.strftime('%Y-%m-%d %H:%M:%S'), 'ip': '58.72.215.20',
+        'temp': round(random.uniform(20, 30), 1), 'humidity': round(random.uniform(20, 40), 1),
+        'ws': round(random.uniform(0, 5), 1), 'wd': random.randint(0, 359),
+        'north_direction': round(random.uniform(0, 360), 1), 'atmospheric_pressure': round(random.uniform(1010, 1020), 1),
+        'rainfall': 0.0, 'voltage': round(random.uniform(12, 13), 1),
+    }
+
+
+def summary_uploads(samples, window, fmt, compress):
+    # Outbox(interval=UPLOAD_INTERVAL) 처럼 UPLOAD_INTERVAL 초 동안 닫힌 구간을 한 번에
+    agg = WindowAggregator(FIELDS, window)
+    pending, bodies, last_upload = [], [], None
+    for data in samples:
+        ts = to_epoch(data['timestamp'])
+        row = agg.add(ts, data)
+        if row:
+            pending.append({'ip': data['ip'], 'row': row})
+        if pending and (last_upload is None or ts - last_upload >= UPLOAD_INTERVAL):
+            bodies.append(encode_summaries(pending, window, agg.columns, fmt, compress)[0])
+            pending, last_upload = [], ts
+    return bodies
+
+
+def report(label, bodies, days):
+    size = sum(map(len, bodies)) / days
+    print(f"{label:<34} {len(bodies) / days:>9.0f} {size / 1024:>10.1f} {(size + HEADER_BYTES * len(bodies) / days) / 1024:>10.1f}")
+
+
+if __name__ == '__main__':
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    start = datetime(2024, 1, 1)
+    samples = [sample(start + timedelta(minutes=i)) for i in range(1440 * days)]
+    print(f"{'upload':<34} {'req/day':>9} {'body KB':>10} {'+hdr KB':>10}")
+    report('raw json, POST per sample', [json.dumps([s]).encode() for s in samples], days)
+    formats = ['json'] + (['msgpack'] if msgpack is not None else [])
+    for window in (60, 300, 900):
+        for fmt in formats:
+            for compress in (False, True):
+                bodies = summary_uploads(samples, window, fmt, compress)
+                report(f"summary {window}s {fmt}{' gzip' if compress else ''}", bodies, days)
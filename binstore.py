@@ -0,0 +1,84 @@
+from history import to_epoch
+import numpy as np
+import threading
+import os
+
+
+FIELDS = ['temp', 'humidity', 'ws', 'wd', 'north_direction', 'atmospheric_pressure', 'rainfall', 'voltage']
+INT_FIELDS = ('wd',) # stored as float32, exported as int
+BIN_ROOT = 'sensor_data/bin'
+# 42 bytes / record (packed): epoch int64 + ip id uint16 + float32 x 8
+DTYPE = np.dtype([('timestamp', '<i8'), ('ip', '<u2')] + [(f, '<f4') for f in FIELDS])
+
+
+class BinaryStore:
+    """
+    고정 길이 binary record 저장소 ({root}/{dev_id}.bin), CSV 와 같은 필드 구성.
+    ip 문자열은 기기별 테이블({root}/{dev_id}.ips, 한 줄에 하나)의 번호로 저장.
+    읽기는 numpy.memmap 으로 복사 없이 timestamp 범위를 잘라서 반환 (시간 순서로 append 된다고 가정)
+    """
+
+    def __init__(self, pool, root=BIN_ROOT):
+        self.pool = pool
+        self.root = root
+        self._ips = {} # dev_id -> {ip: id}
+        self._checked = set()
+        self._lock = threading.Lock()
+
+    def path(self, dev_id):
+        return f'{self.root}/{dev_id}.bin'
+
+    def ip_path(self, dev_id):
+        return f'{self.root}/{dev_id}.ips'
+
+    def ips(self, dev_id):
+        try:
+            with open(self.ip_path(dev_id), mode='r') as f:
+                return f.read().splitlines()
+        except FileNotFoundError:
+            return []
+
+    def _ip_id(self, dev_id, ip):
+        table = self._ips.get(dev_id)
+        if table is None:
+            table = self._ips[dev_id] = {value: i for i, value in enumerate(self.ips(dev_id))}
+        if ip not in table:
+            os.makedirs(self.root, exist_ok=True)
+            with open(self.ip_path(dev_id), mode='a') as f:
+                f.write(f'{ip}\n')
+            table[ip] = len(table)
+        return table[ip]
+
+    def pack(self, dev_id, records):
+        """레코드(dict) 목록 -> DTYPE 배열"""
+        array = np.empty(len(records), dtype=DTYPE)
+        array['timestamp'] = [to_epoch(data['timestamp']) for data in records]
+        with self._lock:
+            array['ip'] = [self._ip_id(dev_id, data['ip']) for data in records]
+        for f in FIELDS:
+            array[f] = [data[f] for data in records]
+        return array
+
+    def append(self, dev_id, records):
+        array = records if isinstance(records, np.ndarray) else self.pack(dev_id, records)
+        os.makedirs(self.root, exist_ok=True)
+        if dev_id not in self._checked:
+            # 중간에 끊긴 마지막 record 가 있으면 잘라서 정렬 유지
+            path = self.path(dev_id)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            if size % DTYPE.itemsize:
+                os.truncate(path, size - size % DTYPE.itemsize)
+            self._checked.add(dev_id)
+        self.pool.append(('bin', dev_id), self.path(dev_id), array.tobytes())
+
+    def read(self, dev_id, start=None, end=None):
+        """start <= timestamp <= end 레코드 (memmap view, 복사 없음)"""
+        path = self.path(dev_id)
+        count = os.path.getsize(path) // DTYPE.itemsize if os.path.exists(path) else 0
+        if count == 0:
+            return np.empty(0, dtype=DTYPE)
+        array = np.memmap(path, dtype=DTYPE, mode='r', shape=(count,))
+        timestamps = array['timestamp']
+        i = 0 if start is None else np.searchsorted(timestamps, start, side='left')
+        j = count if end is None else np.searchsorted(timestamps, end, side='right')
+        return array[i:j]
@@ -0,0 +1,66 @@
+"""
+CSV <-> binary record(binstore) 변환 도구
+
+    python csv2bin.py import dev_02 sensor_data/dev_02.csv [more.csv ...]
+    python csv2bin.py export dev_02 dev_02_export.csv [from] [to]
+"""
+from binstore import BinaryStore, FIELDS, INT_FIELDS
+from writer_pool import WriterPool
+from history import to_epoch
+from datetime import datetime
+import numpy as np
+import csv
+import sys
+
+CHUNK = 10000
+
+
+def import_csv(store, dev_id, paths):
+    count = 0
+    for path in paths:
+        with open(path, mode='r', newline='') as f:
+            rows = [row for row in csv.DictReader(f) if row.get('timestamp')]
+        for row in rows:
+            row['timestamp'] = to_epoch(row['timestamp'])
+        rows.sort(key=lambda row: row['timestamp'])
+        for i in range(0, len(rows), CHUNK):
+            chunk = rows[i:i + CHUNK]
+            array = store.pack(dev_id, [{**row, **{f: float(row[f]) for f in FIELDS}} for row in chunk])
+            store.append(dev_id, array)
+            count += len(chunk)
+        print(f"{path}: {len(rows)} rows")
+    return count
+
+
+def export_csv(store, dev_id, path, start=None, end=None, string_time=False):
+    array = store.read(dev_id, start, end)
+    ips = store.ips(dev_id)
+    with open(path, mode='w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['timestamp', 'ip'] + FIELDS)
+        for i in range(0, len(array), CHUNK):
+            chunk = array[i:i + CHUNK]
+            columns = [chunk[k].astype(np.int64) if k in INT_FIELDS else
+                       np.round(chunk[k].astype(np.float64), 3) for k in FIELDS]
+            for j, record in enumerate(chunk):
+                ts = int(record['timestamp'])
+                if string_time:
+                    ts = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+                writer.writerow([ts, ips[record['ip']]] + [c[j] for c in columns])
+    return len(array)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 4 or sys.argv[1] not in ('import', 'export'):
+        print(__doc__)
+        sys.exit(1)
+    pool = WriterPool(fsync='none')
+    store = BinaryStore(pool)
+    command, dev_id = sys.argv[1], sys.argv[2]
+    if command == 'import':
+        count = import_csv(store, dev_id, sys.argv[3:])
+    else:
+        bounds = [to_epoch(v) for v in sys.argv[4:6]] + [None, None]
+        count = export_csv(store, dev_id, sys.argv[3], bounds[0], bounds[1])
+    pool.close_all()
+    print(f"{command}: {count} records ({store.path(dev_id)})")
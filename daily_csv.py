@@ -0,0 +1,147 @@
+from datetime import datetime
+import threading
+import atexit
+import shutil
+import glob
+import gzip
+import time
+import csv
+import os
+
+
+class DailyCSVWriter:
+    """
+    하루 단위로 파일을 바꾸는 CSV writer: {directory}/{prefix}_{YYYY-MM-DD}.csv
+    handle 과 csv.writer 를 열어 두고 행의 timestamp(첫 열) 날짜가 바뀌면 다음 파일로 넘어감 (header 는 새 파일에만).
+    flush 는 flush_rows 행이 쌓이거나 flush_interval 초가 지났을 때만 (SD 카드 쓰기 횟수 절감).
+    compress=True 면 닫힌 날짜 파일을 background 스레드에서 .csv.gz 로 압축.
+    지금 열린 파일보다 이전 날짜의 행(늦게 도착)은 열린 파일을 바꾸지 않고 그 날짜 파일에 바로 추가
+    (압축은 다음 날짜 전환 때 닫힌 파일과 함께 한 번, 이미 압축된 날이면 .csv.gz 뒤에 이어 붙임).
+    """
+
+    def __init__(self, directory, prefix, columns=None, flush_rows=64, flush_interval=600, compress=False):
+        self.directory = directory
+        self.prefix = prefix
+        self.columns = columns
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.compress = compress
+        self.path = None
+        self._day = None
+        self._file = None
+        self._writer = None
+        self._pending = 0
+        self._flushed = time.monotonic()
+        self._late = set() # 늦은 행을 쓴, 아직 압축하지 않은 지난 날짜 파일
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        atexit.register(self.close)
+
+    def day_path(self, day):
+        return os.path.join(self.directory, f'{self.prefix}_{day}.csv')
+
+    def _open(self, day, columns):
+        closed = self.path
+        self._close()
+        if self.compress:
+            # 처음 열 때는 남아 있는 지난 파일 전부, 그 다음부터는 방금 닫은 파일과 늦은 행을 쓴 파일만
+            if closed is None:
+                self.compress_closed(day)
+            else:
+                _start_gzip([closed] + sorted(self._late), self.prefix)
+            self._late.clear()
+        self.path = self.day_path(day)
+        is_new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._file = open(self.path, mode='a', newline='', buffering=64 * 1024)
+        self._writer = csv.writer(self._file)
+        if is_new and columns:
+            self._writer.writerow(columns)
+        self._day = day
+
+    def write(self, row, columns=None):
+        """row[0] 은 '%Y-%m-%d %H:%M:%S' timestamp, columns 는 새 파일의 header (기본 self.columns)"""
+        day = row[0][:10]
+        with self._lock:
+            if self._day is not None and day < self._day:
+                self._write_late(day, row, columns or self.columns)
+                return
+            if day != self._day:
+                self._open(day, columns or self.columns)
+            self._writer.writerow(row)
+            self._pending += 1
+            if self._pending >= self.flush_rows or time.monotonic() - self._flushed >= self.flush_interval:
+                self._flush()
+
+    def _write_late(self, day, row, columns):
+        path = self.day_path(day)
+        with _gzip_lock: # background 압축이 같은 파일을 읽고 지우는 중이 아닐 때
+            is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+            with open(path, mode='a', newline='') as f:
+                writer = csv.writer(f)
+                if is_new and columns:
+                    writer.writerow(columns)
+                writer.writerow(row)
+        if self.compress:
+            self._late.add(path)
+
+    def _flush(self):
+        if self._file:
+            self._file.flush()
+        self._pending = 0
+        self._flushed = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _close(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = self._writer = self._day = None
+        self._pending = 0
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def compress_closed(self, today=None):
+        """today 이전 날짜의 .csv 파일들을 background 스레드에서 .csv.gz 로 압축"""
+        today = today or datetime.now().strftime('%Y-%m-%d')
+        closed = [path for path in glob.glob(os.path.join(self.directory, f'{self.prefix}_*.csv'))
+                  if path < self.day_path(today)]
+        _start_gzip(closed, self.prefix)
+
+
+def _start_gzip(paths, name):
+    if paths:
+        threading.Thread(target=_gzip_files, args=(paths,), name=f'gzip-{name}', daemon=True).start()
+
+
+_gzip_lock = threading.Lock()
+
+
+def _gzip_files(paths):
+    # .gz.tmp 에 쓴 뒤 rename, 원본은 그 다음에 삭제 (중간에 끊겨도 원본이 남음)
+    # .gz 가 이미 있으면 (압축 후 늦게 온 행) 기존 내용 뒤에 gzip member 하나를 더 붙임 (header 는 빼고)
+    for path in paths:
+        gz_path, tmp_path = path + '.gz', path + '.gz.tmp'
+        try:
+            with _gzip_lock:
+                if not os.path.exists(path):
+                    continue
+                with open(path, mode='rb') as src, open(tmp_path, mode='wb') as out:
+                    if os.path.exists(gz_path):
+                        with gzip.open(gz_path, mode='rb') as old:
+                            header = old.readline()
+                        first = src.readline()
+                        if first != header:
+                            src.seek(0)
+                        with open(gz_path, mode='rb') as old:
+                            shutil.copyfileobj(old, out)
+                    with gzip.GzipFile(fileobj=out, mode='wb') as dst:
+                        shutil.copyfileobj(src, dst)
+                os.replace(tmp_path, gz_path)
+                os.remove(path)
+        except OSError as e:
+            print(f"gzip {path} failed: {e}")
@@ -0,0 +1,172 @@
+from daly_protocol import COMMAND, FRAME_LENGTH, REQUEST, ResponseBuffer, burst, log
+from daly_protocol import calculate_checksum, validate_checksum, frame_count, decode_status, decode_cell_frames
+from daly_protocol import decode_pack_measurements, decode_min_max_cell_voltage, decode_pack_temperature
+import serial
+import time
+import csv
+
+
+def cell_columns(status):
+    """셀 단위 wide-row CSV header"""
+    return (['Timestamp'] + [f'Cell {i + 1} (mV)' for i in range(status['cells'])]
+            + [f'Temp {i + 1}' for i in range(status['temp_sensors'])] + ['Balance', 'Failures'])
+
+
+def cell_row(timestamp, cells):
+    """get_cell_snapshot() 결과 -> wide-row (밸런싱/고장 코드는 hex)"""
+    voltages, temps, balance, failures = cells
+    return [timestamp, *voltages, *temps, f'{balance:x}', failures.hex()]
+
+
+class DalyBMSUART:
+    XFER_BUFFER_LENGTH = FRAME_LENGTH  # 전송/수신 버퍼 길이
+    COMMAND = COMMAND  # Daly BMS 명령어 정의 (daly_protocol)
+
+    # 한 번에 요청하는 기본 측정값 (전압/전류/SOC, 최소/최대 셀 전압, 최소/최대 온도)
+    SNAPSHOT = ('VOUT_IOUT_SOC', 'MIN_MAX_CELL_VOLTAGE', 'MIN_MAX_TEMPERATURE')
+    # 셀 단위 측정값 (셀 전압, 온도, 밸런싱 상태, 고장 코드)
+    CELL_SNAPSHOT = ('CELL_VOLTAGES', 'CELL_TEMPERATURE', 'CELL_BALANCE_STATE', 'FAILURE_CODES')
+
+    def __init__(self, port, baudrate=9600, timeout=0.5):
+        """ UART 포트 초기화 (timeout: 명령어 하나당 응답 대기 시간, 초) """
+        self.timeout = timeout
+        self.serial = serial.Serial(port=port, baudrate=baudrate, timeout=timeout)
+        self.status = None  # get_status() 결과 (셀/센서 개수)
+        self.tx_buffer = b''  # 마지막으로 보낸 요청 프레임
+        self.rx_buffer = b''  # 마지막으로 받은 응답 프레임
+        self.rx = ResponseBuffer()  # query() / get_cell_snapshot() 수신 버퍼
+
+    def calculate_checksum(self, data):
+        """체크섬 계산: 모든 바이트의 합계에서 하위 바이트만 반환"""
+        return calculate_checksum(data)
+
+    def send_command(self, cmd_id):
+        """BMS에 명령어 전송 (미리 만들어 둔 요청 프레임)"""
+        self.tx_buffer = REQUEST[cmd_id]
+        self.serial.write(self.tx_buffer)
+        log.debug("Sent: %s", self.tx_buffer.hex())
+
+    def read_frame(self, deadline):
+        """deadline(time.monotonic) 까지 체크섬이 맞는 13 바이트 프레임 하나를 읽음, 시간 초과 시 None"""
+        frame = b''
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            self.serial.timeout = remaining
+            frame += self.serial.read(FRAME_LENGTH - len(frame))
+            if len(frame) < FRAME_LENGTH:
+                return None
+            if validate_checksum(frame):
+                return frame
+            log.debug("Checksum failed: %s", frame.hex())
+            # 어긋난 경우 다음 시작 플래그(0xA5)부터 다시 맞춤
+            start = frame.find(0xA5, 1)
+            frame = frame[start:] if start > 0 else b''
+
+    def receive_data(self, cmd_id=None):
+        """BMS로부터 데이터 수신 (cmd_id 가 주어지면 그 명령어의 응답이 올 때까지, 최대 self.timeout 초)"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            frame = self.read_frame(deadline)
+            if frame is None:
+                log.debug("No response received.")
+                return None
+            if cmd_id is None or frame[2] == cmd_id:
+                self.rx_buffer = frame
+                log.debug("Received: %s", frame.hex())
+                return frame
+
+    def _exchange(self, names, status=None):
+        # names 명령어를 한 번에 전송하고, 명령어마다 응답 프레임이 다 모일 때까지 (최대 self.timeout x 명령어 수) self.rx 로 읽음
+        need = {COMMAND[name]: frame_count(name, status) for name in names}
+        self.serial.reset_input_buffer()
+        self.serial.write(burst(tuple(names)))
+        frames = self.rx.read_until(self.serial, need, time.monotonic() + self.timeout * len(names))
+        log.debug("Received: %s", self.rx.view[:self.rx.size].hex())
+        return frames
+
+    def query(self, names):
+        """
+        여러 명령어를 한 번에 전송하고 응답을 명령어 byte 로 매칭 -> {명령어 이름: 프레임}
+        최대 self.timeout x 명령어 수 만큼 기다림 (빠진 응답은 결과에 없음).
+        프레임은 수신 버퍼의 memoryview 라서 다음 요청 전까지만 유효
+        """
+        cmd_ids = {DalyBMSUART.COMMAND[name]: name for name in names}
+        return {cmd_ids[frame[2]]: frame for frame in self._exchange(names) if frame[2] in cmd_ids}
+
+    def validate_checksum(self):
+        """수신된 데이터의 체크섬 검증"""
+        return validate_checksum(self.rx_buffer)
+
+    def get_pack_measurements(self):
+        """전압, 전류, SOC 데이터를 BMS로부터 요청"""
+        self.send_command(DalyBMSUART.COMMAND['VOUT_IOUT_SOC'])
+        data = self.receive_data(DalyBMSUART.COMMAND['VOUT_IOUT_SOC'])
+        if data:
+            pack_voltage, pack_current, pack_soc = decode_pack_measurements(data)
+            print(f"Pack Voltage: {pack_voltage}V, Pack Current: {pack_current}A, SOC: {pack_soc}%")
+            return pack_voltage, pack_current, pack_soc
+        return None
+
+    def get_min_max_cell_voltage(self):
+        """최소/최대 셀 전압 데이터를 BMS로부터 요청"""
+        self.send_command(DalyBMSUART.COMMAND['MIN_MAX_CELL_VOLTAGE'])
+        data = self.receive_data(DalyBMSUART.COMMAND['MIN_MAX_CELL_VOLTAGE'])
+        if data:
+            max_cell_voltage, min_cell_voltage = decode_min_max_cell_voltage(data)
+            print(f"Max Cell Voltage: {max_cell_voltage}mV, Min Cell Voltage: {min_cell_voltage}mV")
+            return max_cell_voltage, min_cell_voltage
+        return None
+
+    def get_pack_temperature(self):
+        """팩 온도 데이터를 BMS로부터 요청"""
+        self.send_command(DalyBMSUART.COMMAND['MIN_MAX_TEMPERATURE'])
+        data = self.receive_data(DalyBMSUART.COMMAND['MIN_MAX_TEMPERATURE'])
+        if data:
+            max_temp, min_temp = decode_pack_temperature(data)
+            print(f"Max Temp: {max_temp}°C, Min Temp: {min_temp}°C")
+            return max_temp, min_temp
+        return None
+
+    def get_snapshot(self):
+        """SNAPSHOT 명령어를 한 번에 요청 -> (전압, 전류, SOC, 최대/최소 셀 전압, 최대/최소 온도), 하나라도 없으면 None"""
+        responses = self.query(DalyBMSUART.SNAPSHOT)
+        if len(responses) < len(DalyBMSUART.SNAPSHOT):
+            log.debug("No complete data received.")
+            return None
+        return (*decode_pack_measurements(responses['VOUT_IOUT_SOC']),
+                *decode_min_max_cell_voltage(responses['MIN_MAX_CELL_VOLTAGE']),
+                *decode_pack_temperature(responses['MIN_MAX_TEMPERATURE']))
+
+    def get_status(self):
+        """0x94 상태 정보 (셀 개수, 온도 센서 개수 등), 결과는 self.status 에 저장"""
+        self.send_command(DalyBMSUART.COMMAND['STATUS_INFO'])
+        data = self.receive_data(DalyBMSUART.COMMAND['STATUS_INFO'])
+        if data:
+            self.status = decode_status(data)
+            print(f"Status: {self.status}")
+        return self.status
+
+    def get_cell_snapshot(self):
+        """
+        0x95 ~ 0x98 을 한 번에 요청하고 전체 응답(여러 프레임)을 한 번의 버퍼 읽기로 받아 재조립
+        -> (셀 전압 list, 온도 list, 밸런싱 bit mask, 고장 코드 bytes), 빠진 프레임이 있으면 None
+        """
+        status = self.status or self.get_status()
+        if not status:
+            return None
+        names = DalyBMSUART.CELL_SNAPSHOT
+        frames = self._exchange(names, status)
+        return decode_cell_frames(frames, status)
+
+    def close(self):
+        """포트 닫기"""
+        self.serial.close()
+
+
+# CSV 기록 함수 - 클래스 외부에 정의
+def log_to_csv(filename, data):
+    with open(filename, mode='a', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(data)
@@ -0,0 +1,223 @@
+"""
+Daly BMS UART 프로토콜 (13 바이트 프레임) 인코딩/디코딩
+
+요청 프레임은 import 시점에 만들어 둔 bytes table(REQUEST)을 그대로 전송하고,
+응답은 미리 할당한 버퍼(ResponseBuffer)에 읽어서 memoryview + struct 로 그 자리에서 해석.
+"""
+from types import MappingProxyType
+from functools import lru_cache
+import logging
+import struct
+import time
+
+
+log = logging.getLogger('daly_bms')
+
+FRAME_LENGTH = 13  # 전송/수신 프레임 길이
+START, HOST_ADDRESS, DATA_LENGTH = 0xA5, 0x40, 0x08  # 시작 플래그, PC 주소, 데이터 길이 (8바이트 고정)
+
+# Daly BMS 명령어 정의
+COMMAND = MappingProxyType({
+    'VOUT_IOUT_SOC': 0x90,
+    'MIN_MAX_CELL_VOLTAGE': 0x91,
+    'MIN_MAX_TEMPERATURE': 0x92,
+    'DISCHARGE_CHARGE_MOS_STATUS': 0x93,
+    'STATUS_INFO': 0x94,
+    'CELL_VOLTAGES': 0x95,
+    'CELL_TEMPERATURE': 0x96,
+    'CELL_BALANCE_STATE': 0x97,
+    'FAILURE_CODES': 0x98,
+    'DISCHRG_FET': 0xD9,
+    'CHRG_FET': 0xDA,
+    'BMS_RESET': 0x00
+})
+
+CELLS_PER_FRAME, TEMPS_PER_FRAME = 3, 7  # 0x95 / 0x96 응답 프레임 하나에 들어가는 셀/센서 수
+
+
+def calculate_checksum(data):
+    """체크섬 계산: 모든 바이트의 합계에서 하위 바이트만 반환"""
+    return sum(data) & 0xFF
+
+
+def validate_checksum(frame):
+    """13 바이트 프레임의 체크섬 검증 (memoryview 면 복사 없이)"""
+    return len(frame) == FRAME_LENGTH and sum(frame[:12]) & 0xFF == frame[12]
+
+
+def _request(cmd_id):
+    frame = bytes((START, HOST_ADDRESS, cmd_id, DATA_LENGTH)) + bytes(8)
+    return frame + bytes((calculate_checksum(frame),))
+
+
+# 명령어 byte -> 요청 프레임 (import 시 한 번만 생성)
+REQUEST = MappingProxyType({cmd_id: _request(cmd_id) for cmd_id in COMMAND.values()})
+
+
+@lru_cache(maxsize=None)
+def burst(names):
+    """여러 명령어(이름 tuple)를 한 번에 보낼 요청 프레임들"""
+    return b''.join(REQUEST[COMMAND[name]] for name in names)
+
+
+class ResponseBuffer:
+    """
+    응답 프레임 frames 개 크기로 미리 할당한 수신 버퍼.
+    read() 로 채운 뒤 frames() 로 체크섬이 맞는 프레임을 memoryview 로 얻음 (다음 read() 전까지만 유효)
+    """
+
+    def __init__(self, frames=8):
+        self.buf = bytearray(frames * FRAME_LENGTH)
+        self.view = memoryview(self.buf)
+        self.size = 0
+
+    def read(self, device, frames):
+        """device(pyserial) 에서 최대 frames 개 프레임 분량을 한 번에 읽음 -> 읽은 byte 수"""
+        length = frames * FRAME_LENGTH
+        if length > len(self.buf):
+            self.view.release()
+            self.buf = bytearray(length)
+            self.view = memoryview(self.buf)
+        self.size = device.readinto(self.view[:length]) or 0
+        return self.size
+
+    def read_until(self, device, need, deadline):
+        """
+        need {명령어 byte: 프레임 수} 가 모두 모이거나 deadline(time.monotonic) 이 될 때까지 device 에서 읽음 -> frames()
+        쓰레기 byte 가 끼어 마지막 프레임이 잘리면 모자란 만큼 더 읽음 (한 번에 읽는 양은 남은 프레임에 필요한 최소 byte)
+        """
+        self.size = 0
+        wanted = sum(need.values())
+        while True:
+            frames = self.frames()
+            found = {}
+            for frame in frames:
+                found[frame[2]] = found.get(frame[2], 0) + 1
+            missing = sum(max(0, count - found.get(cmd_id, 0)) for cmd_id, count in need.items())
+            remaining = deadline - time.monotonic()
+            if not missing or remaining <= 0:
+                return frames
+            # 프레임이 아닌 byte 는 모두 다음 프레임의 앞부분일 수도 있음 -> 그만큼 빼도 모자라지 않음
+            length = max(1, missing * FRAME_LENGTH - (self.size - FRAME_LENGTH * len(frames)))
+            if self.size + length > len(self.buf):
+                frames = frame = None # 이전 버퍼의 view 를 놓아야 release 가능
+                buf = bytearray(max(self.size + length, wanted * FRAME_LENGTH))
+                buf[:self.size] = self.view[:self.size]
+                self.view.release()
+                self.buf, self.view = buf, memoryview(buf)
+            device.timeout = remaining
+            read = device.readinto(self.view[self.size:self.size + length]) or 0
+            if not read: # deadline 까지 아무것도 안 옴
+                return self.frames()
+            self.size += read
+
+    def frames(self):
+        return split_frames(self.view[:self.size])
+
+
+def split_frames(buf):
+    """여러 응답이 이어진 buf 를 체크섬이 맞는 13 바이트 프레임 view 목록으로 (어긋나면 0xA5 에서 다시 맞춤)"""
+    view = memoryview(buf)
+    frames = []
+    i = 0
+    while i + FRAME_LENGTH <= len(view):
+        frame = view[i:i + FRAME_LENGTH]
+        if frame[0] == START and validate_checksum(frame):
+            frames.append(frame)
+            i += FRAME_LENGTH
+        else:
+            log.debug("Checksum failed at %d: %s", i, frame.hex())
+            i += 1
+    return frames
+
+
+# 응답 데이터 영역(offset 4 ~ 11) 형식, big endian
+_PACK = struct.Struct('>H2xHH')          # 팩 전압(0.1V), (수집 전압), 전류(+30000, 0.1A), SOC(0.1%)
+_CELL_VOLTAGE_RANGE = struct.Struct('>HxH')  # 최대 셀 전압(mV), (셀 번호), 최소 셀 전압(mV)
+_TEMPERATURE_RANGE = struct.Struct('>BxB')   # 최대 온도(+40), (센서 번호), 최소 온도(+40)
+_STATUS = struct.Struct('>4BxH')         # 셀 수, 온도 센서 수, 충전기, 부하, (DIO), 사이클 수
+_CELL_VOLTAGES = struct.Struct('>B3H')   # 프레임 번호, 셀 전압 3개(mV)
+_TEMPERATURES = struct.Struct('>B7B')    # 프레임 번호, 온도 7개(+40)
+
+
+def decode_pack_measurements(data):
+    voltage, current, soc = _PACK.unpack_from(data, 4)
+    return voltage / 10.0, (current - 30000) / 10.0, soc / 10.0
+
+
+def decode_min_max_cell_voltage(data):
+    return _CELL_VOLTAGE_RANGE.unpack_from(data, 4)
+
+
+def decode_pack_temperature(data):
+    max_temp, min_temp = _TEMPERATURE_RANGE.unpack_from(data, 4)
+    return max_temp - 40, min_temp - 40
+
+
+def decode_status(data):
+    """0x94: 셀 개수, 온도 센서 개수, 충전기/부하 상태, 사이클 수"""
+    cells, temp_sensors, charger, load, cycles = _STATUS.unpack_from(data, 4)
+    return {'cells': cells, 'temp_sensors': temp_sensors, 'charger': charger, 'load': load, 'cycles': cycles}
+
+
+def frame_count(name, status):
+    """명령어 응답 프레임 수 (0x95/0x96 은 셀/센서 수에 따라 여러 프레임)"""
+    if name == 'CELL_VOLTAGES':
+        return -(-status['cells'] // CELLS_PER_FRAME)
+    if name == 'CELL_TEMPERATURE':
+        return -(-status['temp_sensors'] // TEMPS_PER_FRAME)
+    return 1
+
+
+def _reassemble(frames, count):
+    # data[4] 가 프레임 번호(1부터), 빠진 프레임이 있으면 None
+    by_number = {frame[4]: frame for frame in frames}
+    if any(n not in by_number for n in range(1, count + 1)):
+        return None
+    return [by_number[n] for n in range(1, count + 1)]
+
+
+def decode_cell_voltages(frames, cells):
+    """0x95: 프레임마다 셀 전압 3개 (mV)"""
+    frames = _reassemble(frames, -(-cells // CELLS_PER_FRAME))
+    if frames is None:
+        return None
+    voltages = []
+    for frame in frames:
+        voltages += _CELL_VOLTAGES.unpack_from(frame, 4)[1:]
+    return voltages[:cells]
+
+
+def decode_cell_temperatures(frames, sensors):
+    """0x96: 프레임마다 온도 7개 (+40 offset)"""
+    frames = _reassemble(frames, -(-sensors // TEMPS_PER_FRAME))
+    if frames is None:
+        return None
+    temps = []
+    for frame in frames:
+        temps += [t - 40 for t in _TEMPERATURES.unpack_from(frame, 4)[1:]]
+    return temps[:sensors]
+
+
+def decode_balance_state(data, cells):
+    """0x97: 셀별 밸런싱 여부 bit mask (bit 0 = 1번 셀)"""
+    return int.from_bytes(data[4:10], 'little') & ((1 << cells) - 1)
+
+
+def decode_failure_codes(data):
+    """0x98: 고장 코드 bit field 8 바이트 (0 이면 정상)"""
+    return bytes(data[4:12])
+
+
+def decode_cell_frames(frames, status):
+    """0x95 ~ 0x98 응답 프레임들(순서 무관) -> (셀 전압 list, 온도 list, 밸런싱 bit mask, 고장 코드), 빠진 것이 있으면 None"""
+    by_cmd = {}
+    for frame in frames:
+        by_cmd.setdefault(frame[2], []).append(frame)
+    voltages = decode_cell_voltages(by_cmd.get(COMMAND['CELL_VOLTAGES'], []), status['cells'])
+    temps = decode_cell_temperatures(by_cmd.get(COMMAND['CELL_TEMPERATURE'], []), status['temp_sensors'])
+    balance = by_cmd.get(COMMAND['CELL_BALANCE_STATE'])
+    failures = by_cmd.get(COMMAND['FAILURE_CODES'])
+    if voltages is None or temps is None or not balance or not failures:
+        return None
+    return voltages, temps, decode_balance_state(balance[0], status['cells']), decode_failure_codes(failures[0])
@@ -0,0 +1,127 @@
+"""
+대시보드 series: live_plot.PANELS 와 같은 7개 패널의 샘플을 column 단위로 반환
+(그림은 브라우저가 display_server/static/dashboard.html 에서 직접 그림)
+PNG 가 필요하면 PlotCache 가 요청 시점에 같은 배치로 렌더링 (별도 프로세스) 해서 cache
+"""
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from asof import asof_join, columns, read_bms_log
+from live_plot import PANELS, WINDOW, LivePlot
+from collections import OrderedDict, deque
+from history import query
+import multiprocessing
+import numpy as np
+import threading
+import hashlib
+
+FIELDS = [field for field, *_ in PANELS if field != 'power']
+POWER_TOLERANCE = 360 # BMS 주기(240초) x 1.5, 이보다 오래된 BMS 샘플이면 power 는 풍속 추정값
+PLOT_WORKERS = 2
+PLOT_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def panel_series(index, dev_id, start, end, bms_dir, limit=WINDOW):
+    """
+    start ~ end 의 마지막 limit 개 샘플 (0 이면 전부) -> {'timestamp': epoch 배열, field: 값 배열, ..., 'power': 배열}
+    power 는 live_plot.power_of 와 같이 BMS 측정값(pack voltage x current) 또는 풍속 x 20
+    """
+    rows = query(index, dev_id, start, end, ['timestamp'] + FIELDS)
+    result = columns(deque(rows, maxlen=limit) if limit else rows, FIELDS)
+    timestamps = result['timestamp']
+    if len(timestamps):
+        bms = read_bms_log(bms_dir, int(timestamps[0]) - POWER_TOLERANCE, int(timestamps[-1]),
+                           ['Pack Voltage', 'Pack Current'])
+        joined = asof_join({'timestamp': timestamps}, bms, POWER_TOLERANCE, prefix='bms_')
+        measured = joined['bms_Pack Voltage'] * joined['bms_Pack Current']
+        result['power'] = np.round(np.where(np.isnan(measured), result['ws'] * 20, measured), 2)
+    else:
+        result['power'] = np.empty(0)
+    return result
+
+
+_plots = {} # 렌더링 프로세스 안에서 window -> LivePlot (Figure 는 한 번만 생성)
+
+
+def render_png(series, window, title):
+    """렌더링 프로세스에서 실행: panel_series 결과 -> PNG bytes"""
+    plot = _plots.get(window)
+    if plot is None:
+        if len(_plots) >= 4:
+            _plots.clear()
+        plot = _plots[window] = LivePlot(None, window=window, render_every=0)
+    plot.reset()
+    fields = [field for field, *_ in PANELS]
+    plot.seed([dict(zip(fields, values)) for values in zip(*(series[field] for field in fields))])
+    return plot.png(title)
+
+
+class PlotCache:
+    """
+    (기기, window, 마지막 레코드 timestamp, 마지막 BMS Timestamp) -> PNG bytes.
+    - 없을 때만 ProcessPoolExecutor 에서 렌더링 (matplotlib 이 Flask 요청 스레드의 GIL 을 잡지 않음)
+    - 같은 key 를 동시에 요청하면 렌더링은 한 번, 나머지는 그 결과를 기다림
+    - 기기/window 마다 최신 그림 하나만 유지, 합계가 max_bytes 를 넘으면 오래 안 쓴 것부터 제거 (LRU)
+    """
+
+    def __init__(self, max_bytes=PLOT_CACHE_BYTES, workers=PLOT_WORKERS):
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._latest = {} # (기기, window) -> key
+        self._pending = {} # key -> Future
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @staticmethod
+    def etag(key):
+        # 제목도 마지막 레코드 시각이라 key 가 같으면 같은 그림 -> key hash 를 content hash 로 사용 (그리기 전에 304 가능)
+        return hashlib.blake2b(repr(key).encode(), digest_size=12).hexdigest()
+
+    def get(self, key, series, title):
+        """cache 에 있으면 그대로, 없으면 series() 로 데이터를 읽어 렌더링 프로세스에서 그림"""
+        with self._lock:
+            png = self._items.get(key)
+            if png is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return png
+            future = self._pending.get(key)
+            if future is not None:
+                owner = False
+            else:
+                owner = True
+                self.misses += 1
+                future = self._pending[key] = Future()
+                if self._executor is None:
+                    # fork 는 다른 요청 스레드가 잡고 있던 lock 까지 복사할 수 있어서 spawn
+                    self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+                # lock 밖에서는 이 executor 만 사용 (다른 스레드가 BrokenProcessPool 로 self._executor 를 비워도)
+                executor = self._executor
+        if not owner:
+            return future.result()
+        try:
+            png = executor.submit(render_png, series(), key[1], title).result()
+        except BaseException as e:
+            with self._lock:
+                del self._pending[key]
+                # 렌더링 프로세스가 죽었으면 다음 요청에서 새로 생성 (이미 다른 스레드가 바꿨으면 그대로)
+                if isinstance(e, BrokenProcessPool) and self._executor is executor:
+                    self._executor = None
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._pending[key]
+            old = self._latest.get(key[:2])
+            if old is not None and old in self._items:
+                self.size -= len(self._items.pop(old))
+            self._latest[key[:2]] = key
+            self._items[key] = png
+            self.size += len(png)
+            while self.size > self.max_bytes and len(self._items) > 1:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+        future.set_result(png)
+        return png
@@ -0,0 +1,79 @@
+"""
+edge 집계 모드: 원본 샘플은 로컬(SegmentStore)에만 두고 window 초 구간마다 필드별 min/max/mean/last 요약만 업로드
+
+구간 경계와 컬럼 순서는 서버 rollup 과 같음 (rollup.bucket_start, 'start', 'count', '{field}_{min|max|mean|last}').
+업로드 body: {'ip', 'window', 'columns', 'rows': [[start, count, ...], ...]} 를 JSON 또는 msgpack(설치되어 있으면),
+선택적으로 gzip (Content-Encoding) -> POST {url}/summary
+"""
+from rollup import STATS, CIRCULAR, bucket_start
+import json
+import gzip
+import math
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+SUMMARY_FORMATS = ('json', 'msgpack')
+# 서버가 받은 요약을 저장하는 곳: {SUMMARY_ROOT}/{dev_id}_{window}s.csv (utils.update_summary)
+SUMMARY_ROOT = 'sensor_data/summary'
+# 서버가 받는 window (초). 기기 쪽 SUMMARY_WINDOW (parsing_sensor.py) 는 이 중 하나, 다른 값은 400
+SUMMARY_WINDOWS = (60, 300, 900, 3600)
+
+
+class WindowAggregator:
+    """샘플을 window 초 구간으로 모아서, 구간이 바뀌면 닫힌 구간의 요약 행(columns 순서 list) 반환"""
+
+    def __init__(self, fields, window):
+        self.fields = list(fields)
+        self.window = window
+        self.columns = ['start', 'count'] + [f'{f}_{s}' for f in self.fields for s in STATS]
+        self._circular = [f in CIRCULAR for f in self.fields]
+        self._start = None
+        self._values = [[] for _ in self.fields]
+
+    def add(self, timestamp, data):
+        """샘플 하나 (timestamp: epoch) 추가. 이전 구간이 닫혔으면 그 요약 행, 아니면 None"""
+        start = bucket_start(timestamp, self.window)
+        row = self.flush() if self._start is not None and start != self._start else None
+        self._start = start
+        for values, field in zip(self._values, self.fields):
+            values.append(data[field])
+        return row
+
+    def flush(self):
+        """열린 구간의 요약 행 (샘플이 없으면 None) 반환 후 비움"""
+        count = len(self._values[0])
+        if not count:
+            return None
+        row = [self._start, count]
+        for values, circular in zip(self._values, self._circular):
+            if circular: # 풍향은 원형 평균
+                sin = sum(math.sin(math.radians(v)) for v in values)
+                cos = sum(math.cos(math.radians(v)) for v in values)
+                mean = round(math.degrees(math.atan2(sin, cos)), 3) % 360
+            else:
+                mean = round(sum(values) / count, 3)
+            row += [min(values), max(values), mean, values[-1]]
+        self._values = [[] for _ in self.fields]
+        return row
+
+
+def encode_summaries(records, window, columns, fmt='json', compress=True):
+    """
+    Outbox encode 용: journal 레코드 [{'ip', 'row'}, ...] -> (body bytes, headers)
+    ip 는 batch 의 마지막 값 하나만 보냄
+    """
+    if fmt not in SUMMARY_FORMATS:
+        raise ValueError(f'fmt must be one of {SUMMARY_FORMATS}')
+    payload = {'ip': records[-1]['ip'], 'window': window, 'columns': columns, 'rows': [r['row'] for r in records]}
+    if fmt == 'msgpack' and msgpack is not None:
+        body, content_type = msgpack.packb(payload), 'application/msgpack'
+    else:
+        body, content_type = json.dumps(payload, separators=(',', ':')).encode(), 'application/json'
+    headers = {'Content-Type': content_type}
+    if compress:
+        body = gzip.compress(body)
+        headers['Content-Encoding'] = 'gzip'
+    return body, headers
@@ -0,0 +1,94 @@
+"""
+하드웨어 없이 acquisition.py 등을 돌려보기 위한 가짜 시리얼 장치 (pty)
+
+    python fake_serial.py [--interval 1]
+
+기상 센서: interval 초마다 '$...' 프레임 전송
+Daly BMS : 13 바이트 요청 프레임에 응답 (0x90 ~ 0x98, 셀 8개 / 온도 센서 2개)
+출력된 /dev/pts/N 경로를 --weather / --bms 로 넘겨서 사용
+"""
+from daly_protocol import calculate_checksum, validate_checksum, FRAME_LENGTH
+import argparse
+import random
+import select
+import time
+import tty
+import os
+
+
+def weather_frame():
+    body = (f'${random.uniform(20, 30):05.1f}{random.uniform(20, 40):05.1f}{random.uniform(0, 5):04.1f}'
+            f'{random.randint(0, 359):03d}{random.uniform(0, 360):05.1f}{random.uniform(1010, 1020):06.1f}'
+            f'{0:07.1f}{random.uniform(12, 13):04.1f}')
+    return (body + '*\r\n').encode()
+
+
+CELLS, TEMP_SENSORS = 8, 2
+
+
+def bms_frame(cmd_id, data):
+    frame = [0xA5, 0x01, cmd_id, 0x08] + data
+    return bytes(frame + [calculate_checksum(frame)])
+
+
+def bms_response(cmd_id):
+    if cmd_id == 0x95: # frame no + 3 cells (mV), 프레임 여러 개
+        cells = [3280 + random.randint(0, 20) for _ in range(CELLS)]
+        cells += [0] * (-len(cells) % 3)
+        return b''.join(bms_frame(cmd_id, [n // 3 + 1] + [b for mv in cells[n:n + 3] for b in (mv >> 8, mv & 0xFF)] + [0])
+                        for n in range(0, len(cells), 3))
+    if cmd_id == 0x96: # frame no + 7 temps (+40)
+        temps = [22 + 40 + i for i in range(TEMP_SENSORS)]
+        temps += [0] * (-len(temps) % 7)
+        return b''.join(bms_frame(cmd_id, [n // 7 + 1] + temps[n:n + 7]) for n in range(0, len(temps), 7))
+    data = [0] * 8
+    if cmd_id == 0x90: # pack voltage 0.1V, current offset 30000, soc 0.1%
+        voltage, current, soc = 132, 30000 + random.randint(-50, 50), 800
+        data = [voltage >> 8, voltage & 0xFF, 0, 0, current >> 8, current & 0xFF, soc >> 8, soc & 0xFF]
+    elif cmd_id == 0x91: # max cell mV, cell no, min cell mV, cell no
+        data = [3300 >> 8, 3300 & 0xFF, 1, 3280 >> 8, 3280 & 0xFF, 3, 0, 0]
+    elif cmd_id == 0x92: # max temp +40, sensor no, min temp +40, sensor no
+        data = [25 + 40, 1, 22 + 40, 2, 0, 0, 0, 0]
+    elif cmd_id == 0x94: # cells, temp sensors, charger, load, DIO, cycles
+        data = [CELLS, TEMP_SENSORS, 0, 1, 0, 0, 12, 0]
+    elif cmd_id == 0x97: # balancing bit mask (bit 0 = cell 1)
+        data = [random.randint(0, 255), 0, 0, 0, 0, 0, 0, 0]
+    return bms_frame(cmd_id, data)
+
+
+def open_pty():
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    return master, slave, os.ttyname(slave)
+
+
+def run(interval, bms_delay):
+    weather_master, _weather_slave, weather_path = open_pty()
+    bms_master, _bms_slave, bms_path = open_pty()
+    print(f"weather sensor: {weather_path}")
+    print(f"daly bms      : {bms_path}", flush=True)
+    next_frame = time.monotonic()
+    rx = b''
+    while True:
+        timeout = max(0, next_frame - time.monotonic())
+        readable, _, _ = select.select([weather_master, bms_master], [], [], timeout)
+        if weather_master in readable:
+            os.read(weather_master, 1024) # AT command
+        if bms_master in readable:
+            rx += os.read(bms_master, 1024)
+            while len(rx) >= FRAME_LENGTH:
+                frame, rx = rx[:FRAME_LENGTH], rx[FRAME_LENGTH:]
+                if validate_checksum(frame):
+                    time.sleep(bms_delay)
+                    os.write(bms_master, bms_response(frame[2]))
+        if time.monotonic() >= next_frame:
+            os.write(weather_master, weather_frame())
+            next_frame += interval
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='pty backed fake weather sensor / Daly BMS')
+    parser.add_argument('--interval', type=float, default=1.0, help='weather frame interval (sec)')
+    parser.add_argument('--bms-delay', type=float, default=0.005, help='BMS response delay (sec)')
+    args = parser.parse_args()
+    run(args.interval, args.bms_delay)
@@ -0,0 +1,206 @@
+"""
+sensor_data / bms_data 의 모든 저장 형식을 찾아서 (device, time) index 의 DataFrame 하나로 읽는 분석용 loader
+
+    python fleet.py [root ...] [--kind weather|bms|cells] [--workers N]
+
+    from fleet import load
+    df = load(['sensor_data', 'bms_data'], kind='weather')
+    df.loc['dev_04']
+
+찾는 형식 (.csv.gz 도 포함):
+  weather : {dir}/dev_XX.csv                         parsing_sensor.py 이전 단일 파일
+            {dir}/dev_XX/YYYY-MM/dev_XX_YYYY-MM-DD.csv  SegmentStore (parsing_sensor_241030.py)
+            {dir}/YYYY-MM/{dev_id}.csv               server.py 월별 파일
+  bms     : {dir}/bms_data_log_YYYY-MM-DD.csv        bms-sensor-data.py / acquisition.py
+  cells   : {dir}/bms_cells_log_YYYY-MM-DD.csv       셀 단위 wide-row
+
+파일 하나씩 process pool 에서 읽고, 결과는 {cache}/ 에 파일 단위로 저장 (Parquet, pyarrow 가 없으면 pickle).
+파일의 mtime/size 가 바뀐 것만 다시 읽음.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from binstore import FIELDS, INT_FIELDS, BIN_ROOT
+from rollup import TZ_OFFSET, ROLLUP_ROOT
+from edge_summary import SUMMARY_ROOT
+import pandas as pd
+import numpy as np
+import argparse
+import hashlib
+import json
+import re
+import os
+
+try:
+    import pyarrow  # noqa: F401 (DataFrame.to_parquet engine)
+    CACHE_EXT = '.parquet'
+except ImportError:
+    CACHE_EXT = '.pkl'
+
+CACHE_DIR = '.fleet_cache'
+# sensor_data 아래에서 기기 데이터가 아닌 디렉터리 (rollup / binary store / edge 요약), 경로는 저장하는 모듈에서
+SKIP_DIRS = {os.path.basename(root) for root in (ROLLUP_ROOT, BIN_ROOT, SUMMARY_ROOT)} | {CACHE_DIR}
+
+MONTH = re.compile(r'\d{4}-\d{2}$')
+SEGMENT = re.compile(r'(?P<device>.+)_\d{4}-\d{2}-\d{2}$')
+BMS_LOG = {'bms': re.compile(r'bms_data_log_\d{4}-\d{2}-\d{2}$'),
+           'cells': re.compile(r'bms_cells_log_\d{4}-\d{2}-\d{2}$')}
+DEVICE_DIR = re.compile(r'dev_\w+$')
+
+WEATHER_DTYPES = {field: 'int16' if field in INT_FIELDS else 'float32' for field in FIELDS}
+BMS_DTYPES = {'Pack Voltage': 'float32', 'Pack Current': 'float32', 'SOC': 'float32',
+              'Max Cell Voltage': 'int16', 'Min Cell Voltage': 'int16', 'Max Temp': 'int16', 'Min Temp': 'int16'}
+
+
+def _stem(name):
+    for ext in ('.csv.gz', '.csv'):
+        if name.endswith(ext):
+            return name[:-len(ext)]
+    return None
+
+
+def _owner(dirpath, default):
+    # bms_data 처럼 장치 id 가 없는 파일은 경로 중 가장 가까운 dev_XX 디렉터리, 없으면 default
+    for part in reversed(os.path.normpath(dirpath).split(os.sep)):
+        if DEVICE_DIR.match(part):
+            return part
+    return default
+
+
+def discover(roots, kind='weather'):
+    """roots 아래에서 kind 형식의 파일을 찾음 -> [(device, path)] (경로 순)"""
+    found = []
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+            parent = os.path.basename(dirpath)
+            for name in sorted(filenames):
+                stem = _stem(name)
+                if stem is None:
+                    continue
+                path = os.path.join(dirpath, name)
+                if kind in BMS_LOG:
+                    if BMS_LOG[kind].match(stem):
+                        found.append((_owner(dirpath, 'bms'), path))
+                    continue
+                if any(pattern.match(stem) for pattern in BMS_LOG.values()):
+                    continue
+                segment = SEGMENT.match(stem)
+                if segment and MONTH.match(parent): # dev_XX/YYYY-MM/dev_XX_YYYY-MM-DD.csv
+                    found.append((segment.group('device'), path))
+                elif MONTH.match(parent) or DEVICE_DIR.match(stem): # YYYY-MM/{dev_id}.csv, dev_XX.csv
+                    found.append((stem, path))
+    return found
+
+
+def to_time(values):
+    """epoch 숫자와 '%Y-%m-%d %H:%M:%S'(local) 문자열이 섞인 Series -> local datetime64 (읽을 수 없으면 NaT)"""
+    values = values.astype(str).str.strip()
+    epoch = pd.to_numeric(values, errors='coerce')
+    times = pd.to_datetime(values.where(epoch.isna()), format='%Y-%m-%d %H:%M:%S', errors='coerce')
+    return times.fillna(pd.to_datetime(epoch + TZ_OFFSET, unit='s'))
+
+
+def read_file(device, path, kind):
+    """파일 하나 -> device / time 열이 있는 DataFrame (깨진 줄, 시간을 읽을 수 없는 줄은 버림)"""
+    df = pd.read_csv(path, dtype=str, on_bad_lines='skip', engine='c')
+    time_column = 'timestamp' if kind == 'weather' else 'Timestamp'
+    if time_column not in df.columns:
+        return pd.DataFrame()
+    df.insert(0, 'time', to_time(df.pop(time_column)))
+    df = df[df['time'].notna()]
+    if kind == 'weather':
+        dtypes = WEATHER_DTYPES
+    elif kind == 'bms':
+        dtypes = BMS_DTYPES
+    else: # 셀 수에 따라 열이 다름, Balance / Failures 는 hex 문자열
+        dtypes = {c: 'int16' for c in df.columns if c.startswith(('Cell ', 'Temp '))}
+    for column, dtype in dtypes.items():
+        if column in df.columns:
+            values = pd.to_numeric(df[column], errors='coerce')
+            df[column] = values.astype(dtype) if dtype.startswith('float') else values.astype(dtype.replace('int', 'Int'))
+    df.insert(0, 'device', device)
+    return df.reset_index(drop=True)
+
+
+def _cache_path(cache_dir, path):
+    return os.path.join(cache_dir, hashlib.sha1(os.path.abspath(path).encode()).hexdigest() + CACHE_EXT)
+
+
+def _save(df, path):
+    tmp_path = path + '.tmp'
+    if CACHE_EXT == '.parquet':
+        df.to_parquet(tmp_path, index=False)
+    else:
+        df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _load(path):
+    return pd.read_parquet(path) if CACHE_EXT == '.parquet' else pd.read_pickle(path)
+
+
+def load(roots, kind='weather', cache_dir=CACHE_DIR, workers=None):
+    """
+    roots 아래 kind 형식의 모든 파일 -> (device, time) MultiIndex DataFrame (시간 순)
+    cache_dir=None 이면 cache 를 쓰지 않음
+    """
+    if isinstance(roots, str):
+        roots = [roots]
+    files = discover(roots, kind)
+    manifest = {}
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        manifest_path = os.path.join(cache_dir, f'{kind}.json')
+        try:
+            with open(manifest_path, mode='r') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            manifest = {}
+
+    frames, stale, current = {}, [], {}
+    for device, path in files:
+        stat = os.stat(path)
+        current[path] = [stat.st_mtime_ns, stat.st_size]
+        cache_path = _cache_path(cache_dir, path) if cache_dir else None
+        if cache_path and manifest.get(path) == current[path] and os.path.exists(cache_path):
+            frames[path] = _load(cache_path)
+        else:
+            stale.append((device, path))
+
+    if stale:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(read_file, *zip(*stale), [kind] * len(stale))
+            for (device, path), df in zip(stale, results):
+                frames[path] = df
+                if cache_dir:
+                    _save(df, _cache_path(cache_dir, path))
+    if cache_dir:
+        for path in set(manifest) - set(current): # 없어진 파일
+            try:
+                os.remove(_cache_path(cache_dir, path))
+            except FileNotFoundError:
+                pass
+        with open(manifest_path + '.tmp', mode='w') as f:
+            json.dump(current, f)
+        os.replace(manifest_path + '.tmp', manifest_path)
+
+    frames = [df for df in (frames[path] for _, path in files) if len(df)]
+    if not frames:
+        return pd.DataFrame(index=pd.MultiIndex.from_arrays([[], np.array([], dtype='datetime64[ns]')],
+                                                            names=['device', 'time']))
+    df = pd.concat(frames, ignore_index=True)
+    df['device'] = df['device'].astype('category')
+    if 'ip' in df.columns:
+        df['ip'] = df['ip'].astype('category')
+    return df.set_index(['device', 'time']).sort_index()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='load every sensor_data / bms_data layout into one frame')
+    parser.add_argument('roots', nargs='*', default=['sensor_data', 'bms_data'])
+    parser.add_argument('--kind', choices=['weather', 'bms', 'cells'], default='weather')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+    df = load(args.roots, args.kind, cache_dir=None if args.no_cache else CACHE_DIR, workers=args.workers)
+    print(df.info())
+    print(df.groupby(level='device', observed=True).size())
@@ -0,0 +1,53 @@
+class FrameDecoder:
+    """
+    기상 센서 byte stream 을 프레임 단위로 자르는 증분 decoder (재귀 없음).
+    '$' 에서 동기를 맞추고, fields 의 (start, end) 위치를 memoryview 로 바로 변환.
+    - 프레임 중간에 '$' 가 또 나오면 잘린 프레임으로 보고 그 위치에서 다시 동기화
+    - 숫자 변환에 실패하면 그 '$' 만 버리고 다음 '$' 를 찾음 (버퍼의 나머지 데이터는 유지)
+    fields: [(name, start, end, type), ...]  ex) ('temp', 1, 6, float)
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.frame_len = max(end for _, _, end, _ in fields)
+        self.buffer = bytearray()
+        self.frames = 0
+        self.errors = 0
+        self.skipped = 0 # bytes discarded while resynchronizing
+
+    def feed(self, data):
+        """새로 읽은 bytes 를 넣고 완성된 레코드(dict) 목록을 반환"""
+        self.buffer += data
+        buf = self.buffer
+        frame_len = self.frame_len
+        records = []
+        pos = 0
+        with memoryview(buf) as view:
+            while True:
+                start = buf.find(b'$', pos)
+                if start < 0:
+                    self.skipped += len(buf) - pos
+                    pos = len(buf)
+                    break
+                self.skipped += start - pos
+                pos = start
+                if len(buf) - start < frame_len: # wait for the rest of the frame
+                    break
+                resync = buf.find(b'$', start + 1, start + frame_len)
+                if resync >= 0: # truncated frame
+                    self.errors += 1
+                    self.skipped += resync - start
+                    pos = resync
+                    continue
+                try:
+                    record = {name: cast(view[start + s:start + e]) for name, s, e, cast in self.fields}
+                except ValueError:
+                    self.errors += 1
+                    self.skipped += 1
+                    pos = start + 1
+                    continue
+                records.append(record)
+                self.frames += 1
+                pos = start + frame_len
+        del buf[:pos]
+        return records
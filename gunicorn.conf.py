@@ -0,0 +1,39 @@
+# 여러 worker 프로세스로 server.py 실행 (Flask 개발 서버 대신)
+#
+#     gunicorn -c gunicorn.conf.py wsgi:application
+#
+# worker 는 요청 파싱/검증/조회만 하고, 파일 쓰기와 최신값/집계 상태는 master 가 띄운
+# ingest_writer.py 프로세스 하나가 가짐 (unix socket, WRITER_SOCKET)
+import multiprocessing
+import subprocess
+import time
+import sys
+import os
+
+bind = '0.0.0.0:4465'
+workers = min(multiprocessing.cpu_count() * 2 + 1, 8)
+worker_class = 'gthread'
+threads = 16 # /stream (SSE) 연결이 스레드를 계속 쓰므로 (server.STREAM_MAX_CLIENTS) 여유 있게
+timeout = 30
+keepalive = 5
+
+WRITER_SOCKET = os.path.abspath('sensor_data/writer.sock')
+raw_env = [f'WRITER_SOCKET={WRITER_SOCKET}']
+
+
+def on_starting(server):
+    if os.path.exists(WRITER_SOCKET): # 이전 실행이 남긴 socket
+        os.remove(WRITER_SOCKET)
+    env = {k: v for k, v in os.environ.items() if k != 'WRITER_SOCKET'}
+    server.writer = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(__file__), 'ingest_writer.py'),
+                                      WRITER_SOCKET], env=env)
+    deadline = time.monotonic() + 30
+    while not os.path.exists(WRITER_SOCKET):
+        if server.writer.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError('ingest_writer did not start')
+        time.sleep(0.05)
+
+
+def on_exit(server):
+    server.writer.terminate()
+    server.writer.wait(timeout=30)
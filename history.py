@@ -0,0 +1,187 @@
+from datetime import datetime
+from itertools import accumulate, compress
+from operator import itemgetter, lt
+import threading
+import bisect
+import heapq
+import os
+
+
+def to_epoch(value):
+    """epoch(int/숫자 문자열) 또는 '%Y-%m-%d %H:%M:%S' 문자열(local time) -> epoch int"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    value = value.strip()
+    if value.lstrip('-').isdigit():
+        return int(value)
+    return int(datetime.strptime(value, '%Y-%m-%d %H:%M:%S').timestamp())
+
+
+def last_line(data_path, block=4096):
+    # 파일 끝에서부터 block 단위로 거꾸로 읽어 마지막 줄만 반환 (파일 크기와 무관)
+    with open(data_path, mode='rb') as f:
+        pos = f.seek(0, os.SEEK_END)
+        buf = b''
+        while pos > 0:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+            line = buf.rstrip(b'\r\n')
+            i = line.rfind(b'\n')
+            if i >= 0:
+                return line[i + 1:].decode()
+        return buf.rstrip(b'\r\n').decode()
+
+
+def _number(value):
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+
+class SparseIndex:
+    """
+    월별 CSV 마다 timestamp -> byte offset 희소 인덱스({data_path}.idx, 'ts,offset' 줄).
+    append 될 때 마지막 표시 이후 every 바이트 이상 지났으면 한 줄 추가 -> 전체 재스캔 불필요
+    - ts 는 그 offset 의 줄까지 본 timestamp 의 최댓값 (줄이 시간 순서가 아니어도 단조 증가, bisect 가능)
+    - 앞 줄보다 이른 timestamp 가 append 되면(outbox 재전송, 달이 바뀐 뒤 도착한 지난달 레코드) 'r,offset' 줄:
+      scan 은 마지막 'r' 이전 구간만 끝까지 읽어서 정렬하고, 그 뒤로는 end 를 넘으면 멈춤
+    """
+
+    def __init__(self, every=16384):
+        self.every = every
+        self._state = {} # data_path -> [last indexed offset, 지금까지의 최대 timestamp]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def index_path(data_path):
+        return data_path + '.idx'
+
+    def _load_state(self, data_path, offset):
+        # 재시작 뒤 처음: idx 의 마지막 표시 + 그 뒤부터 offset 전까지의 줄로 최대 timestamp 복원
+        if data_path not in self._state:
+            timestamps, offsets, _ = self.load(data_path)
+            last = offsets[-1] if offsets else None
+            top = timestamps[-1] if timestamps else None
+            try:
+                with open(data_path, mode='rb') as f:
+                    f.seek(last or 0)
+                    for line in f.read(max(0, offset - (last or 0))).splitlines():
+                        try:
+                            ts = to_epoch(line.split(b',', 1)[0].decode())
+                        except ValueError: # header
+                            continue
+                        top = ts if top is None else max(top, ts)
+            except FileNotFoundError:
+                pass
+            self._state[data_path] = [last, top]
+        return self._state[data_path]
+
+    def note(self, data_path, offset, lines):
+        """offset 에서 시작하는 lines(줄 문자열, 개행 제외)가 추가되었음을 기록"""
+        if not lines:
+            return
+        heads = [line[:line.find(',')] for line in lines]
+        try:
+            stamps = list(map(int, heads)) # 저장된 timestamp 는 대부분 epoch 정수
+        except ValueError:
+            stamps = list(map(to_epoch, heads))
+        starts = list(accumulate([len(line.encode()) + 1 for line in lines], initial=offset)) # 줄마다 시작 offset
+        n = len(lines)
+        with self._lock:
+            state = self._load_state(data_path, offset)
+            last, top = state
+            tops = list(accumulate(stamps, max, initial=-1 if top is None else top)) # tops[k]: k 번째 줄 앞까지의 최댓값
+            marks = [f"r,{starts[k]}\n" for k in compress(range(n), map(lt, stamps, tops))]
+            k = 0 if last is None else bisect.bisect_left(starts, last + self.every, 0, n)
+            while k < n:
+                marks.append(f"{tops[k + 1]},{starts[k]}\n")
+                last = starts[k]
+                k = bisect.bisect_left(starts, last + self.every, k + 1, n)
+            state[:] = last, tops[-1]
+            if marks:
+                with open(self.index_path(data_path), mode='a') as f:
+                    f.write(''.join(marks))
+
+    def load(self, data_path):
+        """-> (timestamps, offsets, 마지막 'r' 의 offset: 여기부터 파일 끝까지는 시간 순서, 없으면 0)"""
+        timestamps, offsets, ordered_from = [], [], 0
+        try:
+            with open(self.index_path(data_path), mode='r') as f:
+                for line in f:
+                    ts, offset = line.split(',')
+                    if ts == 'r':
+                        ordered_from = int(offset)
+                        continue
+                    timestamps.append(int(ts))
+                    offsets.append(int(offset))
+        except FileNotFoundError:
+            pass
+        return timestamps, offsets, ordered_from
+
+
+def _months(start, end):
+    # start ~ end 의 'YYYY-MM' 목록 (파일은 수신 시각 기준 월이므로 다음 달까지 포함)
+    y, m = map(int, datetime.fromtimestamp(start).strftime('%Y-%m').split('-'))
+    last = datetime.fromtimestamp(end).strftime('%Y-%m')
+    months = []
+    while True:
+        months.append(f'{y:04d}-{m:02d}')
+        if months[-1] > last:
+            return months
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+
+
+def _scan(index, data_path, start, end, fields):
+    # (timestamp, dict) 를 시간 순서로
+    if not os.path.exists(data_path):
+        return
+    timestamps, offsets, ordered_from = index.load(data_path)
+    # 표시의 ts 는 그 줄까지의 최댓값 -> ts < start 인 표시 앞의 줄은 모두 start 이전
+    i = bisect.bisect_left(timestamps, start) - 1
+    with open(data_path, mode='rb') as f:
+        columns = f.readline().decode().strip().split(',')
+        selected = [(columns.index(k), k) for k in fields or columns if k in columns]
+        pos = f.seek(offsets[i]) if i >= 0 else f.tell()
+        unordered = pos < ordered_from
+        rows = []
+        for line in f:
+            at, pos = pos, pos + len(line)
+            values = line.decode().rstrip('\r\n').split(',')
+            ts = to_epoch(values[0])
+            if ts < start:
+                continue
+            if ts > end:
+                if at >= ordered_from: # 여기부터는 시간 순서
+                    break
+                continue
+            row = {k: ts if j == 0 else _number(values[j]) for j, k in selected}
+            if unordered:
+                rows.append((ts, row))
+            else:
+                yield ts, row
+    if unordered:
+        rows.sort(key=itemgetter(0))
+        yield from rows
+
+
+def scan(index, data_path, start, end, fields=None):
+    """
+    data_path 에서 start <= 첫 컬럼(timestamp) <= end 인 줄을 fields 컬럼만 dict 로 시간 순서로 yield.
+    인덱스로 start 직전 위치로 바로 seek 하고, timestamp 가 end 를 넘으면 멈춤
+    (시간 순서가 아닌 구간이 인덱스에 표시되어 있으면 그 구간은 끝까지 읽어서 정렬)
+    """
+    for _, row in _scan(index, data_path, start, end, fields):
+        yield row
+
+
+def query(index, dev_id, start, end, fields=None):
+    """기기의 월별 CSV 들에서 start ~ end 레코드를 시간 순서로 yield (다음 달 파일에 도착한 레코드도 제자리로 merge)"""
+    scans = [_scan(index, f'sensor_data/{yyyy_mm}/{dev_id}.csv', start, end, fields) for yyyy_mm in _months(start, end)]
+    for _, row in heapq.merge(*scans, key=itemgetter(0)):
+        yield row
@@ -0,0 +1,198 @@
+"""
+여러 worker 프로세스(gunicorn)로 서버를 실행할 때 쓰는 단일 writer 프로세스
+
+    python ingest_writer.py sensor_data/writer.sock
+
+파일 append, 희소 인덱스, rollup 의 열린 구간, 최신값 cache 처럼 프로세스 안에 상태가 있는 부분은
+이 프로세스 하나만 가지고, worker 는 unix socket 으로 요청을 넘김 (WriterClient).
+메시지: 4 byte 길이(big endian) + orjson, 요청 {'op', 'dev_id', ...} -> 응답 {'ok': ...} 또는 {'error': ...}
+{'op': 'subscribe'} 를 보낸 연결은 이후 새 레코드를 {'dev_id', 'data'(SSE payload)} 로 계속 받음 (STREAM_PING 초마다 {'ping'})
+"""
+import socketserver
+import threading
+import struct
+import orjson
+import signal
+import socket
+import sys
+import os
+
+_LENGTH = struct.Struct('>I')
+STREAM_PING = 15
+RELAY_QUEUE = 1024 # worker 중계 연결 하나당 밀려 있을 수 있는 publish 수
+
+
+def send_message(sock, message):
+    payload = orjson.dumps(message)
+    sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+
+def recv_message(sock):
+    header = _recv_exact(sock, _LENGTH.size)
+    if header is None:
+        return None
+    payload = _recv_exact(sock, _LENGTH.unpack(header)[0])
+    if payload is None:
+        raise ConnectionError('connection closed mid-message')
+    return orjson.loads(payload)
+
+
+def _recv_exact(sock, size):
+    chunks, remaining = [], size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+class WriterClient:
+    """
+    worker 쪽: 스레드마다 연결 하나를 유지. 재사용한 연결로 요청을 보내지 못했을 때만 (writer 재시작 등)
+    새로 연결해서 한 번 더 보냄. 보낸 뒤 응답을 못 받으면 재시도하지 않음 (append / summary 가 두 번 기록될 수 있음)
+    """
+
+    def __init__(self, path, timeout=10):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.path)
+        self._local.sock = sock
+        return sock
+
+    def _drop(self, sock):
+        sock.close()
+        self._local.sock = None
+
+    def call(self, op, **kwargs):
+        kwargs['op'] = op
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            try:
+                send_message(sock, kwargs)
+            except OSError: # 끊긴 연결 (writer 는 요청을 받지 못함)
+                self._drop(sock)
+                sock = None
+        if sock is None:
+            sock = self._connect()
+            try:
+                send_message(sock, kwargs)
+            except OSError:
+                self._drop(sock)
+                raise
+        try:
+            reply = recv_message(sock)
+            if reply is None:
+                raise ConnectionError('writer closed the connection')
+        except (OSError, ValueError):
+            self._drop(sock) # 늦게 온 응답이 다음 요청에 섞이지 않도록
+            raise
+        if 'error' in reply:
+            if reply['error'] == 'not found':
+                raise FileNotFoundError(kwargs.get('dev_id'))
+            raise RuntimeError(reply['error'])
+        return reply['ok']
+
+    def subscribe(self):
+        """writer 가 받은 레코드를 (dev_id, SSE payload bytes) 로 계속 yield (전용 연결, 끊기면 ConnectionError)"""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(STREAM_PING * 4)
+        with sock:
+            sock.connect(self.path)
+            send_message(sock, {'op': 'subscribe'})
+            while True:
+                message = recv_message(sock)
+                if message is None:
+                    raise ConnectionError('writer closed the stream')
+                if 'dev_id' in message:
+                    yield message['dev_id'], message['data'].encode()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                message = recv_message(self.request)
+            except (OSError, ValueError):
+                return
+            if message is None:
+                return
+            if message.get('op') == 'subscribe':
+                self._stream()
+                return
+            try:
+                reply = {'ok': dispatch(message)}
+            except FileNotFoundError:
+                reply = {'error': 'not found'}
+            except Exception as e:
+                print(f"writer: {message.get('op')} failed: {e!r}")
+                reply = {'error': repr(e)}
+            send_message(self.request, reply)
+
+
+    def _stream(self):
+        # 느린 worker 는 hub 가 끊음 -> 연결을 닫고 worker 가 다시 연결
+        subscription = utils.hub.subscribe(None, max_queue=RELAY_QUEUE)
+        try:
+            while not subscription.dropped:
+                item = subscription.get(STREAM_PING)
+                message = {'dev_id': item[0], 'data': item[1].decode()} if item else {'ping': 1}
+                send_message(self.request, message)
+        except OSError:
+            pass
+        finally:
+            utils.hub.unsubscribe(subscription)
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+# 쓰기 요청은 연결(스레드)이 달라도 한 번에 하나씩: 파일 offset / rollup 구간이 도착 순서대로 갱신되어야 함
+_write_lock = threading.Lock()
+
+
+def dispatch(message):
+    # 이 프로세스에서는 WRITER_SOCKET 이 없으므로 utils 가 직접 파일에 씀 (latest / aggregate 읽기는 동시에)
+    op, dev_id = message['op'], message.get('dev_id')
+    if op == 'append':
+        with _write_lock:
+            utils.update_batch(dev_id, message['records'])
+        return len(message['records'])
+    if op == 'latest':
+        return utils.read_data(dev_id).decode()
+    if op == 'summary':
+        with _write_lock:
+            utils.update_summary(dev_id, message['window'], message['rows'])
+        return len(message['rows'])
+    if op == 'bms':
+        with _write_lock:
+            return utils.update_bms(dev_id, message['rows'])
+    if op == 'aggregate':
+        return utils.rollups.aggregate(dev_id, message['bucket'], message['start'], message['end'], message['fields'])
+    raise ValueError(f'unknown op {op}')
+
+
+def serve(path):
+    if os.path.exists(path):
+        os.remove(path)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with _Server(path, _Handler) as server:
+        print(f"writer: listening on {path}", flush=True)
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    os.environ.pop('WRITER_SOCKET', None)
+    import utils
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0)) # atexit: writer pool flush + fsync
+    serve(sys.argv[1] if len(sys.argv) > 1 else 'sensor_data/writer.sock')
@@ -0,0 +1,126 @@
+from datetime import datetime
+import numpy as np
+import io
+import os
+
+
+WINDOW = 180
+
+# (field, title, color, gridspec slot) - make_plot 과 같은 7개 패널 구성
+PANELS = [
+    ('temp', "Temperature ('C)", 'C3', (0, 0)),
+    ('humidity', "Humidity (%)", 'C0', (0, 1)),
+    ('ws', "Wind Speed (m/s)", 'C1', (0, 2)),
+    ('wd', "Wind Direction", 'C2', (1, 0)),
+    ('atmospheric_pressure', "Atmospheric Pressure (hPa)", 'C4', (1, 1)),
+    ('rainfall', "Rainfall (mm)", 'C9', (1, 2)),
+    ('power', "Power (W)", 'r', (2, slice(None))),
+]
+
+
+def power_of(data):
+    # instantaneous W: measured (BMS pack voltage x current) if available, otherwise estimated from wind speed
+    if data.get('power') is not None:
+        return float(data['power'])
+    return float(data['ws']) * 20
+
+
+class LivePlot:
+    """
+    최근 window 개 샘플을 링 버퍼에 유지하고 Figure/Line2D 는 한 번만 생성.
+    update() 는 set_ydata 로 선 데이터만 바꾸고, render_every 샘플마다 PNG 저장 (0 이면 저장 안 함)
+    matplotlib 은 첫 render() 에서 import / Figure 생성 (시작 시간, render_every=0 이면 아예 안 불러옴)
+    """
+
+    def __init__(self, save_path, window=WINDOW, render_every=1, dpi=150):
+        self.save_path = save_path
+        self.window = window
+        self.render_every = render_every
+        self.dpi = dpi
+        self.count = 0
+        # 길이 2*window 버퍼에 같은 값을 두 번 기록 -> 항상 연속된 view 로 최근 window 개를 얻음
+        self._buffer = np.full((len(PANELS), 2 * window), np.nan)
+        self._pos = 0
+        self.figure = None # 첫 render() 에서 생성
+
+    def _build_figure(self):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.gridspec import GridSpec
+        from matplotlib.figure import Figure
+
+        window = self.window
+        fontdict = {'fontsize': 16, 'fontweight': 'bold'}
+        self.figure = Figure(figsize=(18, 12))
+        FigureCanvasAgg(self.figure)
+        gs = GridSpec(3, 3, figure=self.figure)
+        self._title = self.figure.suptitle('', fontweight='bold', fontsize=24)
+        x = np.arange(window)
+        self.axes, self.lines = [], []
+        for i, (_, title, color, slot) in enumerate(PANELS):
+            ax = self.figure.add_subplot(gs[slot])
+            ax.set_title(title, fontdict=fontdict)
+            ax.set_xlim([-10, window + 10])
+            ax.set_xticks(list(range(0, window + 1, 20)))
+            line, = ax.plot(x, self._view(i), color=color)
+            self.axes.append(ax)
+            self.lines.append(line)
+        self.figure.subplots_adjust(wspace=0.3, hspace=0.3)
+
+    def _view(self, i):
+        return self._buffer[i, self._pos:self._pos + self.window]
+
+    def push(self, data):
+        """링 버퍼에 샘플 하나 추가 (그리기 없음)"""
+        values = [power_of(data) if field == 'power' else float(data[field]) for field, *_ in PANELS]
+        slot = self._pos
+        self._buffer[:, slot] = values
+        self._buffer[:, slot + self.window] = values
+        self._pos = (slot + 1) % self.window
+        self.count += 1
+
+    def seed(self, rows):
+        for data in rows[-self.window:]:
+            self.push(data)
+
+    def update(self, data):
+        self.push(data)
+        if self.render_every and self.count % self.render_every == 0:
+            self.render()
+
+    def reset(self):
+        """버퍼 비우기 (Figure 는 유지)"""
+        self._buffer.fill(np.nan)
+        self._pos = 0
+        self.count = 0
+
+    def _draw(self, title=None):
+        if self.figure is None:
+            self._build_figure()
+        for i, (ax, line) in enumerate(zip(self.axes, self.lines)):
+            values = self._view(i)
+            line.set_ydata(values)
+            if np.isnan(values).all():
+                continue
+            low, high = np.nanmin(values), np.nanmax(values)
+            if PANELS[i][0] == 'rainfall':
+                space = (high - low + 1e-2) / 20
+            else:
+                space = (high - low) * 0.05 or 0.5
+            ax.set_ylim([low - space, high + space])
+        if title is None:
+            title = f'Last Update: {datetime.now().strftime("%Y-%m-%d %H:%M")}'
+        self._title.set_text(title)
+
+    def render(self):
+        self._draw()
+        # 임시 파일에 저장 후 교체 -> 읽는 쪽에서 반쯤 쓰인 파일을 보지 않음
+        tmp_path = self.save_path + '.tmp'
+        self.figure.savefig(tmp_path, dpi=self.dpi, format='png')
+        os.replace(tmp_path, self.save_path)
+
+    def png(self, title=None):
+        """현재 버퍼를 그린 PNG bytes (파일 저장 없음)"""
+        self._draw(title)
+        buf = io.BytesIO()
+        self.figure.savefig(buf, dpi=self.dpi, format='png')
+        return buf.getvalue()
@@ -0,0 +1,164 @@
+import threading
+import json
+import time
+import os
+
+
+class Outbox:
+    """
+    전송 대기 레코드를 로컬 journal(NDJSON, append-only)에 저장하고,
+    별도 스레드가 keep-alive Session 하나로 batch 단위 전송 (실패 시 exponential backoff).
+    {path}        : 전송 대기 레코드, 한 줄에 하나
+    {path}.offset : 전송 완료된 위치(byte offset)
+    {path}.rejected : 서버가 4xx 로 거부한 batch (다시 보내도 같은 결과라 재전송하지 않음, journal 과 같은 형식)
+    encode   : records -> (body bytes, headers), 없으면 JSON array
+    interval : 한 번 전송한 뒤 다음 전송까지 최소 간격 (초, 그동안 쌓인 레코드를 한 batch 로)
+    """
+
+    def __init__(self, path, url, headers=None, batch_size=500, timeout=10, max_backoff=300, encode=None, interval=0):
+        self.path = path
+        self.offset_path = path + '.offset'
+        self.rejected_path = path + '.rejected'
+        self.url = url
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.encode = encode
+        self.interval = interval
+        self.headers = headers
+        self.session = None # requests 는 전송 스레드에서 import (시작 시간)
+        self.sent = 0
+        self.failures = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._repair()
+        self._file = open(self.path, mode='a')
+        self._offset = self._read_offset()
+        if self._offset > os.path.getsize(self.path):
+            # offset 이 journal 끝보다 뒤 (비운 journal 에 예전 offset) -> 남은 레코드는 모두 미전송
+            self._write_offset(0)
+        self.thread = threading.Thread(target=self._drain, name='outbox', daemon=True)
+
+    def _repair(self):
+        # 쓰는 도중 전원이 끊겨 마지막 줄이 잘렸으면 잘린 부분 제거
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, mode='rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(max(0, size - 4096))
+            tail = f.read()
+            if tail.endswith(b'\n'):
+                return
+            cut = tail.rfind(b'\n')
+            f.truncate(size - len(tail) + cut + 1 if cut >= 0 else 0)
+
+    def _read_offset(self):
+        try:
+            with open(self.offset_path, mode='r') as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _write_offset(self, offset):
+        tmp_path = self.offset_path + '.tmp'
+        with open(tmp_path, mode='w') as f:
+            f.write(str(offset))
+        os.replace(tmp_path, self.offset_path)
+        self._offset = offset
+
+    def start(self):
+        self.thread.start()
+
+    def put(self, data):
+        """레코드 하나를 journal 에 기록 (fsync 후 반환)"""
+        line = json.dumps(data, ensure_ascii=False)
+        with self._lock:
+            self._file.write(f'{line}\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._wakeup.set()
+
+    def pending(self):
+        return os.path.getsize(self.path) - self._offset
+
+    def _read_batch(self):
+        records = []
+        with open(self.path, mode='rb') as f:
+            f.seek(self._offset)
+            end = self._offset
+            while len(records) < self.batch_size:
+                line = f.readline()
+                if not line.endswith(b'\n'):
+                    break
+                end += len(line)
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    print(f"Outbox: skipping broken record at {end - len(line)}")
+        return records, end
+
+    def _compact(self):
+        # 모두 전송했으면 journal 비우기
+        with self._lock:
+            if os.path.getsize(self.path) == self._offset:
+                # offset 을 먼저 0 으로: 그 사이에 죽으면 이미 보낸 레코드를 다시 보낼 뿐 (잃지 않음)
+                self._write_offset(0)
+                self._file.truncate(0)
+
+    @staticmethod
+    def _refused(resp):
+        # 408 (timeout), 429 (rate limit) 은 나중에 다시 보내면 되는 4xx
+        return 400 <= resp.status_code < 500 and resp.status_code not in (408, 429)
+
+    def _dead_letter(self, records, end, resp):
+        # 거부된 batch 를 {path}.rejected 로 옮기고 다음 batch 로 (막힌 batch 하나가 journal 전체를 세우지 않게)
+        with open(self.rejected_path, mode='a') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.rejected += len(records)
+        print(f"Outbox: {len(records)} records rejected ({resp.status_code}), moved to {self.rejected_path}: {resp.text[:200]}")
+        self._write_offset(end)
+
+    def _drain(self):
+        import requests
+        self.session = requests.Session()
+        if self.headers:
+            self.session.headers.update(self.headers)
+        backoff = 1
+        while True:
+            records, end = self._read_batch()
+            if not records:
+                if end != self._offset: # only broken lines
+                    self._write_offset(end)
+                self._compact()
+                self._wakeup.wait(60)
+                self._wakeup.clear()
+                continue
+            try:
+                if self.encode:
+                    body, headers = self.encode(records)
+                    resp = self.session.post(self.url, data=body, headers=headers, timeout=self.timeout)
+                else:
+                    resp = self.session.post(self.url, json=records, timeout=self.timeout)
+                if self._refused(resp):
+                    self._dead_letter(records, end, resp)
+                    backoff = 1
+                    continue
+                resp.raise_for_status()
+            except Exception as e:
+                self.failures += 1
+                print(f"Destination not Reachable ({len(records)} records queued): {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            backoff = 1
+            self.sent += len(records)
+            self._write_offset(end)
+            if self.interval and len(records) < self.batch_size:
+                time.sleep(self.interval)
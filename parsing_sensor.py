@@ -1,8 +1,14 @@
-from matplotlib.gridspec import GridSpec 
-import matplotlib.pyplot as plt 
+from edge_summary import WindowAggregator, encode_summaries 
+from segment_store import SegmentStore 
+from frame_decoder import FrameDecoder 
+from collections import deque 
 from datetime import datetime 
-import pandas as pd 
-import requests 
+from functools import partial 
+from history import to_epoch 
+from live_plot import LivePlot 
+from pipeline import Pipeline 
+from outbox import Outbox 
+import threading 
 import warnings 
 import serial 
 import time 
@@ -19,15 +25,37 @@ north_direction_start, north_direction_end = 18, 23
 atmospheric_pressure_start, atmospheric_pressure_end = 23, 29 
 rainfall_start, rainfall_end = 29, 36 
 voltage_start, voltage_end = 36, 40 
+FRAME_FIELDS = [ 
+    ('temp', temp_start, temp_end, float), 
+    ('humidity', humidity_start, humidity_end, float), 
+    ('ws', ws_start, ws_end, float), 
+    ('wd', wd_start, wd_end, int), 
+    ('north_direction', north_direction_start, north_direction_end, float), 
+    ('atmospheric_pressure', atmospheric_pressure_start, atmospheric_pressure_end, float), 
+    ('rainfall', rainfall_start, rainfall_end, float), 
+    ('voltage', voltage_start, voltage_end, float), 
+] 
+decoder = FrameDecoder(FRAME_FIELDS) # resyncs on '$', keeps partial frames between reads 
+frames = deque() 
  
 #####folder data save name (csv file, graph.png)#####
 DEV_ID = 'dev_06' 
+SENSOR_PORT = '/dev/ttyUSB0' 
 
 ########data save root###########
 current_dir = os.path.dirname(os.path.realpath(__file__))
 user_dir = f'sensor_data/{DEV_ID}.csv'
-DATA_PATH = os.path.join(current_dir, user_dir)
+DATA_PATH = os.path.join(current_dir, user_dir) # legacy single file, migrated to day segments at startup 
 #DATA_PATH = f'/home/tbcrew/Document/work_folder/sensor_data/{DEV_ID}.csv' 
+COLUMNS = ['timestamp', 'ip', 'temp', 'humidity', 'ws', 'wd', 'north_direction', 'atmospheric_pressure', 'rainfall', 'voltage'] 
+RETENTION_DAYS = 90 
+# sensor_data/{DEV_ID}/{YYYY-MM}/{DEV_ID}_{YYYY-MM-DD}.csv 
+store = SegmentStore(os.path.join(current_dir, 'sensor_data'), DEV_ID, COLUMNS, RETENTION_DAYS) 
+
+#######plot (last 180 samples)###########
+Save_path = os.path.join(current_dir, f'{DEV_ID}.png') 
+RENDER_EVERY = 0 # re-render png every N samples (0: never, the server dashboard draws from /series) 
+plot = LivePlot(Save_path, window=180, render_every=RENDER_EVERY) 
 
 ####### Save server ip setting#############
 # SERVER, PORT = '27.96.135.220', 4465 # 네이버 클라우드 
@@ -35,24 +63,73 @@ DATA_PATH = os.path.join(current_dir, user_dir)
 SERVER, PORT = '35.216.42.131', 4465 #GCP 
 url = f'http://{SERVER}:{PORT}/api/{DEV_ID}' 
 headers = {'Content-type': 'application/json', 'Accept': 'text/plain'} 
- 
+# unsent records are journaled here and replayed in batches to {url}/batch 
+OUTBOX_PATH = os.path.join(current_dir, 'sensor_data', f'{DEV_ID}.outbox') 
+outbox = Outbox(OUTBOX_PATH, f'{url}/batch', headers=headers) 
 
-#Server Setting init#
-def initialize(): 
-    time.sleep(5) 
-    print("Initilizing...") 
+#######upload mode####### 
+# 'raw': every sample to {url}/batch 
+# 'summary': only SUMMARY_WINDOW sec min/max/mean/last per field to {url}/summary every SUMMARY_UPLOAD_INTERVAL sec, 
+#            raw samples stay in the local segments (the open window at shutdown is not sent) 
+UPLOAD_MODE = 'raw' 
+SUMMARY_WINDOW = 300 # sec, the sensor sends a sample every 60 s (AT+AutoSend=60) 
+SUMMARY_UPLOAD_INTERVAL = 600 
+SUMMARY_FORMAT, SUMMARY_GZIP = 'json', True # 'json' | 'msgpack' (json if not installed; float64 makes it larger for 1-decimal readings) 
+summary = WindowAggregator(COLUMNS[2:], SUMMARY_WINDOW) 
+if UPLOAD_MODE == 'summary': 
+    encode = partial(encode_summaries, window=SUMMARY_WINDOW, columns=summary.columns, fmt=SUMMARY_FORMAT, compress=SUMMARY_GZIP) 
+    uplink = Outbox(os.path.join(current_dir, 'sensor_data', f'{DEV_ID}.summary.outbox'), f'{url}/summary', 
+                    headers=headers, encode=encode, interval=SUMMARY_UPLOAD_INTERVAL) 
+else: 
+    uplink = outbox 
+ 
+#######worker queue size (samples), stats print interval (sec)####### 
+WRITE_QUEUE, PLOT_QUEUE, UPLOAD_QUEUE = 1440, 180, 1440 
+STATS_INTERVAL = 600 
+
+####### public ip (last known value cached, refreshed in background)####### 
+IP_CACHE_PATH = os.path.join(current_dir, 'sensor_data', f'{DEV_ID}.ip') 
+public_ip = {'value': ''} # '' until the first lookup when there is no cache 
+
+def get_public_ip(): 
+    import requests # heavy import, only on the discovery thread 
     while True: 
         try: 
-            ip = requests.get("http://api64.ipify.org").text #server ip text data request
-            break 
-        except ConnectionError: #error
+            return requests.get("http://api64.ipify.org", timeout=10).text #server ip text data request
+        except requests.RequestException: #error
             print("No Internet Connection") 
             time.sleep(10) 
+ 
+def discover_ip(): 
+    ip = get_public_ip() 
+    if ip != public_ip['value']: 
+        os.makedirs(os.path.dirname(IP_CACHE_PATH), exist_ok=True) 
+        tmp_path = IP_CACHE_PATH + '.tmp' 
+        with open(tmp_path, mode='w') as f: 
+            f.write(ip) 
+        os.replace(tmp_path, IP_CACHE_PATH) 
+    public_ip['value'] = ip 
+    print(f"Public IP: {ip}") 
+ 
+def start_ip_discovery(): 
+    # records use the cached ip right away; the lookup (may wait for the network) runs on its own thread 
+    try: 
+        with open(IP_CACHE_PATH, mode='r') as f: 
+            public_ip['value'] = f.read().strip() 
+    except FileNotFoundError: 
+        pass 
+    threading.Thread(target=discover_ip, name='public_ip', daemon=True).start() 
+    return public_ip 
+ 
+#Server Setting init#
+def initialize(): 
+    print("Initilizing...") 
+    ip = start_ip_discovery() 
              
     while True: 
         try: 
             print("Connecting to sensor...") 
-            device = serial.Serial('/dev/ttyUSB0', 9600, timeout=2) #atmosphere sensor serial uart setting 
+            device = serial.Serial(SENSOR_PORT, 9600, timeout=2) #atmosphere sensor serial uart setting 
             message = bytes("AT+AutoSend=60".encode()) #데이터 60초 마다 자동으로 전송하라는 의미, 바이트코드로 형식변환
             length = device.write(message) #변환된 바이트 코드 센서에 전송 
             result = device.read(100)  # 더 긴 데이터 길이로 설정해볼 수 있습니다. (시리얼 포트를 통해 100바이트의 데이터 읽어오기)
@@ -73,166 +150,70 @@ def initialize():
             time.sleep(10) 
 
 #ip주소와 읽어온 데이터 확인 
-    print(ip, result) 
-    time.sleep(3) 
+    print(ip['value'] or 'ip unknown (lookup pending)', result) 
      
-    if not os.path.exists(DATA_PATH): 
-        columns = 'timestamp,ip,temp,humidity,ws,wd,north_direction,atmospheric_pressure,rainfall,voltage' 
-        with open(DATA_PATH, mode='a') as f: 
-            f.writelines(f"{columns}\n") 
+    store.migrate(DATA_PATH) # one-time split of the old single csv 
+    if RENDER_EVERY: 
+        plot.seed(store.tail(180)) 
      
-    for _ in range(2): # ignore 2 old data 
-        try: 
-            _ = parse(device, ip)  
-        except: 
-            time.sleep(3) 
+    # drop data buffered before the AutoSend reply instead of waiting out 2 frames 
+    device.reset_input_buffer() 
     return device, ip 
  
 
 
 
 def parse(device, ip): 
-    ret = device.read(43).decode()
-
-    if len(ret) and ret.startswith('$'): 
-
-        try: 
-
-            data = { 
-                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 
-                'ip': ip, 
-                'temp': float(ret[temp_start:temp_end]), 
-                'humidity': float(ret[humidity_start:humidity_end]), 
-                'ws': float(ret[ws_start:ws_end]), 
-                'wd': int(ret[wd_start:wd_end]), 
-                'north_direction': float(ret[north_direction_start:north_direction_end]), 
-                'atmospheric_pressure': float(ret[atmospheric_pressure_start:atmospheric_pressure_end]), 
-                'rainfall': float(ret[rainfall_start:rainfall_end]), 
-                'voltage': float(ret[voltage_start:voltage_end]) 
-            } 
-
-        except IndexError: 
-
-            data = parse(device, ip) 
-    else: 
-
-        data = parse(device, ip) 
-        
+    while not frames: 
+        frames.extend(decoder.feed(device.read(device.in_waiting or 1))) 
+    data = {'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 'ip': ip['value']} 
+    data.update(frames.popleft()) 
     return data 
  
 def write(data): 
-    line = '' 
-    for value in data.values(): 
-        line += str(value) + ',' 
-    with open(DATA_PATH, mode='a') as f: 
-        f.writelines(f"{line[:-1]}\n") # removing the last char ',' 
+    # append to today's segment; segments older than RETENTION_DAYS are unlinked at day rollover 
+    store.append(data) 
     return 
  
-def remove_old(): 
-    with open(DATA_PATH, mode='r+') as f: 
-        lines = f.readlines() 
-        if len(lines) > 1440 * 90: 
-            del lines[1:1+1440] # removing 1 day 
-            f.seek(1) 
-            f.truncate() 
-            for line in lines: 
-                f.writelines(line) 
+def make_plot(data): 
+    # ring buffer + persistent figure, png re-rendered every RENDER_EVERY samples 
+    plot.update(data) 
     return 
  
-def make_plot(): 
-    #plt.savefig(f'sensor_data/{DEV_ID}.jpg', dpi=150) 
-    Save_dir = os.path.join(current_dir, 'display_server', 'static') #상대경로
-    Save_path = os.path.join(current_dir, f'{DEV_ID}.png')
-    # 디렉토리가 존재하지 않으면 생성
-    if not os.path.exists(Save_dir):
-        os.makedirs(Save_dir)
-    
-    data = pd.read_csv(DATA_PATH)  
-    if len(data) > 180: 
-        data = data[-180:] 
-    gs = GridSpec(3, 3) 
-    plt.rcParams['figure.figsize'] = [18, 12] 
-    fontdict = {'fontsize': 16, 'fontweight': 'bold'} 
-    _xticks = list(range(0, 181, 20)) 
-    _xlim = [-10, 190] 
-    time = datetime.now().strftime("%Y-%m-%d %H:%M") 
-    plt.suptitle(f'Last Update: {time}', fontweight='bold', fontsize=24) 
- 
-    temp = data['temp'].values 
-    plt.subplot(gs[0, 0]) 
-    plt.title("Temperature ('C)", fontdict=fontdict) 
-    plt.xlim(_xlim) 
-    plt.xticks(_xticks) 
-    plt.plot(temp, color='C3') 
- 
-    humidity = data['humidity'].values 
-    plt.subplot(gs[0, 1]) 
-    plt.title("Humidity (%)", fontdict=fontdict) 
-    plt.xlim(_xlim) 
-    plt.xticks(_xticks) 
-    plt.plot(humidity, color='C0') 
- 
-    ws = data['ws'].values 
-    plt.subplot(gs[0, 2]) 
-    plt.title("Wind Speed (m/s)", fontdict=fontdict) 
-    plt.xlim(_xlim) 
-    plt.xticks(_xticks) 
-    plt.plot(ws, color='C1') 
- 
-    wd = data['wd'].values 
-    plt.subplot(gs[1, 0]) 
-    plt.title("Wind Direction", fontdict=fontdict) 
-    plt.xlim(_xlim) 
-    plt.xticks(_xticks) 
-    plt.plot(wd, color='C2') 
- 
-    hpa = data['atmospheric_pressure'].values 
-    plt.subplot(gs[1, 1]) 
-    plt.title("Atmospheric Pressure (hPa)", fontdict=fontdict) 
-    plt.xlim(_xlim) 
-    plt.xticks(_xticks) 
-    plt.plot(hpa, color='C4') 
- 
-    rainfall = data['rainfall'].values 
-    plt.subplot(gs[1, 2]) 
-    plt.title("Rainfall (mm)", fontdict=fontdict) 
-    plt.xlim(_xlim) 
-    plt.xticks(_xticks) 
-    rainfall_min, rainfall_max = rainfall.min(), rainfall.max() 
-    space = (rainfall_max - rainfall_min + 1e-2) / 20 
-    rainfall_ylim = [rainfall_min - space, rainfall_max + space] 
-    plt.ylim(rainfall_ylim)     
-    plt.plot(rainfall, color='C9') 
- 
-    power_generation = data['ws'].values * 20 
-    plt.subplot(gs[2, :]) 
-    plt.title("Power Generation (Wh)", fontdict=fontdict) 
-    plt.xlim(_xlim) 
-    plt.xticks(_xticks) 
-    plt.plot(power_generation, color='r') 
-     
-    plt.subplots_adjust(wspace=0.3, hspace=0.3) 
-    plt.savefig(Save_path, dpi=150, format='png') 
-    print(f"Plot saved to {Save_path}")
+def upload(data): 
+    # durable local append; the outbox thread does the actual POST 
+    if UPLOAD_MODE == 'summary': 
+        row = summary.add(to_epoch(data['timestamp']), data) 
+        if row: 
+            uplink.put({'ip': data['ip'], 'row': row}) 
+    else: 
+        outbox.put(data) 
     return 
  
 if __name__ == '__main__': 
     # initilizing 
     device, ip = initialize() 
  
-    # start parsing 
+    # disk write / plot / upload run on their own threads 
+    pipeline = Pipeline() 
+    pipeline.add_stage('write', write, maxsize=WRITE_QUEUE) 
+    if RENDER_EVERY: # local png is opt-in 
+        pipeline.add_stage('plot', make_plot, maxsize=PLOT_QUEUE) 
+    pipeline.add_stage('upload', upload, maxsize=UPLOAD_QUEUE) 
+    pipeline.start() 
+    uplink.start() 
+    last_report = time.time() 
+ 
+    # start parsing (this thread only reads the serial port) 
     while True: 
         try: 
             data = parse(device, ip) 
         except: 
             time.sleep(3) 
             continue 
-        remove_old() 
-        write(data) 
-        make_plot() 
+        pipeline.publish(data) 
         print(data) 
-        try: 
-            requests.post(url, headers=headers, json=data, timeout=5) 
-        except: 
-            print("Destination not Reachable") 
-            time.sleep(10)                                                                                                                  
+        if time.time() - last_report >= STATS_INTERVAL: 
+            print(f"Pipeline: {pipeline.stats()}") # queue depth / dropped per stage 
+            print(f"Outbox: sent {uplink.sent}, pending {uplink.pending()} bytes, failures {uplink.failures}, rejected {uplink.rejected}") 
+            last_report = time.time() 
@@ -0,0 +1,69 @@
+import threading
+import queue
+
+
+class Stage:
+    """bounded queue + 전용 worker thread 하나. 큐가 가득 차면 새 샘플은 버리고 dropped 를 센다"""
+
+    def __init__(self, name, handler, maxsize):
+        self.name = name
+        self.handler = handler
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.thread = threading.Thread(target=self._run, name=f'stage-{name}', daemon=True)
+
+    def offer(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            record = self.queue.get()
+            if record is None: # stop
+                break
+            try:
+                self.handler(record)
+                self.processed += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"[{self.name}] Error: {e}")
+
+    def stats(self):
+        return {'depth': self.queue.qsize(), 'processed': self.processed,
+                'dropped': self.dropped, 'errors': self.errors}
+
+
+class Pipeline:
+    """
+    시리얼 읽기 루프는 publish() 만 호출하고, 저장/그래프/업로드는 각자의 스레드에서 처리.
+    느린 단계(네트워크, 렌더링)가 있어도 센서 읽기가 멈추지 않는다.
+    """
+
+    def __init__(self):
+        self.stages = []
+
+    def add_stage(self, name, handler, maxsize=100):
+        stage = Stage(name, handler, maxsize)
+        self.stages.append(stage)
+        return stage
+
+    def start(self):
+        for stage in self.stages:
+            stage.thread.start()
+
+    def publish(self, record):
+        for stage in self.stages:
+            stage.offer(record)
+
+    def stats(self):
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    def stop(self, timeout=None):
+        for stage in self.stages:
+            stage.queue.put(None)
+        for stage in self.stages:
+            stage.thread.join(timeout)
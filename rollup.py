@@ -0,0 +1,135 @@
+from history import query, scan, last_line
+import threading
+import math
+import time
+
+
+BUCKETS = {'5m': 300, '1h': 3600, '1d': 86400}
+STATS = ('min', 'max', 'mean', 'last')
+CIRCULAR = ('wd',) # 풍향은 원형 평균
+TZ_OFFSET = -time.timezone # 1d 구간을 local 자정 기준으로 나눔
+ROLLUP_ROOT = 'sensor_data/rollup'
+
+
+def bucket_start(ts, size):
+    return ts - (ts + TZ_OFFSET) % size
+
+
+class _Bucket:
+    __slots__ = ('start', 'count', 'min', 'max', 'sum', 'last', 'sin', 'cos')
+
+    def __init__(self, start, n):
+        self.start = start
+        self.count = 0
+        self.min = [math.inf] * n
+        self.max = [-math.inf] * n
+        self.sum = [0.0] * n
+        self.last = [None] * n
+        self.sin = [0.0] * n
+        self.cos = [0.0] * n
+
+
+class Rollups:
+    """
+    기기별 5m/1h/1d 구간 집계(min/max/mean/last)를 수신 시 증분 갱신.
+    닫힌 구간은 sensor_data/rollup/{dev_id}_{bucket}.csv 에 한 줄씩 추가하고 (원본과 같은 희소 인덱스 사용),
+    열린 구간은 메모리에 유지. 재시작 후 처음 들어온 기기는 마지막으로 저장된 구간 이후를 원본에서 다시 계산.
+    """
+
+    def __init__(self, fields, pool, index, root=ROLLUP_ROOT, buckets=BUCKETS):
+        self.fields = list(fields)
+        self.pool = pool
+        self.index = index
+        self.root = root
+        self.buckets = buckets
+        self.columns = ['start', 'count'] + [f'{f}_{s}' for f in self.fields for s in STATS]
+        self.header = ','.join(self.columns) + '\n'
+        self._circular = [f in CIRCULAR for f in self.fields]
+        self._open = {} # (dev_id, bucket) -> _Bucket
+        self._loaded = set()
+        self._lock = threading.Lock()
+
+    def path(self, dev_id, name):
+        return f'{self.root}/{dev_id}_{name}.csv'
+
+    def _values(self, b):
+        # header 순서의 값 목록
+        values = [b.start, b.count]
+        for i, circular in enumerate(self._circular):
+            if circular:
+                mean = round(math.degrees(math.atan2(b.sin[i], b.cos[i])), 3) % 360
+            else:
+                mean = round(b.sum[i] / b.count, 3)
+            values += [b.min[i], b.max[i], mean, b.last[i]]
+        return values
+
+    def _close(self, dev_id, name, b):
+        if not b.count:
+            return
+        line = ','.join(map(str, self._values(b)))
+        data_path = self.path(dev_id, name)
+        offset = self.pool.append((dev_id, name), data_path, f'{line}\n', header=self.header)
+        self.index.note(data_path, offset, [line])
+
+    def _add(self, dev_id, data, only=None):
+        ts = data['timestamp']
+        for name, size in self.buckets.items():
+            if only is not None and ts < only[name]:
+                continue
+            b = self._open.get((dev_id, name))
+            if b is None or ts >= b.start + size:
+                if b is not None:
+                    self._close(dev_id, name, b)
+                b = self._open[(dev_id, name)] = _Bucket(bucket_start(ts, size), len(self.fields))
+            elif ts < b.start: # late record for an already closed bucket
+                continue
+            b.count += 1
+            for i, f in enumerate(self.fields):
+                v = data[f]
+                if v < b.min[i]:
+                    b.min[i] = v
+                if v > b.max[i]:
+                    b.max[i] = v
+                b.sum[i] += v
+                b.last[i] = v
+                if self._circular[i]:
+                    b.sin[i] += math.sin(math.radians(v))
+                    b.cos[i] += math.cos(math.radians(v))
+
+    def _load(self, dev_id, before):
+        # 마지막으로 저장된 구간 다음부터 before 직전까지 원본으로 열린 구간 복원
+        resume = {}
+        for name, size in self.buckets.items():
+            try:
+                start = int(last_line(self.path(dev_id, name)).split(',', 1)[0]) + size
+            except (FileNotFoundError, ValueError): # no rollups yet, or header only
+                start = bucket_start(before, size)
+            resume[name] = start
+        start = min(resume.values())
+        if start < before:
+            for data in query(self.index, dev_id, start, before - 1, ['timestamp'] + self.fields):
+                self._add(dev_id, data, only=resume)
+        self._loaded.add(dev_id)
+
+    def add(self, dev_id, records):
+        """records: 검증된 레코드(dict) 목록, 시간 순서"""
+        with self._lock:
+            if dev_id not in self._loaded:
+                self._load(dev_id, records[0]['timestamp'])
+            for data in records:
+                self._add(dev_id, data)
+
+    def aggregate(self, dev_id, name, start, end, fields=None):
+        """start ~ end 구간 집계를 컬럼 단위 dict 로 반환 {'start': [...], 'count': [...], 'temp_min': [...], ...}"""
+        fields = [f for f in fields or self.fields if f in self.fields]
+        columns = ['start', 'count'] + [f'{f}_{s}' for f in fields for s in STATS]
+        result = {c: [] for c in columns}
+        rows = list(scan(self.index, self.path(dev_id, name), start, end, columns))
+        with self._lock:
+            b = self._open.get((dev_id, name))
+            if b is not None and b.count and start <= b.start <= end:
+                rows.append(dict(zip(self.columns, self._values(b))))
+        for row in rows:
+            for c in columns:
+                result[c].append(row[c])
+        return result
@@ -0,0 +1,173 @@
+from history import to_epoch
+from rollup import TZ_OFFSET
+from operator import itemgetter
+import numpy as np
+import time
+
+# timestamp 로 받는 epoch 범위 (음수 / '9999-12-31 23:59:59' 이후는 거부, int64 변환 전에 확인)
+EPOCH_MIN = 0
+EPOCH_MAX = 253402300799
+# 이 길이 이하의 숫자 문자열은 int64 로 바로 변환해도 overflow 없음
+EPOCH_DIGITS = 18
+
+
+def check_epoch(value):
+    """timestamp 값 -> epoch int, 형식이나 범위가 틀리면 ValueError (validate / validate_batch 공통)"""
+    epoch = to_epoch(value)
+    if not EPOCH_MIN <= epoch <= EPOCH_MAX:
+        raise ValueError(f'timestamp out of range: {value!r}')
+    return epoch
+
+
+class Schema:
+    """
+    레코드 검증 규칙을 한 번 compile 해 두고 단건/배치 검증에 재사용.
+    keys/types: 필드 이름과 type (float 필드는 int 도 허용, bool 은 거부)
+    timestamp 필드는 epoch int 와 '%Y-%m-%d %H:%M:%S'(local time) 문자열을 모두 받아서 epoch int 로 정규화.
+    결과 레코드는 항상 keys 순서의 새 dict, 거부 사유는 필드별 {'ws': 'expected float, got str', ...}
+    """
+
+    def __init__(self, keys, types, timestamp='timestamp', dev_prefix='dev_'):
+        self.keys = list(keys)
+        self.types = list(types)
+        self.key_set = frozenset(self.keys)
+        self.timestamp = timestamp
+        self.dev_prefix = dev_prefix
+        self._get = itemgetter(*self.keys)
+        self._ts = self.keys.index(timestamp)
+        # 필드별로 허용하는 type tuple
+        self._allowed = [(int, str) if k == timestamp else (float, int) if t is float else (t,)
+                         for k, t in zip(self.keys, self.types)]
+        # 배치 검증은 '%Y-%m-%d %H:%M:%S' 를 numpy datetime64 로 한 번에 변환 (local time = UTC + TZ_OFFSET,
+        # 서머타임이 있는 지역이면 to_epoch 로 하나씩)
+        self._vector_time = not time.daylight
+
+    def _field_reasons(self, data):
+        # 틀린 필드만 {필드: 사유}
+        if not isinstance(data, dict):
+            return {'record': 'not a json object'}
+        reasons = {k: 'missing' for k in self.keys if k not in data}
+        reasons.update({k: 'unexpected' for k in data if k not in self.key_set})
+        if reasons:
+            return reasons
+        for k, allowed, value in zip(self.keys, self._allowed, self._get(data)):
+            if type(value) not in allowed:
+                reasons[k] = f'expected {allowed[0].__name__}, got {type(value).__name__}'
+        if not reasons:
+            try:
+                check_epoch(data[self.timestamp])
+            except ValueError:
+                reasons[self.timestamp] = 'bad timestamp'
+        return reasons
+
+    def _reason(self, reasons):
+        # check_batch 의 기존 요약 형식 ('keys' / 'type: ws,wd' / 'not a json object')
+        if 'record' in reasons:
+            return reasons['record']
+        if any(r in ('missing', 'unexpected') for r in reasons.values()):
+            return 'keys'
+        return 'type: ' + ','.join(reasons)
+
+    def _row(self, values, ts):
+        row = dict(zip(self.keys, values))
+        row[self.timestamp] = ts
+        for k, t in zip(self.keys, self.types):
+            if t is float:
+                row[k] = float(row[k])
+        return row
+
+    def validate(self, dev_id, data):
+        """레코드 하나 -> (정규화된 레코드 또는 None, 필드별 사유 dict)"""
+        if not dev_id.startswith(self.dev_prefix):
+            return None, {'dev_id': 'dev_id'}
+        reasons = self._field_reasons(data)
+        if reasons:
+            return None, reasons
+        values = self._get(data)
+        return self._row(values, check_epoch(values[self._ts])), {}
+
+    def _epochs(self, column):
+        # timestamp column (int/str 혼합) -> (epoch int64 배열, 변환 가능 여부 bool 배열)
+        n = len(column)
+        types = np.fromiter(map(type, column), dtype=object, count=n)
+        is_int, is_str = types == int, types == str
+        epochs = np.zeros(n, dtype=np.int64)
+        ok = is_int.copy()
+        if is_int.any():
+            # int64 범위 밖의 int 는 astype 에서 OverflowError -> 먼저 python 비교로 걸러냄
+            ints = np.array(column, dtype=object)[is_int]
+            in_range = ((ints >= EPOCH_MIN) & (ints <= EPOCH_MAX)).astype(bool)
+            where = np.flatnonzero(is_int)
+            epochs[where[in_range]] = ints[in_range].astype(np.int64)
+            ok[where[~in_range]] = False
+        if is_str.any():
+            strings = np.array(column, dtype=object)[is_str].astype(str)
+            digits = np.char.isdigit(strings)
+            numeric = digits & (np.char.str_len(strings) <= EPOCH_DIGITS)
+            parsed = np.zeros(len(strings), dtype=np.int64)
+            parsed_ok = numeric.copy()
+            parsed[numeric] = strings[numeric].astype(np.int64)
+            for i in np.flatnonzero(digits & ~numeric): # 아주 긴 숫자 문자열은 하나씩
+                try:
+                    parsed[i], parsed_ok[i] = check_epoch(str(strings[i])), True
+                except ValueError:
+                    pass
+            rest = ~digits
+            try:
+                if not self._vector_time:
+                    raise ValueError
+                times = strings[rest].astype('datetime64[s]').astype(np.int64) - TZ_OFFSET
+                # 'YYYY-MM-DD' 등 다른 형식도 datetime64 로는 읽히므로 길이/구분자까지 확인
+                well_formed = (np.char.str_len(strings[rest]) == 19) & (np.char.find(strings[rest], ' ') == 10)
+                parsed[rest], parsed_ok[rest] = times, well_formed
+            except ValueError: # 잘못된 문자열이 섞여 있으면 하나씩
+                for i in np.flatnonzero(rest):
+                    try:
+                        parsed[i], parsed_ok[i] = check_epoch(str(strings[i])), True
+                    except ValueError:
+                        pass
+            epochs[is_str], ok[is_str] = parsed, parsed_ok
+        ok &= (epochs >= EPOCH_MIN) & (epochs <= EPOCH_MAX)
+        return epochs, ok
+
+    def validate_batch(self, dev_id, records):
+        """
+        여러 레코드를 한 번에 검증 -> (정규화된 레코드 list, 거부 목록 [{'index', 'reason', 'fields'}])
+        key 집합이 맞는 레코드를 필드별 column 으로 모아 type / timestamp 를 numpy 연산으로 검사
+        """
+        n = len(records)
+        if not dev_id.startswith(self.dev_prefix):
+            return [], [{'index': i, 'reason': 'dev_id', 'fields': {}} for i in range(n)]
+        key_set = self.key_set
+        shaped = np.fromiter((type(r) is dict and r.keys() == key_set for r in records), dtype=bool, count=n)
+        candidates = np.flatnonzero(shaped)
+        bad = np.zeros((len(candidates), len(self.keys)), dtype=bool)
+        columns = list(zip(*map(self._get, (records[i] for i in candidates.tolist())))) if len(candidates) else []
+        for j, (column, allowed) in enumerate(zip(columns, self._allowed)):
+            if j == self._ts:
+                epochs, ok = self._epochs(column)
+                bad[:, j] = ~ok
+                columns[j] = epochs.tolist()
+                continue
+            kinds = set(map(type, column))
+            if int in kinds and allowed[0] is float: # int -> float
+                columns[j] = [float(v) if type(v) is int else v for v in column]
+            if kinds.issubset(allowed): # 대부분: 모두 맞는 type, mask 계산 생략
+                continue
+            types = np.fromiter(map(type, column), dtype=object, count=len(column))
+            ok = types == allowed[0]
+            for t in allowed[1:]:
+                ok |= types == t
+            bad[:, j] = ~ok
+
+        # 통과한 레코드만 column 에서 다시 dict 로 (keys 순서)
+        row_bad = bad.any(axis=1)
+        keys = self.keys
+        valid = [dict(zip(keys, values)) for values, is_bad in zip(zip(*columns), row_bad.tolist()) if not is_bad]
+        rejected = []
+        rejected_at = {int(i): None for i in np.flatnonzero(~shaped)}
+        rejected_at.update({int(candidates[pos]): None for pos in np.flatnonzero(row_bad)})
+        for i in sorted(rejected_at):
+            reasons = self._field_reasons(records[i])
+            rejected.append({'index': i, 'reason': self._reason(reasons), 'fields': reasons})
+        return valid, rejected
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+import glob
+import os
+
+
+def day_of(timestamp):
+    """'%Y-%m-%d %H:%M:%S' 문자열 또는 epoch(int/str) -> 'YYYY-MM-DD'"""
+    if isinstance(timestamp, str) and not timestamp.isdigit():
+        return timestamp[:10]
+    return datetime.fromtimestamp(int(timestamp)).strftime('%Y-%m-%d')
+
+
+class SegmentStore:
+    """
+    하루 단위 append-only CSV 세그먼트 저장소
+    {root}/{dev_id}/{YYYY-MM}/{dev_id}_{YYYY-MM-DD}.csv (parsing_sensor_241030.py 와 같은 구조)
+    보관 기간이 지난 데이터는 파일 단위로 삭제하므로 샘플당 비용이 파일 크기와 무관하다.
+    """
+
+    def __init__(self, root, dev_id, columns, retention_days=90):
+        self.root = root
+        self.dev_id = dev_id
+        self.columns = list(columns)
+        self.retention_days = retention_days
+        self._day = None
+        self._file = None
+
+    def segment_path(self, day):
+        return os.path.join(self.root, self.dev_id, day[:7], f'{self.dev_id}_{day}.csv')
+
+    def segments(self):
+        """세그먼트 경로 목록 (오래된 순)"""
+        pattern = os.path.join(self.root, self.dev_id, '*', f'{self.dev_id}_*.csv')
+        return sorted(glob.glob(pattern), key=os.path.basename)
+
+    def _open(self, day):
+        self.close()
+        path = self.segment_path(day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, mode='a', buffering=1) # line buffered
+        if is_new:
+            self._file.write(','.join(self.columns) + '\n')
+        self._day = day
+
+    def append_line(self, day, line):
+        if day != self._day:
+            self._open(day)
+            self.prune(day)
+        self._file.write(line)
+
+    def append(self, data):
+        line = ','.join(str(value) for value in data.values())
+        self.append_line(day_of(data['timestamp']), f'{line}\n')
+
+    def tail(self, n):
+        """최근 n개 샘플을 dict(문자열 값) 리스트로 반환 - 최신 세그먼트부터 필요한 만큼만 읽음"""
+        rows = []
+        if n <= 0:
+            return rows
+        for path in reversed(self.segments()):
+            with open(path, mode='r') as f:
+                f.readline() # header
+                lines = [line for line in f if line.strip()]
+            rows[:0] = lines[-(n - len(rows)):]
+            if len(rows) >= n:
+                break
+        return [dict(zip(self.columns, line.rstrip('\n').split(','))) for line in rows]
+
+    def prune(self, today=None):
+        """보관 기간(retention_days)이 지난 세그먼트 파일 삭제 - 날짜가 바뀔 때만 호출됨"""
+        today = today or datetime.now().strftime('%Y-%m-%d')
+        cutoff = datetime.strptime(today, '%Y-%m-%d') - timedelta(days=self.retention_days)
+        cutoff = f'{self.dev_id}_{cutoff:%Y-%m-%d}.csv'
+        for path in self.segments():
+            if os.path.basename(path) >= cutoff:
+                break
+            os.remove(path)
+            month_dir = os.path.dirname(path)
+            if not os.listdir(month_dir):
+                os.rmdir(month_dir)
+
+    def migrate(self, legacy_path):
+        """기존 단일 CSV(sensor_data/{DEV_ID}.csv)를 일별 세그먼트로 한 번만 분할"""
+        if not os.path.exists(legacy_path):
+            return 0
+        count = 0
+        with open(legacy_path, mode='r') as f:
+            f.readline() # header
+            for line in f:
+                if not line.strip():
+                    continue
+                if not line.endswith('\n'):
+                    line += '\n'
+                self.append_line(day_of(line.split(',', 1)[0]), line)
+                count += 1
+        self.close()
+        os.replace(legacy_path, legacy_path + '.migrated')
+        print(f"Migrated {count} rows from {legacy_path}")
+        return count
+
+    def close(self):
+        if self._file:
+            self._file.close()
+        self._file = None
+        self._day = None
@@ -1,8 +1,32 @@
 from flask import Flask, request, Response
-from utils import read_data, check_data, update_data
+from utils import read_data, check_data, update_data, check_batch, update_batch, read_rollups, index, KEYS
+from utils import hub, subscribe, check_summary, update_summary, read_summary, check_bms, update_bms, BMS_ROOT
+from rollup import BUCKETS
+from edge_summary import SUMMARY_WINDOWS
+from history import query, to_epoch
+from asof import asof_join, columns, read_bms_log, last_bms_timestamp
+from dashboard import PlotCache, panel_series
+from live_plot import WINDOW
+import orjson
+import gzip
+import time
+import os
 
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
-app = Flask(__name__)
+# edge 가 POST /api/<dev_id>/bms 로 올린 BMS 일별 로그는 {BMS_ROOT}/{dev_id}/bms_data_log_YYYY-MM-DD.csv (utils.py)
+BMS_FIELDS = 'Pack Voltage,Pack Current,SOC'
+STREAM_MAX_CLIENTS = 8 # 프로세스당 /stream 연결 수 (연결마다 요청 스레드 하나를 계속 씀)
+STREAM_KEEPALIVE = 15 # 초, 새 레코드가 없으면 주석 줄을 보내서 연결 유지
+PLOT_MAX_WINDOW = 1440 # /plot.png 의 limit 상한 (샘플 수)
+
+plots = PlotCache()
+
+# /static/{dev_id}.jpg (예전 PNG/JPG), /dashboard/{dev_id} (브라우저에서 /series 로 그림)
+app = Flask(__name__, static_folder='display_server/static')
 
 
 @app.route('/api/<string:dev_id>', methods=['GET'])
@@ -21,16 +45,221 @@ def get(dev_id):
 def post(dev_id):
     data = request.get_json()
     if data:
-        is_valid = check_data(dev_id, data)
+        record = check_data(dev_id, data)
     else:
-        is_valid = False
-    if is_valid:
-        update_data(dev_id, data)
+        record = None
+    if record:
+        update_data(dev_id, record)
         resp = Response("Updated", status=200)
     else:
         resp = Response(status=404)
     return resp
 
+@app.route('/api/<string:dev_id>/batch', methods=['POST'])
+def post_batch(dev_id):
+    # JSON array 또는 NDJSON(application/x-ndjson, 한 줄에 레코드 하나)
+    if request.mimetype == 'application/x-ndjson':
+        records = []
+        for line in request.get_data().splitlines():
+            if line.strip():
+                try:
+                    records.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    records.append(None)
+    else:
+        records = request.get_json(silent=True)
+    if not isinstance(records, list):
+        return Response(status=404)
+    valid, rejected = check_batch(dev_id, records)
+    update_batch(dev_id, valid)
+    result = {'accepted': len(valid), 'rejected': rejected}
+    return Response(orjson.dumps(result), status=200, mimetype='application/json')
+
+@app.route('/api/<string:dev_id>/summary', methods=['POST'])
+def post_summary(dev_id):
+    # edge 집계 모드 (edge_summary.py): application/msgpack 또는 application/json, Content-Encoding: gzip 가능
+    # 원본 레코드가 없으므로 GET /api/<dev_id> 와 /stream 은 요약의 *_last 값으로 갱신,
+    # history / aggregate / asof / series / plot.png 그래프는 원본 레코드 기준이라 이 기기들은 비어 있음 (GET /summary 사용)
+    body = request.get_data()
+    try:
+        if request.content_encoding == 'gzip':
+            body = gzip.decompress(body)
+        if request.mimetype == 'application/msgpack':
+            if msgpack is None:
+                return Response(status=415)
+            payload = msgpack.unpackb(body)
+        else:
+            payload = orjson.loads(body)
+    except (OSError, EOFError, ValueError): # 깨진 gzip / msgpack / json
+        return Response(status=400)
+    window, rows, rejected = check_summary(dev_id, payload)
+    if rejected: # 다시 보내도 같은 결과 -> 4xx 로 edge Outbox 가 재전송하지 않게 (outbox.py)
+        result = {'accepted': 0, 'rejected': rejected}
+        return Response(orjson.dumps(result), status=400, mimetype='application/json')
+    update_summary(dev_id, window, rows)
+    return Response(orjson.dumps({'accepted': len(rows)}), status=200, mimetype='application/json')
+
+@app.route('/api/<string:dev_id>/bms', methods=['POST'])
+def post_bms(dev_id):
+    # edge 의 BMS pack 로그 (acquisition.py): JSON array [{'Timestamp', 'Pack Voltage', ...}] -> /asof, plot.png 의 측정 전력
+    records = request.get_json(silent=True)
+    if not isinstance(records, list):
+        return Response(status=400)
+    rows, rejected = check_bms(dev_id, records)
+    written = update_bms(dev_id, rows)
+    result = {'accepted': len(rows), 'duplicate': len(rows) - written, 'rejected': rejected}
+    return Response(orjson.dumps(result), status=200, mimetype='application/json')
+
+@app.route('/api/<string:dev_id>/summary', methods=['GET'])
+def summary(dev_id):
+    # ?window=300 &from=&to= (기본: 최근 24시간) &fields=temp,ws -> rollup 과 같은 컬럼 단위 JSON
+    try:
+        window = int(request.args.get('window', 300))
+        end = to_epoch(request.args.get('to') or int(time.time()))
+        start = to_epoch(request.args.get('from') or end - 86400)
+    except ValueError:
+        return Response(status=400)
+    if window not in SUMMARY_WINDOWS:
+        return Response(status=400)
+    fields = request.args.get('fields')
+    fields = fields.split(',') if fields else None
+    result = read_summary(dev_id, window, start, end, fields)
+    return Response(orjson.dumps(result), status=200, mimetype='application/json')
+
+@app.route('/api/<string:dev_id>/history', methods=['GET'])
+def history(dev_id):
+    # ?from=&to= (epoch 또는 'YYYY-MM-DD HH:MM:SS', 기본: 최근 24시간) &fields=temp,ws
+    # 원본 레코드만 (edge 집계 모드 기기는 GET /summary)
+    try:
+        end = to_epoch(request.args.get('to') or int(time.time()))
+        start = to_epoch(request.args.get('from') or end - 86400)
+    except ValueError:
+        return Response(status=400)
+    fields = request.args.get('fields')
+    if fields:
+        fields = ['timestamp'] + [k for k in fields.split(',') if k != 'timestamp']
+        if any(k not in KEYS for k in fields):
+            return Response(status=400)
+    rows = query(index, dev_id, start, end, fields)
+    return Response((orjson.dumps(row) + b'\n' for row in rows), status=200, mimetype='application/x-ndjson')
+
+@app.route('/api/<string:dev_id>/aggregate', methods=['GET'])
+def aggregate(dev_id):
+    # ?bucket=5m|1h|1d &from=&to= (기본: 최근 180 구간) &fields=temp,ws
+    # 원본 레코드로 만든 rollup 만 (edge 집계 모드 기기의 구간 요약은 GET /summary?window=)
+    bucket = request.args.get('bucket', '1h')
+    if bucket not in BUCKETS:
+        return Response(status=400)
+    try:
+        end = to_epoch(request.args.get('to') or int(time.time()))
+        start = to_epoch(request.args.get('from') or end - 180 * BUCKETS[bucket])
+    except ValueError:
+        return Response(status=400)
+    fields = request.args.get('fields')
+    fields = fields.split(',') if fields else None
+    result = read_rollups(dev_id, bucket, start, end, fields)
+    return Response(orjson.dumps(result), status=200, mimetype='application/json')
+
+@app.route('/api/<string:dev_id>/asof', methods=['GET'])
+def asof(dev_id):
+    # ?from=&to= (기본: 최근 24시간) &fields=ws &bms_fields=Pack Current,SOC &tolerance=300 (초)
+    # 기상 레코드마다 직전 BMS 샘플을 붙인 컬럼 단위 JSON (tolerance 보다 오래되면 null), edge 집계 모드 기기는 비어 있음
+    try:
+        end = to_epoch(request.args.get('to') or int(time.time()))
+        start = to_epoch(request.args.get('from') or end - 86400)
+        tolerance = int(request.args.get('tolerance', 300))
+    except ValueError:
+        return Response(status=400)
+    fields = (request.args.get('fields') or 'ws').split(',')
+    bms_fields = (request.args.get('bms_fields') or BMS_FIELDS).split(',')
+    if any(k not in KEYS[2:] for k in fields):
+        return Response(status=400)
+    weather = columns(query(index, dev_id, start, end, ['timestamp'] + fields), fields)
+    bms = read_bms_log(os.path.join(BMS_ROOT, dev_id), start, end, bms_fields)
+    result = asof_join(weather, bms, tolerance, prefix='bms_')
+    return Response(orjson.dumps({k: v.tolist() for k, v in result.items()}), status=200, mimetype='application/json')
+
+@app.route('/api/<string:dev_id>/series', methods=['GET'])
+def series(dev_id):
+    # ?from=&to= (기본: 최근 24시간) &limit=180 (마지막 N 샘플, 0 이면 전부)
+    # 대시보드 7개 패널의 컬럼 단위 JSON {'timestamp': [...], 'temp': [...], ..., 'power': [...]}
+    # 원본 레코드 기준 (edge 집계 모드 기기는 비어 있고, 대시보드에는 stream 으로 온 요약만 그려짐)
+    try:
+        end = to_epoch(request.args.get('to') or int(time.time()))
+        start = to_epoch(request.args.get('from') or end - 86400)
+        limit = int(request.args.get('limit', WINDOW))
+    except ValueError:
+        return Response(status=400)
+    result = panel_series(index, dev_id, start, end, os.path.join(BMS_ROOT, dev_id), max(limit, 0))
+    resp = Response(orjson.dumps({k: v.tolist() for k, v in result.items()}), status=200, mimetype='application/json')
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+@app.route('/api/<string:dev_id>/stream', methods=['GET'])
+def stream(dev_id):
+    # Server-Sent Events: 받아들인 레코드마다 'data: {json}' 이벤트 하나 (polling 대신 EventSource)
+    # queue 가 밀린 느린 클라이언트는 'event: dropped' 를 보내고 끊음 (브라우저는 retry 후 다시 연결)
+    # edge 집계 모드 기기는 받은 요약 행마다 하나 (timestamp 는 구간 끝, 값은 '{field}_last')
+    if len(hub) >= STREAM_MAX_CLIENTS:
+        return Response(status=503, headers={'Retry-After': '30'})
+    subscription = subscribe(dev_id)
+
+    def events():
+        try:
+            yield b'retry: 3000\n\n'
+            while True:
+                item = subscription.get(STREAM_KEEPALIVE)
+                if item is not None:
+                    yield item[1]
+                elif subscription.dropped:
+                    yield b'event: dropped\ndata: {}\n\n'
+                    return
+                else:
+                    yield b': keepalive\n\n'
+        finally:
+            hub.unsubscribe(subscription)
+
+    return Response(events(), status=200, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/<string:dev_id>/plot.png', methods=['GET'])
+def plot_png(dev_id):
+    # ?limit=180 (최근 N 샘플). 요청이 올 때만 그리고, 마지막 레코드가 그대로면 cache / 304
+    # 그래프는 원본 레코드 기준 (edge 집계 모드 기기는 제목의 시각만 요약으로 갱신되고 패널은 비어 있음)
+    try:
+        limit = int(request.args.get('limit', WINDOW))
+    except ValueError:
+        return Response(status=400)
+    if not 1 <= limit <= PLOT_MAX_WINDOW:
+        return Response(status=400)
+    try:
+        latest = orjson.loads(read_data(dev_id))
+    except FileNotFoundError:
+        return Response(status=404)
+    if len(latest) != len(KEYS) and latest.get('timestamp'): # 마지막 줄이 잘림 (쓰는 도중 / 비정상 종료)
+        return Response(status=503, headers={'Retry-After': '60'})
+    try:
+        last = to_epoch(latest['timestamp'])
+    except ValueError: # header 만 있는 (빈) 월 파일
+        return Response(status=404)
+    bms_dir = os.path.join(BMS_ROOT, dev_id)
+    key = (dev_id, limit, last, last_bms_timestamp(bms_dir, last)) # BMS 가 늦게 올라와도 측정 전력이 붙은 그림으로
+    etag = plots.etag(key)
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        # 샘플 주기 60초 기준으로 넉넉한 구간에서 마지막 limit 개
+        series = lambda: panel_series(index, dev_id, last - max(86400, limit * 120), last, bms_dir, limit)
+        title = f"{dev_id}  Last Update: {time.strftime('%Y-%m-%d %H:%M', time.localtime(last))}"
+        resp = Response(plots.get(key, series, title), status=200, mimetype='image/png')
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+@app.route('/dashboard/<string:dev_id>', methods=['GET'])
+def dashboard(dev_id):
+    return app.send_static_file('dashboard.html')
+
 
 if __name__ == '__main__':
     app.run(host='127.0.0.1', port=4465, debug=False)
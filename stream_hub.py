@@ -0,0 +1,88 @@
+"""
+새 레코드를 구독자(SSE 연결 등)에게 나눠 주는 메모리 fan-out hub
+
+publish 한 payload(bytes)는 구독자마다 bounded queue 에 넣고, queue 가 가득 찬 (느린) 구독자는
+기다리지 않고 끊음(dropped) -> 느린 클라이언트 하나가 수집 경로를 막지 않음
+"""
+from collections import deque
+import threading
+import orjson
+
+
+def sse_events(records):
+    """레코드 목록 -> SSE 메시지 bytes (레코드 하나당 'data: {json}' 이벤트 하나)"""
+    return b''.join(b'data: ' + orjson.dumps(record) + b'\n\n' for record in records)
+
+
+class Subscription:
+    """구독자 하나의 queue. get() 은 (dev_id, payload) 또는 timeout/끊김이면 None"""
+
+    def __init__(self, dev_id, max_queue):
+        self.dev_id = dev_id
+        self.max_queue = max_queue
+        self.dropped = False
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def _put(self, item):
+        # hub 에서 호출, 가득 차 있으면 끊고 False
+        with self._cond:
+            if len(self._items) >= self.max_queue:
+                self.dropped = True
+                self._items.clear()
+                self._cond.notify()
+                return False
+            self._items.append(item)
+            self._cond.notify()
+            return True
+
+    def get(self, timeout=None):
+        with self._cond:
+            if not self._items and not self.dropped:
+                self._cond.wait(timeout)
+            return self._items.popleft() if self._items else None
+
+
+class StreamHub:
+    """
+    dev_id 별 구독자 목록. subscribe(None) 은 모든 기기 (ingest_writer -> worker 중계용)
+    max_queue: 구독자마다 밀려 있을 수 있는 publish 수 (넘으면 그 구독자를 끊음)
+    """
+
+    def __init__(self, max_queue=64):
+        self.max_queue = max_queue
+        self.published = 0
+        self.dropped = 0
+        self._subscribers = {} # dev_id (None: 전체) -> set of Subscription
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(subs) for subs in self._subscribers.values())
+
+    def subscribe(self, dev_id=None, max_queue=None):
+        subscription = Subscription(dev_id, max_queue or self.max_queue)
+        with self._lock:
+            self._subscribers.setdefault(dev_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subs = self._subscribers.get(subscription.dev_id)
+            if subs is not None:
+                subs.discard(subscription)
+                if not subs:
+                    del self._subscribers[subscription.dev_id]
+
+    def wants(self, dev_id):
+        """구독자가 없으면 publish 할 payload 를 만들 필요도 없음"""
+        return dev_id in self._subscribers or None in self._subscribers
+
+    def publish(self, dev_id, payload):
+        with self._lock:
+            targets = list(self._subscribers.get(dev_id, ())) + list(self._subscribers.get(None, ()))
+        self.published += 1
+        for subscription in targets:
+            if not subscription._put((dev_id, payload)):
+                self.dropped += 1
+                self.unsubscribe(subscription)
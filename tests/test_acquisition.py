@@ -0,0 +1,178 @@
+"""
+acquisition.py 의 weather_source / bms_source 를 pty 쌍에 물려서 sink 에 도착하는 레코드 확인
+
+    python -m pytest -q tests
+
+master 쪽에 fake_serial 의 기상 프레임 / Daly 응답을 쓰고, source 는 slave 경로를 포트로 엶
+"""
+import asyncio
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from daly_protocol import FRAME_LENGTH, validate_checksum
+import acquisition
+import fake_serial
+
+TIMEOUT = 5
+
+
+class Sink:
+    """Pipeline 대신 publish 된 레코드를 모아 둠"""
+
+    def __init__(self):
+        self.items = []
+
+    def publish(self, item):
+        self.items.append(item)
+
+
+async def read_master(master, size=1024):
+    loop = asyncio.get_running_loop()
+    ready = loop.create_future()
+    loop.add_reader(master, lambda: ready.done() or ready.set_result(None))
+    try:
+        await asyncio.wait_for(ready, TIMEOUT)
+    finally:
+        loop.remove_reader(master)
+    return os.read(master, size)
+
+
+async def wait_for_items(sink, count):
+    async def poll():
+        while len(sink.items) < count:
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), TIMEOUT)
+
+
+async def stop(task):
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+async def bms_responder(master, corrupt=()):
+    # 요청 프레임(13 bytes)마다 fake_serial 응답, corrupt 에 있는 명령어는 첫 응답의 체크섬을 깨뜨림
+    corrupt = set(corrupt)
+    rx = b''
+    while True:
+        rx += await read_master(master)
+        while len(rx) >= FRAME_LENGTH:
+            frame, rx = rx[:FRAME_LENGTH], rx[FRAME_LENGTH:]
+            assert validate_checksum(frame), frame.hex()
+            response = fake_serial.bms_response(frame[2])
+            if frame[2] in corrupt:
+                corrupt.discard(frame[2])
+                response = response[:-1] + bytes([(response[-1] + 1) & 0xFF])
+            os.write(master, response)
+
+
+def run_with_pty(scenario):
+    master, slave, path = fake_serial.open_pty()
+    try:
+        asyncio.run(scenario(master, path))
+    finally:
+        os.close(master)
+        os.close(slave)
+
+
+def test_weather_source_publishes_frames():
+    sinks = {'weather': Sink()}
+
+    async def scenario(master, path):
+        task = asyncio.create_task(acquisition.weather_source(path, {'value': '1.2.3.4'}, sinks))
+        try:
+            # 연결되면 AutoSend 설정부터 보냄 -> 그 뒤에 쓴 프레임만 읽힘
+            assert b'AT+AutoSend=60' in await read_master(master)
+            first, second = fake_serial.weather_frame(), fake_serial.weather_frame()
+            os.write(master, b'noise' + first[:10]) # 쓰레기 + 잘린 프레임
+            await asyncio.sleep(0.05)
+            os.write(master, first[10:] + second)
+            await wait_for_items(sinks['weather'], 2)
+        finally:
+            await stop(task)
+
+    run_with_pty(scenario)
+    records = sinks['weather'].items
+    assert len(records) == 2
+    for record in records:
+        assert list(record) == ['timestamp', 'ip'] + [name for name, *_ in acquisition.edge.FRAME_FIELDS]
+        assert record['ip'] == '1.2.3.4'
+        assert 20 <= record['temp'] <= 30 and 0 <= record['wd'] <= 359
+        assert len(record['timestamp']) == 19
+
+
+def test_bms_source_publishes_pack_and_cell_rows():
+    sinks = {'bms': Sink()}
+    power = {'time': None, 'value': None}
+
+    async def scenario(master, path):
+        responder = asyncio.create_task(bms_responder(master))
+        task = asyncio.create_task(acquisition.bms_source(path, 0.05, sinks, power))
+        try:
+            await wait_for_items(sinks['bms'], 4) # (pack, cells) x 2 주기
+        finally:
+            await stop(task)
+            await stop(responder)
+
+    run_with_pty(scenario)
+    rows = [item for item in sinks['bms'].items if isinstance(item, list)]
+    cells = [item for item in sinks['bms'].items if isinstance(item, tuple)]
+    assert len(rows) >= 2 and len(cells) >= 2
+    for row in rows:
+        assert len(row) == len(acquisition.BMS_COLUMNS)
+        assert row[1] == 13.2 and row[3] == 80.0 # pack voltage, SOC
+    columns, values = cells[0]
+    assert len(columns) == len(values) == 1 + fake_serial.CELLS + fake_serial.TEMP_SENSORS + 2
+    assert all(3280 <= v <= 3300 for v in values[1:1 + fake_serial.CELLS])
+    assert power['value'] == rows[-1][1] * rows[-1][2]
+
+
+def test_bms_source_skips_cycle_with_bad_checksum(capsys):
+    sinks = {'bms': Sink()}
+
+    async def scenario(master, path):
+        # 첫 주기의 pack 측정 응답이 깨짐 -> 그 주기는 버리고 다음 주기부터 정상
+        responder = asyncio.create_task(bms_responder(master, corrupt=[0x90]))
+        task = asyncio.create_task(acquisition.bms_source(path, 0.05, sinks))
+        try:
+            await wait_for_items(sinks['bms'], 2)
+        finally:
+            await stop(task)
+            await stop(responder)
+
+    run_with_pty(scenario)
+    assert 'checksum failed' in capsys.readouterr().out
+    row = sinks['bms'].items[0]
+    assert isinstance(row, list) and row[1] == 13.2
+
+
+def test_parse_ports_assigns_devices():
+    ports = acquisition.parse_ports(['/dev/ttyUSB0', '', 'dev_07=/dev/ttyUSB2'], 'weather')
+    assert ports == [(acquisition.edge.DEV_ID, '/dev/ttyUSB0'), ('dev_07', '/dev/ttyUSB2')]
+    with pytest.raises(ValueError): # 같은 기기에 포트 두 개
+        acquisition.parse_ports(['dev_07=/dev/ttyUSB1', 'dev_07=/dev/ttyUSB2'], 'bms')
+    with pytest.raises(ValueError):
+        acquisition.parse_ports(['weather=/dev/ttyUSB1'], 'weather')
+
+
+def test_devices_keep_separate_storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(acquisition.edge, 'current_dir', str(tmp_path))
+    monkeypatch.setattr(acquisition, 'BMS_DIR', str(tmp_path / 'bms_data'))
+    devices = [acquisition.EdgeDevice('dev_91'), acquisition.EdgeDevice('dev_92')]
+    for device, temp in zip(devices, (21.0, 22.0)):
+        device.make_sinks(weather=False, bms=True)
+        record = {'timestamp': '2024-01-01 00:00:00', 'ip': '1.2.3.4', **dict.fromkeys(acquisition.edge.COLUMNS[2:], temp)}
+        device.write(record)
+        device.upload(record)
+        row = ['2024-01-01 00:00:00', temp, 1.0, 80.0, 3300, 3280, 25, 22]
+        device.write_bms(row)
+        device.upload_bms(row)
+        device.bms_log.close()
+    for device, temp in zip(devices, ('21.0', '22.0')):
+        segment = tmp_path / 'sensor_data' / device.dev_id / '2024-01' / f'{device.dev_id}_2024-01-01.csv'
+        assert segment.read_text().splitlines()[-1].split(',')[2] == temp
+        assert device.uplink.pending() > 0 and device.uplink.path.startswith(str(tmp_path))
+        log = tmp_path / 'bms_data' / device.dev_id / 'bms_data_log_2024-01-01.csv'
+        assert log.read_text().splitlines()[-1].split(',')[1] == temp
+        assert device.bms_uplink.pending() > 0 and device.bms_uplink.url.endswith(f'/api/{device.dev_id}/bms')
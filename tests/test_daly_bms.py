@@ -0,0 +1,75 @@
+"""
+daly_bms.DalyBMSUART 의 한 번에 보내고 한 번에 받는 query / get_cell_snapshot 을 pty 쌍에 물려서 확인
+
+    python -m pytest -q tests
+
+master 쪽 스레드가 요청 프레임마다 fake_serial 응답을 씀 (stray {명령어 byte: 쓰레기}: 그 응답 앞에 한 번)
+"""
+import threading
+import select
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from daly_protocol import FRAME_LENGTH, COMMAND
+from daly_bms import DalyBMSUART
+import fake_serial
+
+
+class Responder(threading.Thread):
+    def __init__(self, master, stray=None, skip=()):
+        super().__init__(daemon=True)
+        self.master, self.stray, self.skip = master, dict(stray or {}), set(skip)
+        self.running = True
+
+    def run(self):
+        rx = b''
+        while self.running:
+            if not select.select([self.master], [], [], 0.05)[0]:
+                continue
+            rx += os.read(self.master, 1024)
+            while len(rx) >= FRAME_LENGTH:
+                frame, rx = rx[:FRAME_LENGTH], rx[FRAME_LENGTH:]
+                if frame[2] in self.skip:
+                    continue
+                os.write(self.master, self.stray.pop(frame[2], b'') + fake_serial.bms_response(frame[2]))
+
+
+def run_with_bms(scenario, **responder):
+    master, slave, path = fake_serial.open_pty()
+    thread = Responder(master, **responder)
+    thread.start()
+    bms = DalyBMSUART(path, timeout=0.3)
+    try:
+        return scenario(bms)
+    finally:
+        thread.running = False
+        thread.join()
+        bms.close()
+        os.close(master)
+        os.close(slave)
+
+
+def test_query_reads_past_stray_byte():
+    responses = run_with_bms(lambda bms: bms.query(DalyBMSUART.SNAPSHOT), stray={COMMAND['VOUT_IOUT_SOC']: b'\x00'})
+    assert sorted(responses) == sorted(DalyBMSUART.SNAPSHOT)
+
+
+def test_cell_snapshot_reads_past_stray_bytes():
+    # 시작 플래그(0xA5)처럼 보이는 쓰레기 -> 마지막 프레임이 2 byte 모자라게 잘림
+    def scenario(bms):
+        bms.get_status()
+        return bms.get_cell_snapshot()
+
+    cells = run_with_bms(scenario, stray={COMMAND['CELL_VOLTAGES']: b'\x00\xa5'})
+    assert cells is not None
+    voltages, temps, _, _ = cells
+    assert len(voltages) == fake_serial.CELLS and len(temps) == fake_serial.TEMP_SENSORS
+
+
+def test_query_returns_partial_at_deadline():
+    started = time.monotonic()
+    responses = run_with_bms(lambda bms: bms.query(DalyBMSUART.SNAPSHOT), skip=[COMMAND['MIN_MAX_TEMPERATURE']])
+    assert sorted(responses) == ['MIN_MAX_CELL_VOLTAGE', 'VOUT_IOUT_SOC']
+    assert time.monotonic() - started < 0.3 * len(DalyBMSUART.SNAPSHOT) + 0.5
@@ -0,0 +1,31 @@
+"""
+writer_pool.WriterPool 의 fsync='interval': 더 쓰지 않는 핸들도 fsync_interval 안에 fsync 되는지 확인
+
+    python -m pytest -q tests
+"""
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import writer_pool
+from writer_pool import WriterPool
+
+
+def test_interval_fsyncs_idle_handles(tmp_path, monkeypatch):
+    synced = []
+    fsync = os.fsync
+    monkeypatch.setattr(writer_pool.os, 'fsync', lambda fd: (synced.append(fd), fsync(fd)))
+    pool = WriterPool(fsync='interval', fsync_interval=0.05)
+    path = str(tmp_path / 'dev_01.csv')
+    pool.append('dev_01', path, 'a,b\n', header='x,y\n')
+    assert not synced # 요청 스레드에서는 fsync 하지 않음
+    fd = pool._writers['dev_01'].file.fileno()
+    deadline = time.monotonic() + 2
+    while fd not in synced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert fd in synced and not pool._writers['dev_01'].dirty
+    count = len(synced)
+    time.sleep(0.2) # 새로 쓴 게 없으면 다시 fsync 하지 않음
+    assert len(synced) == count
+    pool.close_all()
@@ -1,5 +1,17 @@
+from writer_pool import WriterPool
+from history import SparseIndex, last_line, scan
+from binstore import BinaryStore
+from rollup import Rollups
+from edge_summary import SUMMARY_ROOT, SUMMARY_WINDOWS
+from asof import BMS_COLUMNS
+from schema import Schema
+from ingest_writer import WriterClient
+from stream_hub import StreamHub, sse_events
+from operator import itemgetter
 from datetime import datetime
+import threading
 import orjson
+import time
 import os
 
 
@@ -7,40 +19,299 @@ import os
 KEYS = ['timestamp', 'ip', 'temp', 'humidity', 'ws', 'wd',
         'north_direction', 'atmospheric_pressure', 'rainfall', 'voltage']
 TYPES = [int, str, float, float, float, int, float, float, float, float]
+get_values = itemgetter(*KEYS) # dict -> tuple of values in KEYS order
+HEADER = ','.join(KEYS) + '\n'
+# timestamp 는 epoch int 또는 '%Y-%m-%d %H:%M:%S' 문자열, 저장 시 epoch int 로 정규화
+SCHEMA = Schema(KEYS, TYPES, timestamp='timestamp')
+
+# one open handle per device, closed when the month changes
+FSYNC_POLICY, FSYNC_INTERVAL = 'interval', 5.0 # 'record' | 'interval' | 'none'
+pool = WriterPool(max_open=64, fsync=FSYNC_POLICY, fsync_interval=FSYNC_INTERVAL)
+# timestamp -> byte offset every ~16 KB, for /api/<dev_id>/history
+index = SparseIndex(every=16384)
+# 5m / 1h / 1d min, max, mean, last of every numeric field, for /api/<dev_id>/aggregate
+rollups = Rollups(KEYS[2:], pool, index)
+# edge 집계 모드의 요약 (edge_summary.py): {SUMMARY_ROOT}/{dev_id}_{window}s.csv, rollup 과 같은 컬럼 + ip
+# window 는 SUMMARY_WINDOWS 중 하나만 (기기가 보낸 값으로 파일 / writer handle 이 끝없이 늘지 않게)
+SUMMARY_COLUMNS = rollups.columns + ['ip']
+SUMMARY_HEADER = ','.join(SUMMARY_COLUMNS) + '\n'
+_summary_pos = {c: i for i, c in enumerate(rollups.columns)}
+# 요약 행 -> read_data / stream 용 레코드 (구간 끝 시각, 필드마다 '{field}_last')
+_summary_last = [_summary_pos[f'{k}_last'] for k in KEYS[2:]]
+# edge 가 올린 BMS 일별 로그 (asof.read_bms_log 가 읽는 형식): {BMS_ROOT}/{dev_id}/bms_data_log_YYYY-MM-DD.csv
+BMS_ROOT = 'sensor_data/bms'
+BMS_HEADER = ','.join(BMS_COLUMNS) + '\n'
+_bms_keys = set(BMS_COLUMNS)
+# dev_id -> (날짜, 마지막으로 기록한 Timestamp). 이하인 행은 재전송으로 보고 건너뜀 (파일이 시간 순서를 유지)
+_bms_last = {}
+# optional fixed-width binary copy of every record (sensor_data/bin/{dev_id}.bin)
+BINARY_STORE = False
+binary = BinaryStore(pool)
+
+# (dev_id, yyyy_mm) -> read_data 응답(json bytes). update_data/update_batch 가 갱신
+_latest = {}
+
+# /api/<dev_id>/stream 구독자에게 새 레코드 push (구독자마다 밀린 publish 가 STREAM_QUEUE 를 넘으면 끊음)
+STREAM_QUEUE = 64
+hub = StreamHub(max_queue=STREAM_QUEUE)
+_relay = None
+_relay_lock = threading.Lock()
+
+# 여러 worker 프로세스로 실행할 때 (gunicorn.conf.py): 쓰기, 최신값, 집계는 ingest_writer 프로세스 하나가 담당
+WRITER_SOCKET = os.environ.get('WRITER_SOCKET')
+writer = WriterClient(WRITER_SOCKET) if WRITER_SOCKET else None
 
 def check_data(dev_id, data):
-    if list(data.keys()) != KEYS or not dev_id.startswith('dev_'):
-        return False
-    else:
-        for k, t in zip(KEYS, TYPES):
-            if type(data[k]) is not t:
-                return False
-        return True
+    """검증 후 정규화된 레코드(KEYS 순서, epoch timestamp) 반환, 틀리면 None"""
+    record, _ = SCHEMA.validate(dev_id, data)
+    return record
+
+def check_batch(dev_id, records):
+    """
+    여러 레코드를 한 번에 검증. (정규화된 레코드 list, 거부 목록 [{'index', 'reason', 'fields'}]) 반환
+    fields 는 필드별 사유 {'ws': 'expected float, got str', 'temp': 'missing', ...}
+    레코드별 loop 없이 필드 column 단위 numpy 검사 (schema.Schema.validate_batch), 사유는 거부된 레코드만 계산
+    """
+    return SCHEMA.validate_batch(dev_id, records)
+
+def _latest_json(values):
+    return orjson.dumps(dict(zip(KEYS, values)))
 
 def read_data(dev_id):
+    if writer:
+        return writer.call('latest', dev_id=dev_id).encode()
     yyyy_mm = datetime.now().strftime('%Y-%m')
-    data_path = f'sensor_data/{yyyy_mm}/{dev_id}.csv'
-    with open(data_path, mode='r') as f:
-        lines = f.readlines()
-    values = lines[-1].strip().split(',')
-    data = {}
-    for key, value in zip(KEYS, values):
-        data[key] = value
-    return orjson.dumps(data)
+    current_status = _latest.get((dev_id, yyyy_mm))
+    if current_status is None: # restart: rebuild from the end of the file
+        data_path = f'sensor_data/{yyyy_mm}/{dev_id}.csv'
+        try:
+            values = last_line(data_path).strip().split(',')
+        except FileNotFoundError: # edge 집계 모드 기기: 원본 없이 요약 파일만
+            values = _summary_latest(dev_id)
+        current_status = _latest[(dev_id, yyyy_mm)] = _latest_json(values)
+    return current_status
 
 def update_data(dev_id, data):
+    if writer:
+        writer.call('append', dev_id=dev_id, records=[data])
+        return
+    yyyy_mm = datetime.now().strftime('%Y-%m')
+    data_path = f'sensor_data/{yyyy_mm}/{dev_id}.csv'
+    line = ','.join(map(str, data.values()))
+    offset = pool.append(dev_id, data_path, f'{line}\n', header=HEADER)
+    index.note(data_path, offset, [line])
+    rollups.add(dev_id, [data])
+    if BINARY_STORE:
+        binary.append(dev_id, [data])
+    _latest[(dev_id, yyyy_mm)] = _latest_json(line.split(','))
+    if hub.wants(dev_id):
+        hub.publish(dev_id, sse_events([data]))
+    return
+
+def update_batch(dev_id, records):
+    # 모든 레코드를 한 번의 write 로 추가
+    if not records:
+        return
+    if writer:
+        writer.call('append', dev_id=dev_id, records=records)
+        return
     yyyy_mm = datetime.now().strftime('%Y-%m')
     data_path = f'sensor_data/{yyyy_mm}/{dev_id}.csv'
-    if not os.path.exists(data_path):
-        os.makedirs(f'sensor_data/{yyyy_mm}', exist_ok=True)
-        columns = ''
-        for key in data.keys():
-            columns += key + ',' 
-        with open(data_path, mode='a') as f:
-            f.writelines(f"{columns[:-1]}\n") # removing the last char ','
-    line = ''
-    for value in data.values():
-        line += str(value) + ','        
-    with open(data_path, mode='a') as f:
-        f.writelines(f"{line[:-1]}\n") # removing the last char ','
-    return
\ No newline at end of file
+    lines = [','.join(map(str, get_values(data))) for data in records]
+    offset = pool.append(dev_id, data_path, '\n'.join(lines) + '\n', header=HEADER)
+    index.note(data_path, offset, lines)
+    rollups.add(dev_id, records)
+    if BINARY_STORE:
+        binary.append(dev_id, records)
+    _latest[(dev_id, yyyy_mm)] = _latest_json(lines[-1].split(','))
+    if hub.wants(dev_id):
+        hub.publish(dev_id, sse_events(records))
+    return
+
+def check_summary(dev_id, payload):
+    """
+    edge 요약 업로드 {'ip', 'window', 'columns', 'rows'} 검증 -> (window, SUMMARY_COLUMNS 순서의 행 목록, 거부 목록 [{'index', 'reason', 'fields'}])
+    columns 는 'start', 'count' 로 시작하고 나머지는 rollup 컬럼 중 일부 (빠진 컬럼은 빈 값)
+    업로드 전체가 틀리면 거부 목록 하나에 index None, 행이 하나라도 틀리면 행 목록은 비움 (일부만 저장하지 않음)
+    """
+    def whole(reason):
+        return None, [], [{'index': None, 'reason': reason, 'fields': {}}]
+    if not dev_id.startswith('dev_'):
+        return whole('dev_id')
+    if not isinstance(payload, dict):
+        return whole('payload')
+    window, columns, rows, ip = (payload.get(k) for k in ('window', 'columns', 'rows', 'ip'))
+    if type(window) is not int or window not in SUMMARY_WINDOWS:
+        return whole('window')
+    if type(ip) is not str:
+        return whole('ip')
+    if not isinstance(columns, list) or columns[:2] != ['start', 'count']:
+        return whole('columns')
+    if any(c not in _summary_pos for c in columns) or len(set(columns)) != len(columns):
+        return whole('columns')
+    if not isinstance(rows, list):
+        return whole('rows')
+    positions = [_summary_pos[c] for c in columns]
+    result = []
+    rejected = []
+    for n, row in enumerate(rows):
+        if not isinstance(row, list) or len(row) != len(columns):
+            rejected.append({'index': n, 'reason': 'shape', 'fields': {}})
+            continue
+        fields = {c: f'expected number, got {type(v).__name__}' for c, v in zip(columns, row) if type(v) not in (int, float)}
+        if type(row[0]) is not int and 'start' not in fields:
+            fields['start'] = f'expected int, got {type(row[0]).__name__}'
+        if fields:
+            rejected.append({'index': n, 'reason': 'type', 'fields': fields})
+            continue
+        values = [''] * len(SUMMARY_COLUMNS)
+        for i, v in zip(positions, row):
+            values[i] = v
+        values[-1] = ip
+        result.append(values)
+    if rejected:
+        return window, [], rejected
+    result.sort(key=lambda values: values[0])
+    return window, result, []
+
+def update_summary(dev_id, window, rows):
+    if not rows:
+        return
+    if writer:
+        writer.call('summary', dev_id=dev_id, window=window, rows=rows)
+        return
+    data_path = f'{SUMMARY_ROOT}/{dev_id}_{window}s.csv'
+    lines = [','.join(map(str, values)) for values in rows]
+    offset = pool.append((dev_id, f'{window}s'), data_path, '\n'.join(lines) + '\n', header=SUMMARY_HEADER)
+    index.note(data_path, offset, lines)
+    # 원본 레코드가 없는 기기: 마지막 요약의 *_last 값을 최신 레코드로 (GET /api/<dev_id>, plot.png 제목, stream)
+    yyyy_mm = datetime.now().strftime('%Y-%m')
+    last = _summary_record(rows[-1], window)
+    _latest[(dev_id, yyyy_mm)] = _latest_json(['' if v is None else str(v) for v in last.values()]) # update_data 처럼 CSV 문자열
+    if hub.wants(dev_id):
+        hub.publish(dev_id, sse_events(_summary_record(values, window) for values in rows))
+
+def _summary_record(values, window):
+    # 요약 행 하나 -> KEYS 의 레코드 (업로드에 없던 필드는 None)
+    record = {'timestamp': values[0] + window, 'ip': values[-1]}
+    for k, i in zip(KEYS[2:], _summary_last):
+        record[k] = None if values[i] == '' else values[i]
+    return record
+
+def check_bms(dev_id, records):
+    """
+    edge BMS 업로드 [{'Timestamp', 'Pack Voltage', ...}] 검증 -> (BMS_COLUMNS 순서의 행 목록, 거부 목록 [{'index', 'reason', 'fields'}])
+    Timestamp 는 '%Y-%m-%d %H:%M:%S' (edge local time, 일별 파일 이름도 이 날짜), 나머지는 숫자 또는 null (빈 값)
+    """
+    if not dev_id.startswith('dev_'):
+        return [], [{'index': i, 'reason': 'dev_id', 'fields': {}} for i in range(len(records))]
+    rows, rejected = [], []
+    for n, record in enumerate(records):
+        if type(record) is not dict or record.keys() != _bms_keys:
+            rejected.append({'index': n, 'reason': 'keys', 'fields': {}})
+            continue
+        fields = {c: f'expected number, got {type(record[c]).__name__}' for c in BMS_COLUMNS[1:]
+                  if record[c] is not None and type(record[c]) not in (int, float)}
+        try:
+            datetime.strptime(record['Timestamp'], '%Y-%m-%d %H:%M:%S')
+        except (TypeError, ValueError):
+            fields['Timestamp'] = "expected '%Y-%m-%d %H:%M:%S'"
+        if fields:
+            rejected.append({'index': n, 'reason': 'type', 'fields': fields})
+            continue
+        rows.append(['' if record[c] is None else record[c] for c in BMS_COLUMNS])
+    return rows, rejected
+
+def update_bms(dev_id, rows):
+    """행들을 Timestamp 날짜별 파일에 추가, 실제로 기록한 행 수 반환 (이미 기록한 Timestamp 이하는 건너뜀)"""
+    if not rows:
+        return 0
+    if writer:
+        return writer.call('bms', dev_id=dev_id, rows=rows)
+    days = {}
+    for row in sorted(rows, key=itemgetter(0)):
+        days.setdefault(row[0][:10], []).append(row)
+    written = 0
+    for day, day_rows in days.items():
+        data_path = f'{BMS_ROOT}/{dev_id}/bms_data_log_{day}.csv'
+        cached = _bms_last.get(dev_id)
+        last = cached[1] if cached and cached[0] == day else _bms_file_last(data_path)
+        lines = []
+        for row in day_rows:
+            if row[0] > last: # 같은 형식의 문자열이라 비교 = 시각 비교
+                lines.append(','.join(map(str, row)))
+                last = row[0]
+        if lines:
+            pool.append((dev_id, 'bms'), data_path, '\n'.join(lines) + '\n', header=BMS_HEADER)
+            written += len(lines)
+        _bms_last[dev_id] = (day, last)
+    return written
+
+def _bms_file_last(data_path):
+    # 재시작 / 다른 날짜: 파일 마지막 줄의 Timestamp (없거나 헤더만 있으면 '')
+    try:
+        timestamp = last_line(data_path).split(',', 1)[0]
+    except FileNotFoundError:
+        return ''
+    return '' if timestamp == BMS_COLUMNS[0] else timestamp
+
+def _summary_latest(dev_id):
+    # 재시작 뒤 첫 read_data: window 별 요약 파일의 마지막 행 중 가장 늦게 끝난 구간 -> update_summary 와 같은 CSV 문자열
+    latest = None
+    for window in SUMMARY_WINDOWS:
+        try:
+            line = last_line(f'{SUMMARY_ROOT}/{dev_id}_{window}s.csv').strip()
+        except FileNotFoundError:
+            continue
+        values = line.split(',')
+        if len(values) != len(SUMMARY_COLUMNS) or not values[0].isdigit(): # 헤더만 있는 파일
+            continue
+        values[0] = int(values[0])
+        if latest is None or values[0] + window > latest[0][0] + latest[1]:
+            latest = values, window
+    if latest is None:
+        raise FileNotFoundError(dev_id)
+    return ['' if v is None else str(v) for v in _summary_record(*latest).values()]
+
+def read_summary(dev_id, window, start, end, fields=None):
+    """start ~ end 요약을 컬럼 단위 dict 로 {'start': [...], 'count': [...], 'temp_min': [...], ..., 'ip': [...]} (빠진 값은 None)"""
+    columns = SUMMARY_COLUMNS
+    if fields:
+        columns = ['start', 'count'] + [c for c in SUMMARY_COLUMNS[2:-1] if c.rsplit('_', 1)[0] in fields] + ['ip']
+    result = {c: [] for c in columns}
+    for row in scan(index, f'{SUMMARY_ROOT}/{dev_id}_{window}s.csv', start, end, columns):
+        for c in columns:
+            result[c].append(None if row[c] == '' else row[c]) # 업로드에 없던 컬럼
+    return result
+
+def read_rollups(dev_id, bucket, start, end, fields=None):
+    # 열린 구간은 writer 프로세스 메모리에만 있음
+    if writer:
+        return writer.call('aggregate', dev_id=dev_id, bucket=bucket, start=start, end=end, fields=fields)
+    return rollups.aggregate(dev_id, bucket, start, end, fields)
+
+def subscribe(dev_id):
+    # worker 에서는 writer 가 받은 레코드를 연결 하나로 중계받아 이 프로세스의 hub 로 publish
+    global _relay
+    if writer and _relay is None:
+        with _relay_lock:
+            if _relay is None:
+                _relay = threading.Thread(target=_relay_from_writer, name='stream_relay', daemon=True)
+                _relay.start()
+    return hub.subscribe(dev_id)
+
+def _relay_from_writer():
+    while True:
+        try:
+            for dev_id, payload in writer.subscribe():
+                hub.publish(dev_id, payload)
+        except OSError as e:
+            print(f"stream relay: {e!r}")
+        time.sleep(1)
+
+def write_binary(dev_id, records):
+    binary.append(dev_id, records)
+
+def read_binary(dev_id, start=None, end=None):
+    # numpy structured array (binstore.DTYPE), ip 는 binary.ips(dev_id) 의 번호
+    return binary.read(dev_id, start, end)
@@ -0,0 +1,113 @@
+from collections import OrderedDict
+import threading
+import atexit
+import time
+import os
+
+
+FSYNC_POLICIES = ('record', 'interval', 'none')
+
+
+class _Writer:
+    def __init__(self, path, header):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.file = open(path, mode='ab')
+        self.lock = threading.Lock()
+        self.closed = False
+        self.dirty = False # 마지막 fsync 이후 쓴 내용이 있음
+        if self.file.tell() == 0 and header:
+            self.file.write(header.encode())
+
+    def close(self):
+        with self.lock:
+            if not self.closed:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.file.close()
+                self.closed = True
+
+
+class WriterPool:
+    """
+    key(기기)마다 열린 파일 핸들 하나를 유지하는 append 전용 writer pool.
+    - path 가 바뀌면(월 변경) 이전 파일을 닫고 새 파일로 넘어감, 새 파일에만 header 기록
+    - max_open 을 넘으면 가장 오래 안 쓴 핸들부터 닫음 (LRU)
+    - append 는 핸들별 lock 안에서 한 번에 write + flush -> 동시 요청이 줄을 섞지 않음
+    - fsync: 'record' 매 append, 'interval' 백그라운드 스레드가 fsync_interval 초마다 쓴 핸들만
+      (요청 스레드는 fsync 를 기다리지 않고, 더 쓰지 않는 핸들도 interval 안에 디스크로), 'none' OS 에 맡김
+    - 닫히는 핸들(월 변경, LRU 제거, 종료)은 close 에서 fsync
+    """
+
+    def __init__(self, max_open=64, fsync='interval', fsync_interval=5.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f'fsync must be one of {FSYNC_POLICIES}')
+        self.max_open = max_open
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._writers = OrderedDict()
+        self._lock = threading.Lock()
+        self._syncer = None # 첫 append 에서 시작 (gunicorn 이 fork 하기 전에 import 되어도 worker 마다 하나)
+        atexit.register(self.close_all)
+
+    def _get(self, key, path, header):
+        with self._lock:
+            writer = self._writers.get(key)
+            if writer is not None and writer.path == path and not writer.closed:
+                self._writers.move_to_end(key)
+                return writer
+            if writer is not None: # rollover
+                writer.close()
+            writer = self._writers[key] = _Writer(path, header)
+            while len(self._writers) > self.max_open:
+                _, old = self._writers.popitem(last=False)
+                old.close()
+            return writer
+
+    def append(self, key, path, text, header=''):
+        """text(완성된 줄들 또는 bytes)를 추가하고, text 가 시작하는 byte offset 을 반환"""
+        data = text if isinstance(text, bytes) else text.encode()
+        if self.fsync == 'interval' and (self._syncer is None or not self._syncer.is_alive()):
+            self._start_syncer()
+        while True:
+            writer = self._get(key, path, header)
+            with writer.lock:
+                if writer.closed: # evicted by another thread in between
+                    continue
+                offset = writer.file.tell()
+                writer.file.write(data)
+                writer.file.flush()
+                if self.fsync == 'record':
+                    os.fsync(writer.file.fileno())
+                else:
+                    writer.dirty = True
+                return offset
+
+    def _start_syncer(self):
+        with self._lock:
+            if self._syncer is None or not self._syncer.is_alive():
+                self._syncer = threading.Thread(target=self._sync_loop, name='writer-fsync', daemon=True)
+                self._syncer.start()
+
+    def _sync_loop(self):
+        while True:
+            time.sleep(self.fsync_interval)
+            self.sync()
+
+    def sync(self):
+        """마지막 fsync 이후 쓴 내용이 있는 핸들만 fsync"""
+        with self._lock:
+            writers = [writer for writer in self._writers.values() if writer.dirty]
+        for writer in writers:
+            with writer.lock:
+                if writer.closed or not writer.dirty:
+                    continue
+                os.fsync(writer.file.fileno())
+                writer.dirty = False
+
+    def close_all(self):
+        with self._lock:
+            writers = list(self._writers.values())
+            self._writers.clear()
+        for writer in writers:
+            writer.close()
@@ -1,4 +1,7 @@
 from server import app
 
+# gunicorn -c gunicorn.conf.py wsgi:application
+application = app
+
 if __name__ == "__main__":
     app.run()
\ No newline at end of file